@@ -228,6 +228,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  # Directory to store media files
 SCHEDULING_OUTBOX_MAX_ATTEMPTS = 5
 SCHEDULING_OUTBOX_RETRY_BASE_SECONDS = 30
 SCHEDULING_OUTBOX_RETRY_MAX_SECONDS = 3600
+SCHEDULING_OUTBOX_RETENTION_DAYS = 14
+SCHEDULING_IDEMPOTENCY_TTL_SECONDS = 86400
+SCHEDULING_IDEMPOTENCY_CACHE_TIMEOUT_SECONDS = 3600
 SCHEDULING_WEBHOOK_URLS = []
 SCHEDULING_WEBHOOK_TARGETS = []
 SCHEDULING_WEBHOOK_SECRET = ""
@@ -235,3 +238,17 @@ SCHEDULING_WEBHOOK_TIMEOUT_SECONDS = 5
 SCHEDULING_WEBHOOK_CIRCUIT_FAILURE_THRESHOLD = 5
 SCHEDULING_WEBHOOK_CIRCUIT_OPEN_SECONDS = 120
 SCHEDULING_WEBHOOK_METRICS_TTL_SECONDS = 86400
+SCHEDULING_WEBHOOK_MAX_CONCURRENCY_PER_TARGET = 8
+SCHEDULING_WEBHOOK_DELIVERY_THREADS = 32
+SCHEDULING_BOOKING_INDEX_MAX_AGE_SECONDS = 300
+SCHEDULING_BOOKING_INDEX_MAX_RESOURCES = 1024
+SCHEDULING_BOOKING_INDEX_HORIZON_DAYS = 180
+SCHEDULING_MATERIALIZATION_HORIZON_DAYS = 180
+SCHEDULING_SEARCH_CACHE_TIMEOUT_SECONDS = 86400
+SCHEDULING_SEARCH_MAX_SCAN_RESOURCES = 500
+SCHEDULING_CAPACITY_CALENDAR_TIMEOUT_SECONDS = 86400
+SCHEDULING_CAPACITY_CALENDAR_MAX_DAYS = 92
+SCHEDULING_OPS_COUNTERS_REBUILD_SECONDS = 3600
+SCHEDULING_CALENDAR_SYNC_OVERLAP_SECONDS = 30
+SCHEDULING_CALENDAR_FEED_PAST_DAYS = 30
+SCHEDULING_CALENDAR_FEED_FUTURE_DAYS = 365
@@ -10,6 +10,23 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def build_notification_event(notification: Notification) -> dict:
+    """Build the ``notification.new`` channel-layer message for a saved notification."""
+    return {
+        'type': 'notification.new',
+        'notification': {
+            'id': notification.id,
+            'notification_type': notification.notification_type,
+            'title': notification.title,
+            'message': notification.message,
+            'link_type': notification.link_type,
+            'link_id': notification.link_id,
+            'sender_username': notification.sender.username if notification.sender else None,
+            'created_at': notification.created_at.isoformat(),
+        }
+    }
+
+
 def create_notification(
     recipient,
     notification_type: str,
@@ -40,19 +57,7 @@ def create_notification(
         if channel_layer:
             async_to_sync(channel_layer.group_send)(
                 f'notifications_{recipient.id}',
-                {
-                    'type': 'notification.new',
-                    'notification': {
-                        'id': notification.id,
-                        'notification_type': notification.notification_type,
-                        'title': notification.title,
-                        'message': notification.message,
-                        'link_type': notification.link_type,
-                        'link_id': notification.link_id,
-                        'sender_username': sender.username if sender else None,
-                        'created_at': notification.created_at.isoformat(),
-                    }
-                }
+                build_notification_event(notification)
             )
     except Exception as exc:
         logger.warning(f'Failed to broadcast notification: {exc}')
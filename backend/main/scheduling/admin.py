@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from .models import (
     AuditLog,
+    AvailabilityDirtyRange,
     AvailabilityException,
     AvailabilityRule,
     AvailabilitySlot,
@@ -9,13 +10,17 @@ from .models import (
     Booking,
     BookingRequest,
     CalendarEvent,
+    CalendarFeedToken,
     IdempotencyRecord,
     MarketplaceResource,
     OutboxDeadLetter,
+    OutboxDelivery,
     OutboxEvent,
+    OutboxEventArchive,
     ResourcePolicy,
     WebhookTarget,
 )
+from .services import bump_webhook_targets_version_on_commit
 
 
 @admin.register(MarketplaceResource)
@@ -49,6 +54,12 @@ class AvailabilitySlotAdmin(admin.ModelAdmin):
     list_filter = ("is_bookable",)
 
 
+@admin.register(AvailabilityDirtyRange)
+class AvailabilityDirtyRangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "resource", "start_date", "end_date", "reason", "created_at")
+    list_filter = ("reason",)
+
+
 @admin.register(BookingRequest)
 class BookingRequestAdmin(admin.ModelAdmin):
     list_display = ("id", "event", "resource", "organizer", "status", "requested_start_at", "requested_end_at")
@@ -67,6 +78,13 @@ class CalendarEventAdmin(admin.ModelAdmin):
     list_filter = ("actor_type", "calendar_type")
 
 
+@admin.register(CalendarFeedToken)
+class CalendarFeedTokenAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "scope", "created_at", "updated_at")
+    list_filter = ("scope",)
+    exclude = ("token_hash",)
+
+
 @admin.register(IdempotencyRecord)
 class IdempotencyRecordAdmin(admin.ModelAdmin):
     list_display = ("id", "owner", "endpoint", "key", "response_status", "created_at")
@@ -85,6 +103,19 @@ class OutboxEventAdmin(admin.ModelAdmin):
     list_filter = ("status", "event_type")
 
 
+@admin.register(OutboxDelivery)
+class OutboxDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("id", "outbox_event", "consumer", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    search_fields = ("consumer",)
+
+
+@admin.register(OutboxEventArchive)
+class OutboxEventArchiveAdmin(admin.ModelAdmin):
+    list_display = ("id", "original_id", "event_type", "aggregate_type", "aggregate_id", "created_at", "archived_at")
+    search_fields = ("event_type", "aggregate_type", "aggregate_id")
+
+
 @admin.register(OutboxDeadLetter)
 class OutboxDeadLetterAdmin(admin.ModelAdmin):
     list_display = ("id", "event_type", "aggregate_type", "aggregate_id", "attempts", "created_at")
@@ -97,6 +128,19 @@ class WebhookTargetAdmin(admin.ModelAdmin):
     list_filter = ("is_active",)
     search_fields = ("url", "description")
 
+    # Dispatchers cache the target list per process until this version moves.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_webhook_targets_version_on_commit()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_webhook_targets_version_on_commit()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_webhook_targets_version_on_commit()
+
 
 @admin.register(BookingConflictIncident)
 class BookingConflictIncidentAdmin(admin.ModelAdmin):
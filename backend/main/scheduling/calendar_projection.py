@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as datetime_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .exceptions import PolicyViolationError
+from .models import Booking, BookingRequest, CalendarEvent
+
+
+PROJECTED_FIELDS = ("resource", "event", "calendar_type", "title", "start_at", "end_at", "payload", "is_deleted")
+# Items in these states are sent to sync clients as deletions.
+TOMBSTONE_STATUSES = {
+    "booking": frozenset({Booking.Status.CANCELLED, Booking.Status.EXPIRED}),
+    "request": frozenset(
+        {BookingRequest.Status.DECLINED, BookingRequest.Status.WITHDRAWN, BookingRequest.Status.EXPIRED}
+    ),
+}
+_EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+
+
+def _calendar_rows(*, kind: str, source, start_at: datetime, end_at: datetime):
+    document = {
+        "type": kind,
+        "id": source.id,
+        "status": source.status,
+        "event_id": source.event_id,
+        "resource_id": source.resource_id,
+    }
+    links = {"booking": source} if kind == "booking" else {"request": source}
+    calendar_type = CalendarEvent.CalendarType.BOOKED if kind == "booking" else CalendarEvent.CalendarType.PENDING
+    # One row per scope that can see the item; admin rows have no actor user.
+    actors = (
+        (CalendarEvent.ActorType.ORGANIZER, source.organizer_id),
+        (CalendarEvent.ActorType.RESOURCE, source.resource.owner_id),
+        (CalendarEvent.ActorType.ADMIN, None),
+    )
+    return [
+        CalendarEvent(
+            actor_type=actor_type,
+            actor_user_id=actor_user_id,
+            resource_id=source.resource_id,
+            event_id=source.event_id,
+            calendar_type=calendar_type,
+            title=f"{source.resource.display_name} {kind}",
+            start_at=start_at,
+            end_at=end_at,
+            payload=document,
+            **links,
+        )
+        for actor_type, actor_user_id in actors
+    ]
+
+
+def _row_key(row: CalendarEvent):
+    return row.booking_id, row.request_id, row.actor_type, row.actor_user_id
+
+
+def _row_changed(current: CalendarEvent, fresh: CalendarEvent):
+    return any(
+        getattr(current, field.attname) != getattr(fresh, field.attname)
+        for field in (CalendarEvent._meta.get_field(name) for name in PROJECTED_FIELDS)
+    )
+
+
+def project_calendar_events(*, booking_ids=(), request_ids=()):
+    """Bring the ``CalendarEvent`` rows of the given bookings and requests up to date.
+
+    Rows are rebuilt from the current source rows rather than from event payloads,
+    so replays and out-of-order deliveries converge on the same state. Rows are
+    updated in place and only when something changed, which keeps ``updated_at``
+    usable as a sync cursor; rows an actor should no longer see become tombstones.
+    Returns the number of rows written.
+    """
+    booking_ids = {booking_id for booking_id in booking_ids if booking_id}
+    request_ids = {request_id for request_id in request_ids if request_id}
+    if not booking_ids and not request_ids:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Locking the source rows serializes projections of the same item, so two workers
+        # handling its events cannot both insert rows or write an older snapshot last.
+        desired = {}
+        if booking_ids:
+            bookings = (
+                Booking.objects.select_for_update(of=("self",))
+                .filter(id__in=booking_ids)
+                .select_related("resource")
+                .order_by("id")
+            )
+            for booking in bookings:
+                rows = _calendar_rows(kind="booking", source=booking, start_at=booking.start_at, end_at=booking.end_at)
+                for row in rows:
+                    desired[_row_key(row)] = row
+        if request_ids:
+            booking_requests = (
+                BookingRequest.objects.select_for_update(of=("self",))
+                .filter(id__in=request_ids)
+                .select_related("resource")
+                .order_by("id")
+            )
+            for booking_request in booking_requests:
+                rows = _calendar_rows(
+                    kind="request",
+                    source=booking_request,
+                    start_at=booking_request.requested_start_at,
+                    end_at=booking_request.requested_end_at,
+                )
+                for row in rows:
+                    desired[_row_key(row)] = row
+
+        changed = []
+        current_rows = CalendarEvent.objects.select_for_update().filter(
+            Q(booking_id__in=booking_ids) | Q(request_id__in=request_ids)
+        )
+        for current in current_rows:
+            fresh = desired.pop(_row_key(current), None)
+            if fresh is None:
+                if current.is_deleted:
+                    continue
+                current.is_deleted = True
+                fresh = current
+            elif not _row_changed(current, fresh):
+                continue
+            else:
+                fresh.id = current.id
+                fresh.created_at = current.created_at
+            fresh.updated_at = now
+            changed.append(fresh)
+        # bulk_update does not apply auto_now, hence the explicit updated_at.
+        CalendarEvent.objects.bulk_update(changed, [*PROJECTED_FIELDS, "updated_at"], batch_size=500)
+        CalendarEvent.objects.bulk_create(desired.values(), batch_size=500)
+    return len(changed) + len(desired)
+
+
+def project_calendar_for_resources(resource_ids, *, batch_size: int = 500):
+    """Re-project every row already projected for ``resource_ids``; returns rows written."""
+    resource_ids = {resource_id for resource_id in resource_ids if resource_id}
+    if not resource_ids:
+        return 0
+    rows = CalendarEvent.objects.filter(resource_id__in=resource_ids)
+    written = 0
+    for key, column in (("booking_ids", "booking_id"), ("request_ids", "request_id")):
+        ids = sorted(set(rows.filter(**{f"{column}__isnull": False}).values_list(column, flat=True)))
+        for offset in range(0, len(ids), batch_size):
+            written += project_calendar_events(**{key: ids[offset : offset + batch_size]})
+    return written
+
+
+def project_calendar_for_outbox_events(events):
+    return project_calendar_events(
+        booking_ids=[event.payload.get("booking_id") for event in events],
+        request_ids=[event.payload.get("request_id") for event in events],
+    )
+
+
+def rebuild_calendar_projection(*, batch_size: int = 500):
+    """Re-project every booking and request; the backfill and repair path."""
+    CalendarEvent.objects.filter(booking__isnull=True, request__isnull=True).delete()
+    written = 0
+    for model, key in ((Booking, "booking_ids"), (BookingRequest, "request_ids")):
+        last_id = 0
+        while True:
+            ids = list(model.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            written += project_calendar_events(**{key: ids})
+            last_id = ids[-1]
+    return written
+
+
+def read_calendar(
+    *,
+    actor_type: str,
+    actor_user,
+    start_at: datetime,
+    end_at: datetime,
+    event_id: int | None = None,
+    resource_id: int | None = None,
+):
+    # Served from the (actor_type, actor_user, start_at) index.
+    rows = CalendarEvent.objects.filter(
+        actor_type=actor_type,
+        actor_user=actor_user,
+        is_deleted=False,
+        start_at__lt=end_at,
+        end_at__gt=start_at,
+    )
+    if event_id:
+        rows = rows.filter(event_id=event_id)
+    if resource_id:
+        rows = rows.filter(resource_id=resource_id)
+    return [
+        {**payload, "title": title, "start_at": row_start, "end_at": row_end}
+        for title, row_start, row_end, payload in rows.order_by("start_at", "id").values_list(
+            "title", "start_at", "end_at", "payload"
+        )
+    ]
+
+
+def _sync_scope(actor_type: str, event_id, resource_id):
+    return [actor_type, event_id, resource_id]
+
+
+def encode_sync_token(*, at: datetime, actor_type: str, event_id=None, resource_id=None):
+    document = {
+        "at": (at - _EPOCH) // timedelta(microseconds=1),
+        "scope": _sync_scope(actor_type, event_id, resource_id),
+    }
+    raw = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str, *, actor_type: str, event_id=None, resource_id=None):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        document = json.loads(raw)
+        since = _EPOCH + timedelta(microseconds=int(document["at"]))
+        scope = document["scope"]
+    except (ValueError, TypeError, KeyError, OverflowError):
+        raise PolicyViolationError("Invalid calendar sync token.")
+    # A token only describes the filters it was issued for.
+    if scope != _sync_scope(actor_type, event_id, resource_id):
+        raise PolicyViolationError("Calendar sync token was issued for a different calendar.")
+    return since
+
+
+def sync_calendar(
+    *,
+    actor_type: str,
+    actor_user,
+    sync_token: str | None = None,
+    event_id: int | None = None,
+    resource_id: int | None = None,
+):
+    """Return the calendar entries changed since ``sync_token`` plus a token for the next call.
+
+    Without a token the whole live calendar is returned. With one, only rows
+    touched since it was issued are read from the ``(actor_type, actor_user,
+    updated_at)`` index; cancelled, expired and removed items come back as
+    ``deleted`` references. The cursor is re-read with a small overlap so rows
+    committed late are not skipped; clients apply entries as upserts.
+    """
+    since = None
+    if sync_token:
+        since = decode_sync_token(sync_token, actor_type=actor_type, event_id=event_id, resource_id=resource_id)
+    now = timezone.now()
+
+    rows = CalendarEvent.objects.filter(actor_type=actor_type, actor_user=actor_user)
+    if since is None:
+        rows = rows.filter(is_deleted=False)
+    else:
+        overlap = timedelta(seconds=int(getattr(settings, "SCHEDULING_CALENDAR_SYNC_OVERLAP_SECONDS", 30)))
+        rows = rows.filter(updated_at__gt=since - overlap)
+    if event_id:
+        rows = rows.filter(event_id=event_id)
+    if resource_id:
+        rows = rows.filter(resource_id=resource_id)
+
+    results = []
+    deleted = []
+    columns = ("title", "start_at", "end_at", "payload", "is_deleted")
+    for title, row_start, row_end, payload, is_deleted in rows.order_by("updated_at", "id").values_list(*columns):
+        if is_deleted or payload["status"] in TOMBSTONE_STATUSES[payload["type"]]:
+            if since is not None:
+                deleted.append({"type": payload["type"], "id": payload["id"]})
+            continue
+        results.append({**payload, "title": title, "start_at": row_start, "end_at": row_end})
+
+    return {
+        "results": results,
+        "deleted": deleted,
+        "full_sync": since is None,
+        "sync_token": encode_sync_token(at=now, actor_type=actor_type, event_id=event_id, resource_id=resource_id),
+    }
+
+
+def _ics_text(value: str):
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_time(moment: datetime):
+    return moment.astimezone(datetime_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _ics_line(line: str):
+    # RFC 5545 folds content lines longer than 75 octets onto continuation lines.
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _feed_window(now: datetime):
+    today = now.astimezone(datetime_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    past_days = int(getattr(settings, "SCHEDULING_CALENDAR_FEED_PAST_DAYS", 30))
+    future_days = int(getattr(settings, "SCHEDULING_CALENDAR_FEED_FUTURE_DAYS", 365))
+    return today - timedelta(days=past_days), today + timedelta(days=future_days)
+
+
+def calendar_feed_validators(*, actor_type: str, actor_user, now: datetime | None = None):
+    """Return ``(etag, last_modified)`` for an ICS feed with one aggregate query.
+
+    Every projection write bumps ``updated_at`` (tombstones included) and hard
+    deletes change the row count, so the pair changes whenever the feed would.
+    The window's start day is folded in because the feed slides with the date.
+    """
+    window_start, _ = _feed_window(now or timezone.now())
+    summary = CalendarEvent.objects.filter(actor_type=actor_type, actor_user=actor_user).aggregate(
+        last_modified=Max("updated_at"),
+        rows=Count("id"),
+    )
+    last_modified = summary["last_modified"]
+    fingerprint = ":".join(
+        [
+            actor_type,
+            str(getattr(actor_user, "pk", "")),
+            last_modified.isoformat() if last_modified else "",
+            str(summary["rows"]),
+            window_start.date().isoformat(),
+        ]
+    )
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest(), last_modified
+
+
+def iter_calendar_ics(*, actor_type: str, actor_user, now: datetime | None = None):
+    """Yield an iCalendar document one event at a time, streaming rows from the projection."""
+    window_start, window_end = _feed_window(now or timezone.now())
+    yield _ics_line("BEGIN:VCALENDAR")
+    yield _ics_line("VERSION:2.0")
+    yield _ics_line("PRODID:-//Scheduling//Calendar Feed//EN")
+    yield _ics_line("CALSCALE:GREGORIAN")
+    yield _ics_line("METHOD:PUBLISH")
+
+    rows = (
+        CalendarEvent.objects.filter(
+            actor_type=actor_type,
+            actor_user=actor_user,
+            is_deleted=False,
+            start_at__lt=window_end,
+            end_at__gt=window_start,
+        )
+        .order_by("start_at", "id")
+        .values_list("title", "start_at", "end_at", "updated_at", "payload")
+    )
+    for title, start_at, end_at, updated_at, payload in rows.iterator(chunk_size=500):
+        if payload["status"] in TOMBSTONE_STATUSES[payload["type"]]:
+            continue
+        status = "CONFIRMED" if payload["type"] == "booking" else "TENTATIVE"
+        yield "".join(
+            _ics_line(line)
+            for line in (
+                "BEGIN:VEVENT",
+                f"UID:{payload['type']}-{payload['id']}@scheduling",
+                f"DTSTAMP:{_ics_time(updated_at)}",
+                f"LAST-MODIFIED:{_ics_time(updated_at)}",
+                f"DTSTART:{_ics_time(start_at)}",
+                f"DTEND:{_ics_time(end_at)}",
+                f"SUMMARY:{_ics_text(title)}",
+                f"STATUS:{status}",
+                "END:VEVENT",
+            )
+        )
+    yield _ics_line("END:VCALENDAR")
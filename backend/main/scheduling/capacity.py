@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone as datetime_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AvailabilitySlot
+
+
+QUANTUM = timedelta(minutes=15)
+BUCKETS_PER_DAY = int(timedelta(days=1) / QUANTUM)
+_EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+# Signed 32-bit buckets: capacity_total is a PositiveIntegerField.
+_TYPECODE = "i"
+
+
+def _bucket(moment: datetime, *, ceil: bool = False):
+    quotient, remainder = divmod(moment - _EPOCH, QUANTUM)
+    return quotient + 1 if ceil and remainder else quotient
+
+
+def _bucket_day(bucket: int):
+    return date.fromordinal(_EPOCH.date().toordinal() + bucket // BUCKETS_PER_DAY)
+
+
+def _day_first_bucket(day: date):
+    return (day.toordinal() - _EPOCH.date().toordinal()) * BUCKETS_PER_DAY
+
+
+def _days_between(start_at: datetime, end_at: datetime):
+    first_day = _bucket_day(_bucket(start_at))
+    last_day = _bucket_day(_bucket(end_at, ceil=True) - 1)
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+class CapacityCalendar:
+    """Remaining slot capacity of one resource in fixed 15-minute UTC buckets.
+
+    A bucket holds the lowest remaining capacity of the bookable slots touching it and
+    zero where no bookable slot exists, so "N attendees free between A and B" is a
+    single min() over a contiguous slice.
+    """
+
+    def __init__(self, resource_id: int, first_bucket: int, buckets: array):
+        self.resource_id = resource_id
+        self.first_bucket = first_bucket
+        self.buckets = buckets
+
+    def _slice(self, start_at: datetime, end_at: datetime):
+        start = _bucket(start_at) - self.first_bucket
+        end = _bucket(end_at, ceil=True) - self.first_bucket
+        if start < 0 or end > len(self.buckets) or end <= start:
+            raise ValueError("Range is outside the loaded capacity calendar.")
+        return self.buckets[start:end]
+
+    def min_remaining(self, start_at: datetime, end_at: datetime):
+        return min(self._slice(start_at, end_at))
+
+    def has_capacity(self, start_at: datetime, end_at: datetime, attendee_count: int):
+        return self.min_remaining(start_at, end_at) >= attendee_count
+
+
+def _version_key(resource_id: int):
+    return f"scheduling:capacity:{resource_id}:version"
+
+
+def _day_key(resource_id: int, version, day: date):
+    return f"scheduling:capacity:{resource_id}:{version}:{day.isoformat()}"
+
+
+def _timeout():
+    return max(60, int(getattr(settings, "SCHEDULING_CAPACITY_CALENDAR_TIMEOUT_SECONDS", 86400)))
+
+
+def _get_version(resource_id: int):
+    key = _version_key(resource_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_capacity_calendars(resource_ids):
+    # Orphans every stored day chunk at once; they expire on their own timeout.
+    for resource_id in set(resource_ids):
+        cache.set(_version_key(resource_id), time.time_ns(), timeout=None)
+
+
+def invalidate_capacity_calendars_on_commit(resource_ids):
+    resource_ids = {resource_id for resource_id in resource_ids if resource_id}
+    if resource_ids:
+        transaction.on_commit(lambda: invalidate_capacity_calendars(resource_ids))
+
+
+def _build_days(resource_id: int, days):
+    first_bucket = _day_first_bucket(days[0])
+    end_bucket = _day_first_bucket(days[-1]) + BUCKETS_PER_DAY
+    range_start = _EPOCH + QUANTUM * first_bucket
+    range_end = _EPOCH + QUANTUM * end_bucket
+
+    # -1 marks buckets no bookable slot touches yet; they end up as zero capacity.
+    buckets = array(_TYPECODE, [-1]) * (end_bucket - first_bucket)
+    slots = AvailabilitySlot.objects.filter(
+        resource_id=resource_id,
+        is_bookable=True,
+        start_at__lt=range_end,
+        end_at__gt=range_start,
+    ).values_list("start_at", "end_at", "capacity_total", "capacity_reserved")
+    for slot_start, slot_end, capacity_total, capacity_reserved in slots:
+        remaining = max(0, capacity_total - capacity_reserved)
+        start = max(_bucket(slot_start), first_bucket) - first_bucket
+        end = min(_bucket(slot_end, ceil=True), end_bucket) - first_bucket
+        for index in range(start, end):
+            current = buckets[index]
+            if current < 0 or remaining < current:
+                buckets[index] = remaining
+    for index, value in enumerate(buckets):
+        if value < 0:
+            buckets[index] = 0
+
+    return {
+        day: buckets[offset * BUCKETS_PER_DAY : (offset + 1) * BUCKETS_PER_DAY]
+        for offset, day in enumerate(days)
+    }
+
+
+def _store_days(resource_id: int, version, chunks, *, backfill: bool = False):
+    values = {_day_key(resource_id, version, day): chunk.tobytes() for day, chunk in chunks.items()}
+    if not backfill:
+        cache.set_many(values, timeout=_timeout())
+        return
+    # A reader may have built its chunks before a reservation committed; add() keeps it
+    # from replacing the fresher chunk that reservation's refresh stored in the meantime.
+    for key, value in values.items():
+        cache.add(key, value, timeout=_timeout())
+
+
+def get_capacity_calendar(resource_id: int, start_at: datetime, end_at: datetime):
+    days = _days_between(start_at, end_at)
+    version = _get_version(resource_id)
+    stored = cache.get_many([_day_key(resource_id, version, day) for day in days])
+
+    chunks = {}
+    missing = []
+    for day in days:
+        raw = stored.get(_day_key(resource_id, version, day))
+        if raw is None:
+            missing.append(day)
+            continue
+        chunk = array(_TYPECODE)
+        chunk.frombytes(raw)
+        chunks[day] = chunk
+
+    if missing:
+        # One slot query covers every missing day, including gaps between cached ones.
+        rebuilt = _build_days(resource_id, days[days.index(missing[0]) : days.index(missing[-1]) + 1])
+        _store_days(resource_id, version, {day: rebuilt[day] for day in missing}, backfill=True)
+        chunks.update({day: rebuilt[day] for day in missing})
+
+    buckets = array(_TYPECODE)
+    for day in days:
+        buckets.extend(chunks[day])
+    return CapacityCalendar(resource_id, _day_first_bucket(days[0]), buckets)
+
+
+def refresh_capacity_calendar(resource_id: int, start_at: datetime, end_at: datetime):
+    # Recomputed from committed slot rows rather than patched with a delta, so two
+    # writers finishing out of order cannot leave the buckets drifting from the table.
+    days = _days_between(start_at, end_at)
+    _store_days(resource_id, _get_version(resource_id), _build_days(resource_id, days))
+
+
+def refresh_capacity_calendar_on_commit(resource_id: int, start_at: datetime, end_at: datetime):
+    transaction.on_commit(lambda: refresh_capacity_calendar(resource_id, start_at, end_at))
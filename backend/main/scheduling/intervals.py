@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Booking
+
+
+BOOKING_INDEX_EVENT_TYPES = frozenset({"booking.confirmed", "booking.cancelled", "booking.rescheduled"})
+
+# resource_id -> (version token, built_at monotonic seconds, index), least recently used first.
+_local_indexes: OrderedDict[int, tuple[str, float, "BookingIntervalIndex"]] = OrderedDict()
+_local_indexes_lock = threading.Lock()
+
+
+class BookingIntervalIndex:
+    """Sorted-array index over the active booking windows of one resource.
+
+    Intervals are kept sorted by start with a running maximum of end times, so an
+    overlap test is a single bisect plus one comparison. Only bookings touching
+    ``[covers_from, covers_until)`` are loaded; answers outside it are meaningless.
+    """
+
+    def __init__(self, intervals=(), *, covers_from: datetime | None = None, covers_until: datetime | None = None):
+        self.covers_from = covers_from
+        self.covers_until = covers_until
+        self._intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self._starts = [interval[0] for interval in self._intervals]
+        self._max_ends = list(accumulate((interval[1] for interval in self._intervals), max))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def covers(self, start_at: datetime, end_at: datetime):
+        return (self.covers_from is None or self.covers_from <= start_at) and (
+            self.covers_until is None or end_at <= self.covers_until
+        )
+
+    def overlaps(self, start_at: datetime, end_at: datetime, exclude_booking_id: int | None = None):
+        if exclude_booking_id is not None:
+            return self.find_conflict(start_at, end_at, exclude_booking_id=exclude_booking_id) is not None
+
+        index = bisect_left(self._starts, end_at)
+        return index > 0 and self._max_ends[index - 1] > start_at
+
+    def find_conflict(self, start_at: datetime, end_at: datetime, exclude_booking_id: int | None = None):
+        index = bisect_left(self._starts, end_at)
+        if index == 0 or self._max_ends[index - 1] <= start_at:
+            return None
+        for interval_start, interval_end, booking_id in self._intervals[:index]:
+            if interval_end > start_at and booking_id != exclude_booking_id:
+                return booking_id
+        return None
+
+
+def _version_key(resource_id: int):
+    return f"scheduling:booking-index:{resource_id}:version"
+
+
+def _max_age_seconds():
+    return max(0, int(getattr(settings, "SCHEDULING_BOOKING_INDEX_MAX_AGE_SECONDS", 300)))
+
+
+def _max_resources():
+    return max(1, int(getattr(settings, "SCHEDULING_BOOKING_INDEX_MAX_RESOURCES", 1024)))
+
+
+def _horizon():
+    return timedelta(days=max(1, int(getattr(settings, "SCHEDULING_BOOKING_INDEX_HORIZON_DAYS", 180))))
+
+
+def invalidate_booking_index(resource_id: int):
+    # A fresh token in the shared cache tells every process to rebuild on next read.
+    cache.set(_version_key(resource_id), uuid.uuid4().hex, timeout=None)
+    with _local_indexes_lock:
+        _local_indexes.pop(resource_id, None)
+
+
+def get_booking_indexes(resource_ids, start_at: datetime, end_at: datetime):
+    """Return an index per resource that answers overlap checks within ``[start_at, end_at)``.
+
+    Indexes are built for at least the next ``SCHEDULING_BOOKING_INDEX_HORIZON_DAYS``
+    so typical searches reuse them, and at most ``SCHEDULING_BOOKING_INDEX_MAX_RESOURCES``
+    are kept per process, least recently used first out.
+    """
+    resource_ids = list(dict.fromkeys(resource_ids))
+    if not resource_ids:
+        return {}
+
+    tokens = cache.get_many([_version_key(resource_id) for resource_id in resource_ids])
+    now = time.monotonic()
+    max_age = _max_age_seconds()
+
+    indexes = {}
+    stale_tokens = {}
+    with _local_indexes_lock:
+        for resource_id in resource_ids:
+            token = tokens.get(_version_key(resource_id))
+            if token is None:
+                token = uuid.uuid4().hex
+                if not cache.add(_version_key(resource_id), token, timeout=None):
+                    token = cache.get(_version_key(resource_id)) or token
+
+            local = _local_indexes.get(resource_id)
+            if local and local[0] == token and now - local[1] < max_age and local[2].covers(start_at, end_at):
+                _local_indexes.move_to_end(resource_id)
+                indexes[resource_id] = local[2]
+            else:
+                stale_tokens[resource_id] = token
+
+    if stale_tokens:
+        today = timezone.now()
+        covers_from = min(start_at, today)
+        covers_until = max(end_at, today + _horizon())
+        intervals_by_resource = {resource_id: [] for resource_id in stale_tokens}
+        rows = Booking.objects.filter(
+            resource_id__in=list(stale_tokens),
+            status__in=Booking.ACTIVE_STATES,
+            start_at__lt=covers_until,
+            end_at__gt=covers_from,
+        ).values_list("resource_id", "start_at", "end_at", "id")
+        for resource_id, row_start, row_end, booking_id in rows:
+            intervals_by_resource[resource_id].append((row_start, row_end, booking_id))
+
+        max_resources = _max_resources()
+        with _local_indexes_lock:
+            for resource_id, intervals in intervals_by_resource.items():
+                index = BookingIntervalIndex(intervals, covers_from=covers_from, covers_until=covers_until)
+                _local_indexes[resource_id] = (stale_tokens[resource_id], now, index)
+                _local_indexes.move_to_end(resource_id)
+                indexes[resource_id] = index
+            while len(_local_indexes) > max_resources:
+                _local_indexes.popitem(last=False)
+
+    return indexes
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from scheduling.outbox_retention import archive_sent_outbox_events, purge_outbox_archive
+
+
+class Command(BaseCommand):
+    help = "Move SENT scheduling outbox events into the archive table and purge old archive history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive SENT events created more than this many days ago "
+            "(default: SCHEDULING_OUTBOX_RETENTION_DAYS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Events moved per transaction.")
+        parser.add_argument(
+            "--purge-archive-older-than-days",
+            type=int,
+            default=None,
+            help="Also drop archived events created more than this many days ago.",
+        )
+
+    def handle(self, *args, **options):
+        older_than_days = options["older_than_days"]
+        if older_than_days is None:
+            older_than_days = int(getattr(settings, "SCHEDULING_OUTBOX_RETENTION_DAYS", 14))
+        purge_days = options["purge_archive_older_than_days"]
+        if older_than_days < 0 or (purge_days is not None and purge_days < older_than_days):
+            raise CommandError("--older-than-days must be >= 0 and the purge age must not be below it.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+
+        now = timezone.now()
+        archived = archive_sent_outbox_events(
+            older_than=now - timedelta(days=older_than_days),
+            batch_size=options["batch_size"],
+        )
+        message = f"Archived {archived} outbox event(s) older than {older_than_days} day(s)."
+        if purge_days is not None:
+            purged, dropped = purge_outbox_archive(older_than=now - timedelta(days=purge_days))
+            message += f" Purged {purged} archived event(s) and {dropped} archive partition(s)."
+        self.stdout.write(self.style.SUCCESS(message))
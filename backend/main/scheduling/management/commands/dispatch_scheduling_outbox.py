@@ -1,23 +1,56 @@
+import signal
+import threading
+
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
+from scheduling.outbox_wakeup import get_outbox_waiter
 from scheduling.services import dispatch_outbox_events
 
 
+RESULT_KEYS = ("processed", "failed", "dead_lettered")
+
+
 class Command(BaseCommand):
     help = "Dispatch pending scheduling outbox events."
 
     def add_arguments(self, parser):
-        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--limit", type=int, default=100, help="Events claimed per pass (per worker).")
         parser.add_argument(
             "--notifications-only",
             action="store_true",
-            help="Dispatch only in-app notification consumers.",
+            help="Dispatch only in-app notification and calendar consumers.",
         )
         parser.add_argument(
             "--webhooks-only",
             action="store_true",
             help="Dispatch only webhook consumers.",
         )
+        parser.add_argument("--loop", action="store_true", help="Keep dispatching until SIGTERM/SIGINT.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Concurrent dispatcher threads in --loop mode; each claims its own batches.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Longest idle wait in seconds before polling without a wake-up signal.",
+        )
+        parser.add_argument("--backoff", type=float, default=1.0, help="Initial wait in seconds after a failed pass.")
+        parser.add_argument("--max-backoff", type=float, default=60.0, help="Upper bound for the failure back-off.")
+
+    def _write_result(self, prefix: str, result: dict):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}: "
+                f"processed={result['processed']} "
+                f"failed={result['failed']} "
+                f"dead_lettered={result.get('dead_lettered', 0)}"
+            )
+        )
 
     def handle(self, *args, **options):
         notifications_only = options["notifications_only"]
@@ -25,19 +58,85 @@ class Command(BaseCommand):
 
         if notifications_only and webhooks_only:
             raise CommandError("Use either --notifications-only or --webhooks-only, not both.")
+        if options["limit"] < 1:
+            raise CommandError("--limit must be >= 1.")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be >= 1.")
+        if options["workers"] > 1 and not options["loop"]:
+            raise CommandError("--workers requires --loop.")
+        if options["poll_interval"] <= 0 or options["backoff"] <= 0 or options["max_backoff"] < options["backoff"]:
+            raise CommandError("Intervals must be > 0 and --max-backoff must be >= --backoff.")
 
-        consume_notifications = not webhooks_only
-        consume_webhooks = not notifications_only
-        result = dispatch_outbox_events(
-            limit=options["limit"],
-            consume_notifications=consume_notifications,
-            consume_webhooks=consume_webhooks,
-        )
-        self.stdout.write(
-            self.style.SUCCESS(
-                "Outbox dispatched: "
-                f"processed={result['processed']} "
-                f"failed={result['failed']} "
-                f"dead_lettered={result.get('dead_lettered', 0)}"
+        dispatch_kwargs = {
+            "limit": options["limit"],
+            "consume_notifications": not webhooks_only,
+            "consume_webhooks": not notifications_only,
+            "consume_calendar": not webhooks_only,
+        }
+        if not options["loop"]:
+            self._write_result("Outbox dispatched", dispatch_outbox_events(**dispatch_kwargs))
+            return
+
+        self._run_daemon(dispatch_kwargs, options)
+
+    def _run_daemon(self, dispatch_kwargs: dict, options: dict):
+        stop_event = threading.Event()
+        totals = dict.fromkeys(RESULT_KEYS, 0)
+        totals_lock = threading.Lock()
+
+        def request_stop(signum, frame):
+            # Drain: workers finish the batch in hand, then exit instead of claiming more.
+            stop_event.set()
+
+        previous_handlers = {
+            signum: signal.signal(signum, request_stop) for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        workers = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(dispatch_kwargs, options, stop_event, totals, totals_lock),
+                name=f"outbox-dispatcher-{index}",
+                daemon=True,
             )
-        )
+            for index in range(options["workers"])
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            # Joining with a timeout keeps the main thread responsive to signals.
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=0.5)
+        finally:
+            stop_event.set()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self._write_result(f"Outbox dispatcher stopped (workers={len(workers)})", totals)
+
+    def _worker_loop(self, dispatch_kwargs: dict, options: dict, stop_event, totals: dict, totals_lock):
+        waiter = None
+        backoff = 0.0
+        try:
+            waiter = get_outbox_waiter()
+            while not stop_event.is_set():
+                try:
+                    result = dispatch_outbox_events(**dispatch_kwargs)
+                except Exception as exc:
+                    backoff = min(options["max_backoff"], backoff * 2 if backoff else options["backoff"])
+                    self.stderr.write(f"Outbox dispatch pass failed ({exc}); retrying in {backoff:.1f}s.")
+                    stop_event.wait(backoff)
+                    continue
+
+                backoff = 0.0
+                with totals_lock:
+                    for key in RESULT_KEYS:
+                        totals[key] += result.get(key, 0)
+                # A full claim means more is probably due, even when its events were only
+                # deferred; anything less means the outbox is drained for now.
+                if result.get("claimed", 0) < dispatch_kwargs["limit"]:
+                    waiter.wait(options["poll_interval"], stop_event)
+        finally:
+            if waiter is not None:
+                waiter.close()
+            connections.close_all()
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from scheduling.services import expire_pending_requests
 
@@ -7,8 +7,25 @@ class Command(BaseCommand):
     help = "Expire stale pending booking requests in scheduling module."
 
     def add_arguments(self, parser):
-        parser.add_argument("--limit", type=int, default=500)
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after this many requests; by default every due request is expired.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Requests expired per transaction.")
 
     def handle(self, *args, **options):
-        updated = expire_pending_requests(limit=options["limit"])
-        self.stdout.write(self.style.SUCCESS(f"Expired {updated} booking request(s)."))
+        if options["limit"] is not None and options["limit"] < 1:
+            raise CommandError("--limit must be >= 1.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        metrics = expire_pending_requests(limit=options["limit"], batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expired {metrics['expired']} booking request(s): "
+                f"batches={metrics['batches']} "
+                f"elapsed={metrics['elapsed_seconds']}s "
+                f"rate={metrics['per_second']}/s"
+            )
+        )
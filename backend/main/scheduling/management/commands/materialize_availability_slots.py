@@ -1,12 +1,35 @@
 from __future__ import annotations
 
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 
+import django
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
 from scheduling.services import materialize_availability_slots
 
 
+SUMMED_RESULT_KEYS = ("rules_processed", "slots_created", "slots_updated", "skipped_nonexistent")
+
+
+def _materialize_shard(kwargs: dict):
+    return materialize_availability_slots(**kwargs)
+
+
+def _process_pool(workers: int):
+    # Children must open their own database connections.
+    connections.close_all()
+    # The platform's default start method: fork on Linux, spawn on macOS and Windows.
+    # Spawned children start from a fresh interpreter, so they set Django up first.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(),
+        initializer=django.setup,
+    )
+
+
 class Command(BaseCommand):
     help = "Materialize availability rules into explicit AvailabilitySlot records."
 
@@ -15,6 +38,19 @@ class Command(BaseCommand):
         parser.add_argument("--end-date", type=str, default=None, help="Inclusive end date (YYYY-MM-DD).")
         parser.add_argument("--days", type=int, default=180, help="Horizon days when --end-date is not provided.")
         parser.add_argument("--resource-id", type=int, default=None, help="Optional marketplace resource id.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk insert/update statement.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes; each one owns a disjoint set of resources (resource_id modulo workers).",
+        )
+        parser.add_argument(
+            "--shard",
+            type=str,
+            default=None,
+            help="Only process shard i of N (format i/N), e.g. to split a run across hosts.",
+        )
 
     def _parse_date(self, value: str | None, option_name: str):
         if value is None:
@@ -24,19 +60,60 @@ class Command(BaseCommand):
         except ValueError as exc:
             raise CommandError(f"Invalid {option_name} value: '{value}'. Expected YYYY-MM-DD.") from exc
 
+    def _parse_shard(self, value: str | None):
+        if value is None:
+            return 0, 1
+        try:
+            index_text, count_text = value.split("/", 1)
+            shard_index, shard_count = int(index_text), int(count_text)
+        except ValueError as exc:
+            raise CommandError(f"Invalid --shard value: '{value}'. Expected i/N.") from exc
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise CommandError("--shard must satisfy 0 <= i < N.")
+        return shard_index, shard_count
+
     def handle(self, *args, **options):
         start_date = self._parse_date(options["start_date"], "--start-date")
         end_date = self._parse_date(options["end_date"], "--end-date")
         days = options["days"]
         if days < 0:
             raise CommandError("--days must be >= 0.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be >= 1.")
+        shard_index, shard_count = self._parse_shard(options["shard"])
+        if options["resource_id"]:
+            workers = 1
 
-        result = materialize_availability_slots(
-            start_date=start_date,
-            end_date=end_date,
-            horizon_days=days,
-            resource_id=options["resource_id"],
-        )
+        base_kwargs = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "horizon_days": days,
+            "resource_id": options["resource_id"],
+            "batch_size": options["batch_size"],
+        }
+        # Worker k of shard i/N owns resource_id % (N * workers) == i + k * N, which
+        # partitions shard i without overlap.
+        shard_kwargs = [
+            {
+                **base_kwargs,
+                "shard_index": shard_index + worker * shard_count,
+                "shard_count": shard_count * workers,
+            }
+            for worker in range(workers)
+        ]
+
+        if workers == 1:
+            results = [materialize_availability_slots(**shard_kwargs[0])]
+        else:
+            with _process_pool(workers) as pool:
+                results = list(pool.map(_materialize_shard, shard_kwargs))
+
+        result = {key: sum(shard_result[key] for shard_result in results) for key in SUMMED_RESULT_KEYS}
+        result["range_start"] = results[0]["range_start"]
+        result["range_end"] = results[0]["range_end"]
         self.stdout.write(
             self.style.SUCCESS(
                 "Materialization complete: "
@@ -44,6 +121,8 @@ class Command(BaseCommand):
                 f"created={result['slots_created']} "
                 f"updated={result['slots_updated']} "
                 f"skipped_nonexistent={result['skipped_nonexistent']} "
-                f"range={result['range_start']}..{result['range_end']}"
+                f"range={result['range_start']}..{result['range_end']} "
+                f"workers={workers} "
+                f"shard={shard_index}/{shard_count}"
             )
         )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scheduling.services import materialize_dirty_availability
+
+
+class Command(BaseCommand):
+    help = "Re-materialize availability slots for resources whose rules or exceptions changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=500, help="Dirty ranges to consume per pass.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for dirty ranges until interrupted.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between idle passes.")
+
+    def handle(self, *args, **options):
+        if options["limit"] < 1:
+            raise CommandError("--limit must be >= 1.")
+        if options["interval"] <= 0:
+            raise CommandError("--interval must be > 0.")
+
+        while True:
+            result = materialize_dirty_availability(limit=options["limit"])
+            if result["ranges_processed"] or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        "Dirty availability materialized: "
+                        f"ranges={result['ranges_processed']} "
+                        f"materialized_ranges={result['materialized_ranges']} "
+                        f"created={result['slots_created']} "
+                        f"updated={result['slots_updated']}"
+                    )
+                )
+            if not options["loop"]:
+                return
+            if not result["ranges_processed"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scheduling.services import prune_idempotency_records
+
+
+class Command(BaseCommand):
+    help = "Delete expired scheduling idempotency records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        deleted = prune_idempotency_records(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired idempotency record(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scheduling.calendar_projection import rebuild_calendar_projection
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CalendarEvent projection from bookings and booking requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Bookings or requests projected per pass.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        written = rebuild_calendar_projection(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Calendar projection rebuilt: rows={written}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from scheduling.ops_counters import get_ops_counters, rebuild_ops_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached scheduling ops summary counters from the database."
+
+    def handle(self, *args, **options):
+        rebuild_ops_counters()
+        counters = get_ops_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ops counters rebuilt: outbox={counters['outbox_counts']} "
+                f"dead_letters={counters['dead_letter_count']} "
+                f"conflicts_24h={counters['last_24h_conflicts_total']}"
+            )
+        )
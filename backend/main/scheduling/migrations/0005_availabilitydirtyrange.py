@@ -0,0 +1,36 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0004_webhooktarget_bookingconflictincident"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityDirtyRange",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("reason", models.CharField(blank=True, max_length=64)),
+                (
+                    "resource",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_dirty_ranges",
+                        to="scheduling.marketplaceresource",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["created_at"], name="scheduling__created_a00f80_idx"),
+                    models.Index(fields=["resource", "start_date"], name="scheduling__resourc_e28968_idx"),
+                ],
+            },
+        ),
+    ]
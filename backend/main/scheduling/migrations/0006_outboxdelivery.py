@@ -0,0 +1,51 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0005_availabilitydirtyrange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxDelivery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("consumer", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                            ("dead_letter", "Dead Letter"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "outbox_event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="scheduling.outboxevent",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["status", "next_attempt_at"], name="scheduling__status_2ba21c_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("outbox_event", "consumer"), name="uniq_outbox_delivery_consumer")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0006_outboxdelivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooktarget",
+            name="max_batch_size",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="webhooktarget",
+            name="max_linger_seconds",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+ARCHIVE_TABLE = "scheduling_outboxeventarchive"
+
+
+def partition_archive_table(apps, schema_editor):
+    # Monthly range partitions need created_at in the primary key, so the plain
+    # table Django just created is swapped for a partitioned one on PostgreSQL.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {ARCHIVE_TABLE};")
+        cursor.execute(
+            f"""
+            CREATE TABLE {ARCHIVE_TABLE} (
+                id bigserial NOT NULL,
+                original_id bigint NOT NULL,
+                event_type varchar(128) NOT NULL,
+                aggregate_type varchar(64) NOT NULL,
+                aggregate_id varchar(64) NOT NULL,
+                payload jsonb NOT NULL,
+                attempts integer NOT NULL CHECK (attempts >= 0),
+                created_at timestamp with time zone NOT NULL,
+                sent_at timestamp with time zone NOT NULL,
+                archived_at timestamp with time zone NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            """
+        )
+        cursor.execute(f"CREATE TABLE {ARCHIVE_TABLE}_default PARTITION OF {ARCHIVE_TABLE} DEFAULT;")
+        cursor.execute(
+            f"CREATE INDEX scheduling_outbox_arch_agg ON {ARCHIVE_TABLE} (aggregate_type, aggregate_id);"
+        )
+        cursor.execute(f"CREATE INDEX scheduling_outbox_arch_created ON {ARCHIVE_TABLE} (created_at);")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0007_webhooktarget_batching"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "failed"])),
+                fields=["next_attempt_at", "created_at"],
+                name="scheduling_outbox_claimable",
+            ),
+        ),
+        migrations.CreateModel(
+            name="OutboxEventArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("original_id", models.BigIntegerField()),
+                ("event_type", models.CharField(max_length=128)),
+                ("aggregate_type", models.CharField(max_length=64)),
+                ("aggregate_id", models.CharField(max_length=64)),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField()),
+                ("sent_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["aggregate_type", "aggregate_id"], name="scheduling_outbox_arch_agg"),
+                    models.Index(fields=["created_at"], name="scheduling_outbox_arch_created"),
+                ],
+            },
+        ),
+        migrations.RunPython(partition_archive_table, reverse_code=migrations.RunPython.noop),
+    ]
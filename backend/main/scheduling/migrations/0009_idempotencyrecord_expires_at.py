@@ -0,0 +1,16 @@
+from django.db import migrations, models
+import scheduling.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0008_outbox_retention"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencyrecord",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True, default=scheduling.models.idempotency_expiry),
+        ),
+    ]
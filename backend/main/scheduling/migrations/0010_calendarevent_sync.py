@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0009_idempotencyrecord_expires_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="calendarevent",
+            name="is_deleted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="calendarevent",
+            index=models.Index(fields=["actor_type", "actor_user", "updated_at"], name="scheduling_calendar_sync"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0011_calendarfeedtoken"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bookingrequest",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["expires_at", "id"],
+                name="scheduling_request_due",
+            ),
+        ),
+    ]
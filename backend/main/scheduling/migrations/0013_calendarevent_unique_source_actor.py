@@ -0,0 +1,61 @@
+from django.db import migrations, models
+
+
+def drop_duplicate_calendar_rows(apps, schema_editor):
+    # Concurrent projections could insert the same (item, actor) row twice; keep the oldest.
+    CalendarEvent = apps.get_model("scheduling", "CalendarEvent")
+    seen = set()
+    duplicate_ids = []
+    rows = CalendarEvent.objects.order_by("id").values_list(
+        "id", "booking_id", "request_id", "actor_type", "actor_user_id"
+    )
+    for row_id, *key in rows.iterator():
+        key = tuple(key)
+        if key in seen:
+            duplicate_ids.append(row_id)
+        else:
+            seen.add(key)
+    for offset in range(0, len(duplicate_ids), 500):
+        CalendarEvent.objects.filter(id__in=duplicate_ids[offset : offset + 500]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scheduling", "0012_bookingrequest_due_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_calendar_rows, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="calendarevent",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("actor_user__isnull", False), ("booking__isnull", False)),
+                fields=("booking", "actor_type", "actor_user"),
+                name="uniq_calendar_booking_actor",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="calendarevent",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("actor_user__isnull", True), ("booking__isnull", False)),
+                fields=("booking", "actor_type"),
+                name="uniq_calendar_booking_admin",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="calendarevent",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("actor_user__isnull", False), ("request__isnull", False)),
+                fields=("request", "actor_type", "actor_user"),
+                name="uniq_calendar_request_actor",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="calendarevent",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("actor_user__isnull", True), ("request__isnull", False)),
+                fields=("request", "actor_type"),
+                name="uniq_calendar_request_admin",
+            ),
+        ),
+    ]
@@ -22,6 +22,9 @@ class MarketplaceResource(TimeStampedModel):
         on_delete=models.CASCADE,
         related_name="marketplace_resources",
     )
+    # Copied into projected calendar rows (titles and the resource owner's scope).
+    CALENDAR_FIELDS = ("display_name", "owner_id")
+
     resource_type = models.CharField(max_length=16, choices=ResourceType.choices)
     display_name = models.CharField(max_length=255)
     timezone = models.CharField(max_length=64, default="UTC")
@@ -70,6 +73,16 @@ class MarketplaceResource(TimeStampedModel):
         if self.vendor_id and self.resource_type != self.ResourceType.VENDOR:
             raise ValidationError("Vendor link requires resource_type='vendor'.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loaded copies of the fields calendar rows repeat, so saves can tell whether they changed.
+        instance._calendar_snapshot = instance.calendar_fields()
+        return instance
+
+    def calendar_fields(self):
+        return {name: self.__dict__.get(name) for name in self.CALENDAR_FIELDS}
+
     def __str__(self):
         return f"{self.display_name} ({self.resource_type})"
 
@@ -225,6 +238,30 @@ class AvailabilitySlot(TimeStampedModel):
         return f"Slot {self.resource_id} [{self.start_at} - {self.end_at}]"
 
 
+class AvailabilityDirtyRange(TimeStampedModel):
+    resource = models.ForeignKey(
+        MarketplaceResource,
+        on_delete=models.CASCADE,
+        related_name="availability_dirty_ranges",
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    reason = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["resource", "start_date"]),
+        ]
+
+    def clean(self):
+        if self.end_date < self.start_date:
+            raise ValidationError("end_date must be on or after start_date.")
+
+    def __str__(self):
+        return f"Dirty {self.resource_id} [{self.start_date} - {self.end_date}]"
+
+
 class BookingRequest(TimeStampedModel):
     class Status(models.TextChoices):
         DRAFT = "draft", "Draft"
@@ -272,6 +309,12 @@ class BookingRequest(TimeStampedModel):
             models.Index(fields=["organizer", "status"]),
             models.Index(fields=["event", "status"]),
             models.Index(fields=["expires_at"]),
+            # Keeps the expiry sweep on pending rows only, however many have already expired.
+            models.Index(
+                fields=["expires_at", "id"],
+                condition=models.Q(status="pending"),
+                name="scheduling_request_due",
+            ),
         ]
 
     def clean(self):
@@ -420,18 +463,69 @@ class CalendarEvent(TimeStampedModel):
     start_at = models.DateTimeField()
     end_at = models.DateTimeField()
     payload = models.JSONField(default=dict, blank=True)
+    # Tombstone left for sync clients when an item drops out of this actor's calendar.
+    is_deleted = models.BooleanField(default=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["actor_type", "actor_user", "start_at"]),
+            models.Index(fields=["actor_type", "actor_user", "updated_at"], name="scheduling_calendar_sync"),
             models.Index(fields=["resource", "start_at", "end_at"]),
             models.Index(fields=["event", "start_at", "end_at"]),
         ]
+        # One row per source item and actor. Admin rows have no actor user, and NULLs are
+        # distinct in a unique index, so they get their own partial constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["booking", "actor_type", "actor_user"],
+                condition=Q(booking__isnull=False, actor_user__isnull=False),
+                name="uniq_calendar_booking_actor",
+            ),
+            models.UniqueConstraint(
+                fields=["booking", "actor_type"],
+                condition=Q(booking__isnull=False, actor_user__isnull=True),
+                name="uniq_calendar_booking_admin",
+            ),
+            models.UniqueConstraint(
+                fields=["request", "actor_type", "actor_user"],
+                condition=Q(request__isnull=False, actor_user__isnull=False),
+                name="uniq_calendar_request_actor",
+            ),
+            models.UniqueConstraint(
+                fields=["request", "actor_type"],
+                condition=Q(request__isnull=False, actor_user__isnull=True),
+                name="uniq_calendar_request_admin",
+            ),
+        ]
 
     def __str__(self):
         return f"CalendarEvent {self.pk} ({self.calendar_type})"
 
 
+class CalendarFeedToken(TimeStampedModel):
+    """Capability token for a user's ICS subscription URL; only its SHA-256 is stored."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="calendar_feed_tokens",
+    )
+    scope = models.CharField(max_length=16, choices=CalendarEvent.ActorType.choices)
+    token_hash = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope"], name="uniq_calendar_feed_token_user_scope"),
+        ]
+
+    def __str__(self):
+        return f"CalendarFeedToken {self.user_id} ({self.scope})"
+
+
+def idempotency_expiry():
+    return timezone.now() + timedelta(seconds=int(getattr(settings, "SCHEDULING_IDEMPOTENCY_TTL_SECONDS", 86400)))
+
+
 class IdempotencyRecord(TimeStampedModel):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -443,6 +537,8 @@ class IdempotencyRecord(TimeStampedModel):
     request_hash = models.CharField(max_length=64)
     response_status = models.PositiveSmallIntegerField()
     response_body = models.JSONField(default=dict, blank=True)
+    # Past this point the key may be reused and prune_scheduling_idempotency deletes the row.
+    expires_at = models.DateTimeField(default=idempotency_expiry, db_index=True)
 
     class Meta:
         constraints = [
@@ -455,6 +551,9 @@ class IdempotencyRecord(TimeStampedModel):
     def __str__(self):
         return f"{self.endpoint}::{self.key}"
 
+    def is_expired(self, now=None):
+        return self.expires_at <= (now or timezone.now())
+
 
 class AuditLog(TimeStampedModel):
     actor = models.ForeignKey(
@@ -503,6 +602,13 @@ class OutboxEvent(TimeStampedModel):
         indexes = [
             models.Index(fields=["status", "next_attempt_at"]),
             models.Index(fields=["aggregate_type", "aggregate_id"]),
+            # Only the claimable rows, so the dispatch scan stays small however much
+            # SENT history is waiting for archival.
+            models.Index(
+                fields=["next_attempt_at", "created_at"],
+                condition=Q(status__in=["pending", "failed"]),
+                name="scheduling_outbox_claimable",
+            ),
         ]
 
     def mark_failed(self, error_message: str, retry_in_seconds: int = 30):
@@ -516,6 +622,79 @@ class OutboxEvent(TimeStampedModel):
         return f"{self.event_type} ({self.status})"
 
 
+class OutboxEventArchive(models.Model):
+    """A SENT outbox event moved out of the live table by ``archive_scheduling_outbox``.
+
+    On PostgreSQL the table is range-partitioned by month on ``created_at`` so old
+    history is dropped a partition at a time.
+    """
+
+    original_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=128)
+    aggregate_type = models.CharField(max_length=64)
+    aggregate_id = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    sent_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["aggregate_type", "aggregate_id"], name="scheduling_outbox_arch_agg"),
+            models.Index(fields=["created_at"], name="scheduling_outbox_arch_created"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} (archived #{self.original_id})"
+
+
+class OutboxDelivery(TimeStampedModel):
+    """Delivery state of one outbox event for one consumer (notifications or a webhook target)."""
+
+    NOTIFICATIONS_CONSUMER = "notifications"
+    WEBHOOKS_CONSUMER = "webhooks"
+    CALENDAR_CONSUMER = "calendar"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+        DEAD_LETTER = "dead_letter", "Dead Letter"
+
+    outbox_event = models.ForeignKey(
+        OutboxEvent,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+    )
+    consumer = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["outbox_event", "consumer"],
+                name="uniq_outbox_delivery_consumer",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    @staticmethod
+    def webhook_consumer(webhook_url: str):
+        return f"webhook:{webhook_url}"
+
+    def is_due(self, now):
+        return self.status in {self.Status.PENDING, self.Status.FAILED} and self.next_attempt_at <= now
+
+    def __str__(self):
+        return f"{self.outbox_event_id} -> {self.consumer} ({self.status})"
+
+
 class OutboxDeadLetter(TimeStampedModel):
     outbox_event = models.ForeignKey(
         OutboxEvent,
@@ -543,6 +722,8 @@ class OutboxDeadLetter(TimeStampedModel):
 
 
 class WebhookTarget(TimeStampedModel):
+    MAX_BATCH_SIZE = 500
+
     url = models.URLField(unique=True)
     description = models.CharField(max_length=255, blank=True)
     is_active = models.BooleanField(default=True)
@@ -550,6 +731,9 @@ class WebhookTarget(TimeStampedModel):
     timeout_seconds = models.PositiveIntegerField(default=5)
     failure_threshold = models.PositiveIntegerField(default=5)
     open_seconds = models.PositiveIntegerField(default=120)
+    # A max_batch_size above 1 opts the target into JSON-array batch delivery.
+    max_batch_size = models.PositiveIntegerField(default=1)
+    max_linger_seconds = models.PositiveIntegerField(default=0)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
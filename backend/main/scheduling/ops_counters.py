@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone as datetime_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import BookingConflictIncident, OutboxDeadLetter, OutboxEvent
+
+
+SEEDED_KEY = "scheduling:ops:seeded"
+SEEDING_KEY = "scheduling:ops:seeding"
+SEEDING_TIMEOUT = 300
+DEAD_LETTERS_KEY = "scheduling:ops:dead_letters"
+CONFLICT_BUCKET = timedelta(hours=1)
+CONFLICT_WINDOW = timedelta(hours=24)
+_EPOCH = datetime(1970, 1, 1, tzinfo=datetime_timezone.utc)
+
+
+def incr_many(deltas, *, timeout=None):
+    """Add ``{key: delta}`` to integer cache counters, pipelined on django-redis."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    client = getattr(getattr(cache, "client", None), "get_client", None)
+    if client is not None:
+        pipeline = client(write=True).pipeline(transaction=False)
+        for key, delta in deltas.items():
+            raw_key = cache.make_key(key)
+            pipeline.incrby(raw_key, delta)
+            if timeout is not None:
+                pipeline.expire(raw_key, timeout)
+        pipeline.execute()
+        return
+    for key, delta in deltas.items():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=timeout):
+                cache.incr(key, delta)
+
+
+def _outbox_key(status: str):
+    return f"scheduling:ops:outbox:{status}"
+
+
+def _bucket(moment: datetime):
+    return int((moment - _EPOCH) / CONFLICT_BUCKET)
+
+
+def _conflict_key(bucket: int, dimension: str, value: str):
+    return f"scheduling:ops:conflicts:{bucket}:{dimension}:{value}"
+
+
+def _conflict_keys(bucket: int):
+    return [
+        *(_conflict_key(bucket, "source", value) for value in BookingConflictIncident.ConflictSource.values),
+        *(_conflict_key(bucket, "operation", value) for value in BookingConflictIncident.Operation.values),
+    ]
+
+
+def _window_buckets(now: datetime):
+    # Whole buckets, so "last 24h" may reach up to one bucket further back.
+    current = _bucket(now)
+    return range(current - int(CONFLICT_WINDOW / CONFLICT_BUCKET), current + 1)
+
+
+def _conflict_timeout():
+    return int((CONFLICT_WINDOW + 2 * CONFLICT_BUCKET).total_seconds())
+
+
+def _pending_key(key: str):
+    return f"scheduling:ops:pending:{key}"
+
+
+def _rebuild_interval():
+    return max(60, int(getattr(settings, "SCHEDULING_OPS_COUNTERS_REBUILD_SECONDS", 3600)))
+
+
+def _record(deltas, *, timeout=None):
+    state = cache.get_many([SEEDED_KEY, SEEDING_KEY])
+    if SEEDING_KEY in state:
+        # A rebuild is reading the tables; park the delta so it lands on top of the snapshot.
+        incr_many({_pending_key(key): delta for key, delta in deltas.items()}, timeout=SEEDING_TIMEOUT)
+        return
+    # Unseeded, there is nothing to adjust; the next rebuild reads the tables.
+    if SEEDED_KEY in state:
+        incr_many(deltas, timeout=timeout)
+
+
+def _merge_pending(keys):
+    pending = cache.get_many([_pending_key(key) for key in keys])
+    merged = {key: int(pending.get(_pending_key(key)) or 0) for key in keys}
+    # Keys the rebuild just wrote keep their own timeouts, so no timeout is passed here.
+    incr_many(merged)
+    incr_many({_pending_key(key): -delta for key, delta in merged.items()}, timeout=SEEDING_TIMEOUT)
+
+
+def adjust_outbox_counts(status_deltas, *, dead_letters: int = 0):
+    deltas = {_outbox_key(status): delta for status, delta in status_deltas.items()}
+    deltas[DEAD_LETTERS_KEY] = dead_letters
+    _record(deltas)
+
+
+def adjust_outbox_counts_on_commit(status_deltas, *, dead_letters: int = 0):
+    status_deltas = {status: delta for status, delta in status_deltas.items() if delta}
+    if status_deltas or dead_letters:
+        transaction.on_commit(lambda: adjust_outbox_counts(status_deltas, dead_letters=dead_letters))
+
+
+def count_conflict_incident_on_commit(*, operation: str, conflict_source: str, at: datetime):
+    bucket = _bucket(at)
+
+    def count():
+        _record(
+            {
+                _conflict_key(bucket, "source", conflict_source): 1,
+                _conflict_key(bucket, "operation", operation): 1,
+            },
+            timeout=_conflict_timeout(),
+        )
+
+    transaction.on_commit(count)
+
+
+def rebuild_ops_counters(now: datetime | None = None):
+    """Recompute every counter from the tables; also the periodic repair path for drift.
+
+    Deltas committed while the tables are read are parked in side keys and merged on
+    top of the snapshot, so the rebuild does not wipe them out. Returns False when
+    another rebuild is already running.
+    """
+    now = now or timezone.now()
+    if not cache.add(SEEDING_KEY, now.isoformat(), timeout=SEEDING_TIMEOUT):
+        return False
+    try:
+        values = {_outbox_key(status): 0 for status in OutboxEvent.Status.values}
+        for row in OutboxEvent.objects.values("status").annotate(count=Count("id")).order_by():
+            values[_outbox_key(row["status"])] = row["count"]
+        values[DEAD_LETTERS_KEY] = OutboxDeadLetter.objects.count()
+
+        buckets = _window_buckets(now)
+        conflicts = {key: 0 for bucket in buckets for key in _conflict_keys(bucket)}
+        incidents = BookingConflictIncident.objects.filter(
+            created_at__gte=_EPOCH + CONFLICT_BUCKET * buckets[0]
+        ).values_list("created_at", "operation", "conflict_source")
+        for created_at, operation, conflict_source in incidents:
+            bucket = _bucket(created_at)
+            if bucket in buckets:
+                conflicts[_conflict_key(bucket, "source", conflict_source)] += 1
+                conflicts[_conflict_key(bucket, "operation", operation)] += 1
+
+        cache.set_many(values, timeout=None)
+        cache.set_many(conflicts, timeout=_conflict_timeout())
+        _merge_pending([*values, *conflicts])
+        # Expiring the seeded marker schedules the next rebuild, so any drift is bounded in time.
+        cache.set(SEEDED_KEY, now.isoformat(), timeout=_rebuild_interval())
+    finally:
+        cache.delete(SEEDING_KEY)
+    # Sweep deltas parked between the merge and the marker going away.
+    _merge_pending([*values, *conflicts])
+    return True
+
+
+def get_ops_counters(now: datetime | None = None):
+    """Outbox, dead-letter and 24h conflict counts from the cache in one round trip."""
+    now = now or timezone.now()
+    buckets = _window_buckets(now)
+    outbox_keys = [_outbox_key(status) for status in OutboxEvent.Status.values]
+    conflict_keys = [key for bucket in buckets for key in _conflict_keys(bucket)]
+    stored = cache.get_many([SEEDED_KEY, DEAD_LETTERS_KEY, *outbox_keys, *conflict_keys])
+    if SEEDED_KEY not in stored:
+        rebuild_ops_counters(now)
+        stored = cache.get_many([DEAD_LETTERS_KEY, *outbox_keys, *conflict_keys])
+
+    by_source = Counter()
+    by_operation = Counter()
+    for bucket in buckets:
+        for value in BookingConflictIncident.ConflictSource.values:
+            by_source[value] += int(stored.get(_conflict_key(bucket, "source", value)) or 0)
+        for value in BookingConflictIncident.Operation.values:
+            by_operation[value] += int(stored.get(_conflict_key(bucket, "operation", value)) or 0)
+
+    outbox_counts = {status: int(stored.get(_outbox_key(status)) or 0) for status in OutboxEvent.Status.values}
+    return {
+        "outbox_counts": {status: count for status, count in outbox_counts.items() if count},
+        "dead_letter_count": int(stored.get(DEAD_LETTERS_KEY) or 0),
+        "last_24h_conflicts_total": sum(by_source.values()),
+        "last_24h_by_source": {key: count for key, count in by_source.items() if count},
+        "last_24h_by_operation": {key: count for key, count in by_operation.items() if count},
+    }
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timezone as datetime_timezone
+
+from django.db import connection, transaction
+
+from .models import OutboxEvent, OutboxEventArchive
+from .ops_counters import adjust_outbox_counts_on_commit
+
+
+_PARTITION_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def _archive_table():
+    return OutboxEventArchive._meta.db_table
+
+
+def _month_start(moment: datetime):
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(day: date):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _partition_name(month: date):
+    return f"{_archive_table()}_y{month.year:04d}m{month.month:02d}"
+
+
+def _default_partition_name():
+    return f"{_archive_table()}_default"
+
+
+def _ensure_archive_partitions(cursor, moments):
+    # Created before the rows land. A month the DEFAULT partition already holds rows
+    # for (e.g. archived before partitions were created per batch) cannot simply be
+    # attached, so those rows are moved across with the default detached.
+    table = _archive_table()
+    default = _default_partition_name()
+    for month in sorted({_month_start(moment.astimezone(datetime_timezone.utc)) for moment in moments}):
+        partition = _partition_name(month)
+        bounds = [month.isoformat(), _next_month(month).isoformat()]
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", [partition])
+        if cursor.fetchone()[0]:
+            continue
+
+        # Serializes partition creation with concurrent archivers and routed inserts.
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;")
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", [partition])
+        if cursor.fetchone()[0]:
+            continue
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s);", bounds)
+        has_default_rows = cursor.fetchone()[0]
+        if has_default_rows:
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default};")
+        cursor.execute(
+            f"CREATE TABLE {partition} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}');"
+        )
+        if has_default_rows:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+                f"INSERT INTO {partition} SELECT * FROM moved;",
+                bounds,
+            )
+            cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT;")
+
+
+def archive_sent_outbox_events(*, older_than: datetime, batch_size: int = 1000):
+    """Move SENT events created before ``older_than`` into ``OutboxEventArchive``.
+
+    Each batch is copied and deleted in its own transaction, so the live table
+    shrinks steadily and a long run never holds locks on the whole backlog.
+    Returns the number of events archived.
+    """
+    archived = 0
+    while True:
+        with transaction.atomic():
+            candidates = OutboxEvent.objects.filter(
+                status=OutboxEvent.Status.SENT,
+                created_at__lt=older_than,
+            ).order_by("id")
+            if connection.vendor == "postgresql":
+                candidates = candidates.select_for_update(skip_locked=True)
+            events = list(candidates[:batch_size])
+            if not events:
+                return archived
+
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    _ensure_archive_partitions(cursor, [event.created_at for event in events])
+            OutboxEventArchive.objects.bulk_create(
+                [
+                    OutboxEventArchive(
+                        original_id=event.id,
+                        event_type=event.event_type,
+                        aggregate_type=event.aggregate_type,
+                        aggregate_id=event.aggregate_id,
+                        payload=event.payload,
+                        attempts=event.attempts,
+                        created_at=event.created_at,
+                        sent_at=event.updated_at,
+                    )
+                    for event in events
+                ]
+            )
+            # Delivery rows cascade with their event.
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+            adjust_outbox_counts_on_commit({OutboxEvent.Status.SENT: -len(events)})
+        archived += len(events)
+        if len(events) < batch_size:
+            return archived
+
+
+def purge_outbox_archive(*, older_than: datetime):
+    """Drop archived events created before ``older_than``; returns ``(rows, partitions)``.
+
+    On PostgreSQL whole monthly partitions that end on or before the cutoff are
+    dropped; rows in partially covered months are deleted individually.
+    """
+    dropped = 0
+    if connection.vendor == "postgresql":
+        table = _archive_table()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                """,
+                [table],
+            )
+            for (name,) in cursor.fetchall():
+                match = _PARTITION_SUFFIX.search(name)
+                if not match:
+                    continue
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                if _next_month(month) <= older_than.astimezone(datetime_timezone.utc).date():
+                    cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)};")
+                    dropped += 1
+
+    deleted, _ = OutboxEventArchive.objects.filter(created_at__lt=older_than).delete()
+    return deleted, dropped
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import select
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+OUTBOX_WAKE_KEY = "scheduling:outbox:wake"
+OUTBOX_NOTIFY_CHANNEL = "scheduling_outbox"
+
+
+def _touch_wake_key():
+    cache.set(OUTBOX_WAKE_KEY, time.time_ns(), timeout=None)
+
+
+def signal_outbox_wakeup():
+    """Wake idle dispatchers once the current transaction commits.
+
+    PostgreSQL delivers NOTIFY only on commit and collapses duplicates within a
+    transaction; other backends bump a cache key that idle dispatchers poll.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"NOTIFY {OUTBOX_NOTIFY_CHANNEL}")
+        return
+    transaction.on_commit(_touch_wake_key)
+
+
+class CacheOutboxWaiter:
+    def __init__(self, check_interval: float = 0.5):
+        self.check_interval = check_interval
+        self._seen = cache.get(OUTBOX_WAKE_KEY)
+
+    def wait(self, timeout: float, stop_event):
+        """Block until a wake-up, ``timeout`` seconds or ``stop_event``; True on wake-up."""
+        deadline = time.monotonic() + timeout
+        while not stop_event.is_set():
+            current = cache.get(OUTBOX_WAKE_KEY)
+            if current != self._seen:
+                self._seen = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            stop_event.wait(min(self.check_interval, remaining))
+        return False
+
+    def close(self):
+        pass
+
+
+class PostgresOutboxWaiter:
+    """LISTENs on the calling thread's connection; idle waits cost no queries."""
+
+    def __init__(self, check_interval: float = 0.5):
+        self.check_interval = check_interval
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {OUTBOX_NOTIFY_CHANNEL}")
+        self._connection = connection.connection
+
+    def _drain(self, timeout: float):
+        raw = self._connection
+        if hasattr(raw, "poll"):
+            # psycopg2
+            if raw.notifies or select.select([raw], [], [], timeout) != ([], [], []):
+                raw.poll()
+            notified = bool(raw.notifies)
+            raw.notifies.clear()
+            return notified
+        # psycopg 3
+        return any(True for _ in raw.notifies(timeout=timeout, stop_after=1))
+
+    def wait(self, timeout: float, stop_event):
+        deadline = time.monotonic() + timeout
+        while not stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._drain(min(self.check_interval, remaining)):
+                return True
+        return False
+
+    def close(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"UNLISTEN {OUTBOX_NOTIFY_CHANNEL}")
+        except Exception:
+            pass
+
+
+def get_outbox_waiter():
+    if connection.vendor == "postgresql":
+        return PostgresOutboxWaiter()
+    return CacheOutboxWaiter()
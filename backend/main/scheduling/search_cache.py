@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CATALOG_VERSION_KEY = "scheduling:search:catalog:version"
+
+
+def _resource_version_key(resource_id: int):
+    return f"scheduling:search:resource:{resource_id}:version"
+
+
+def _new_version():
+    # Seeding from the clock means an evicted counter never comes back at a value
+    # that an older cached page was stored under.
+    return time.time_ns()
+
+
+def _bump(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def bump_resource_versions(resource_ids):
+    for resource_id in set(resource_ids):
+        _bump(_resource_version_key(resource_id))
+
+
+def bump_catalog_version():
+    _bump(CATALOG_VERSION_KEY)
+
+
+def bump_resource_versions_on_commit(resource_ids):
+    resource_ids = {resource_id for resource_id in resource_ids if resource_id}
+    if resource_ids:
+        transaction.on_commit(lambda: bump_resource_versions(resource_ids))
+
+
+def _read_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def get_catalog_version():
+    return _read_versions([CATALOG_VERSION_KEY])[CATALOG_VERSION_KEY]
+
+
+def get_resource_versions(resource_ids):
+    keys = {_resource_version_key(resource_id): resource_id for resource_id in resource_ids}
+    versions = _read_versions(list(keys))
+    return {resource_id: versions[key] for key, resource_id in keys.items()}
+
+
+def search_cache_key(query: dict, catalog_version):
+    digest = hashlib.sha256(
+        json.dumps(query, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+    return f"scheduling:search:result:{catalog_version}:{digest}"
+
+
+def get_cached_search(key: str):
+    entry = cache.get(key)
+    if not entry:
+        return None
+    if get_resource_versions(entry["versions"]) != entry["versions"]:
+        return None
+    return entry["results"]
+
+
+def store_cached_search(key: str, *, versions: dict, results):
+    timeout = max(60, int(getattr(settings, "SCHEDULING_SEARCH_CACHE_TIMEOUT_SECONDS", 86400)))
+    cache.set(key, {"versions": versions, "results": results}, timeout=timeout)
@@ -208,7 +208,22 @@ class AvailabilitySearchQuerySerializer(serializers.Serializer):
     city = serializers.CharField(required=False)
     attendee_count = serializers.IntegerField(required=False, min_value=1, default=1)
     limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=25)
-    offset = serializers.IntegerField(required=False, min_value=0, default=0)
+    offset = serializers.IntegerField(required=False, min_value=0)
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    stream = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if attrs["end_at"] <= attrs["start_at"]:
+            raise serializers.ValidationError("end_at must be after start_at.")
+        if "offset" in attrs and (attrs.get("cursor") or attrs.get("stream")):
+            raise serializers.ValidationError("offset cannot be combined with cursor or stream.")
+        return attrs
+
+
+class CapacityQuerySerializer(serializers.Serializer):
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+    attendee_count = serializers.IntegerField(required=False, min_value=1, default=1)
 
     def validate(self, attrs):
         if attrs["end_at"] <= attrs["start_at"]:
@@ -229,6 +244,25 @@ class CreateBookingSerializer(serializers.Serializer):
         return attrs
 
 
+class BookingBatchItemSerializer(serializers.Serializer):
+    resource_id = serializers.IntegerField()
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+    attendee_count = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, attrs):
+        if attrs["end_at"] <= attrs["start_at"]:
+            raise serializers.ValidationError("end_at must be after start_at.")
+        return attrs
+
+
+class CreateBookingBatchSerializer(serializers.Serializer):
+    MAX_ITEMS = 50
+
+    event_id = serializers.IntegerField()
+    items = BookingBatchItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+
+
 class CreateRequestSerializer(serializers.Serializer):
     event_id = serializers.IntegerField()
     resource_id = serializers.IntegerField()
@@ -274,6 +308,17 @@ class CalendarQuerySerializer(serializers.Serializer):
         return attrs
 
 
+class CalendarSyncQuerySerializer(serializers.Serializer):
+    scope = serializers.ChoiceField(choices=[("organizer", "organizer"), ("resource", "resource"), ("admin", "admin")])
+    sync_token = serializers.CharField(required=False, allow_blank=True)
+    event_id = serializers.IntegerField(required=False)
+    resource_id = serializers.IntegerField(required=False)
+
+
+class CalendarFeedTokenSerializer(serializers.Serializer):
+    scope = serializers.ChoiceField(choices=[("organizer", "organizer"), ("resource", "resource"), ("admin", "admin")])
+
+
 class WebhookTargetSerializer(serializers.ModelSerializer):
     secret = serializers.CharField(write_only=True, required=False, allow_blank=True)
     clear_secret = serializers.BooleanField(write_only=True, required=False, default=False)
@@ -294,6 +339,8 @@ class WebhookTargetSerializer(serializers.ModelSerializer):
             "timeout_seconds",
             "failure_threshold",
             "open_seconds",
+            "max_batch_size",
+            "max_linger_seconds",
             "created_by",
             "updated_by",
             "created_at",
@@ -314,6 +361,11 @@ class WebhookTargetSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Webhook URL must start with http:// or https://")
         return value
 
+    def validate_max_batch_size(self, value):
+        if not 1 <= value <= WebhookTarget.MAX_BATCH_SIZE:
+            raise serializers.ValidationError(f"max_batch_size must be between 1 and {WebhookTarget.MAX_BATCH_SIZE}.")
+        return value
+
     def get_has_secret(self, instance):
         return bool(instance.secret)
 
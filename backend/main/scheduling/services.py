@@ -1,37 +1,87 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import hashlib
 import hmac
 import json
-from datetime import date, datetime, timedelta, timezone as datetime_timezone
+import logging
+import secrets
+import threading
+import time as time_module
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone as datetime_timezone
+from functools import lru_cache
 from urllib import error as urllib_error
 from urllib import request as urllib_request
 from zoneinfo import ZoneInfo
 
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from django.conf import settings
 from django.core.cache import cache
 from django.db import IntegrityError, connection, transaction
-from django.db.models import Count, F, Q
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest, Mod
 from django.utils import timezone
 
 from notifications.models import Notification
-
+from notifications.utils import build_notification_event
+
+from .calendar_projection import (
+    calendar_feed_validators,
+    iter_calendar_ics,
+    project_calendar_for_outbox_events,
+    read_calendar,
+    sync_calendar,
+)
+from .capacity import (
+    get_capacity_calendar,
+    invalidate_capacity_calendars_on_commit,
+    refresh_capacity_calendar_on_commit,
+)
 from .exceptions import ConflictError, IdempotencyConflictError, PolicyViolationError, TransitionError
+from .intervals import BOOKING_INDEX_EVENT_TYPES, get_booking_indexes, invalidate_booking_index
 from .models import (
     AuditLog,
+    AvailabilityDirtyRange,
     AvailabilityException,
     AvailabilityRule,
     AvailabilitySlot,
     Booking,
     BookingConflictIncident,
     BookingRequest,
+    CalendarEvent,
+    CalendarFeedToken,
     IdempotencyRecord,
     MarketplaceResource,
     OutboxDeadLetter,
+    OutboxDelivery,
     OutboxEvent,
     ResourcePolicy,
     WebhookTarget,
+    idempotency_expiry,
+)
+from .ops_counters import (
+    adjust_outbox_counts_on_commit,
+    count_conflict_incident_on_commit,
+    get_ops_counters,
+    incr_many,
 )
+from .outbox_wakeup import signal_outbox_wakeup
+from .search_cache import (
+    bump_resource_versions_on_commit,
+    get_cached_search,
+    get_catalog_version,
+    get_resource_versions,
+    search_cache_key,
+    store_cached_search,
+)
+from .webhook_engine import get_webhook_engine
+
+
+logger = logging.getLogger(__name__)
 
 
 def _serialize_for_hash(data: dict) -> str:
@@ -78,6 +128,37 @@ def _emit_outbox(
         aggregate_id=str(aggregate_id),
         payload=payload,
     )
+    signal_outbox_wakeup()
+    adjust_outbox_counts_on_commit({OutboxEvent.Status.PENDING: 1})
+    if event_type in BOOKING_INDEX_EVENT_TYPES and payload.get("resource_id"):
+        resource_id = payload["resource_id"]
+        transaction.on_commit(lambda: invalidate_booking_index(resource_id))
+
+
+def _emit_outbox_bulk(rows):
+    """``_emit_outbox`` for many events: one insert, one wake-up."""
+    if not rows:
+        return
+    OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(
+                event_type=row["event_type"],
+                aggregate_type=row["aggregate_type"],
+                aggregate_id=str(row["aggregate_id"]),
+                payload=row["payload"],
+            )
+            for row in rows
+        ]
+    )
+    signal_outbox_wakeup()
+    adjust_outbox_counts_on_commit({OutboxEvent.Status.PENDING: len(rows)})
+    resource_ids = {
+        row["payload"]["resource_id"]
+        for row in rows
+        if row["event_type"] in BOOKING_INDEX_EVENT_TYPES and row["payload"].get("resource_id")
+    }
+    for resource_id in resource_ids:
+        transaction.on_commit(lambda resource_id=resource_id: invalidate_booking_index(resource_id))
 
 
 def _record_conflict_incident(
@@ -93,7 +174,7 @@ def _record_conflict_incident(
     details: dict | None = None,
 ):
     try:
-        BookingConflictIncident.objects.create(
+        incident = BookingConflictIncident.objects.create(
             operation=operation,
             conflict_source=conflict_source,
             resource=resource,
@@ -104,19 +185,69 @@ def _record_conflict_incident(
             message=message,
             details=details or {},
         )
+        count_conflict_incident_on_commit(
+            operation=operation,
+            conflict_source=conflict_source,
+            at=incident.created_at,
+        )
     except Exception:
         # Conflict tracking must never block booking flow error responses.
         return None
 
 
+def _idempotency_cache_key(owner_id: int, endpoint: str, key: str):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"scheduling:idempotency:{owner_id}:{endpoint}:{digest}"
+
+
+def _cache_idempotency_record(record: IdempotencyRecord):
+    # Never outlives the row's expiry, so a cache hit is always still valid.
+    remaining = int((record.expires_at - timezone.now()).total_seconds())
+    timeout = min(remaining, int(getattr(settings, "SCHEDULING_IDEMPOTENCY_CACHE_TIMEOUT_SECONDS", 3600)))
+    if timeout <= 0:
+        return
+    cache.set(
+        _idempotency_cache_key(record.owner_id, record.endpoint, record.key),
+        {
+            "request_hash": record.request_hash,
+            "response_status": record.response_status,
+            "response_body": record.response_body,
+            "expires_at": record.expires_at.isoformat(),
+        },
+        timeout=timeout,
+    )
+
+
 def _get_or_assert_idempotency(*, owner, endpoint: str, key: str | None, payload: dict):
+    """Return the stored response for a replayed idempotency key, or None.
+
+    Recent keys are answered from the cache; the table is only read on a miss.
+    """
     if not key:
         return None
 
     digest = _request_hash(payload)
-    existing = IdempotencyRecord.objects.filter(owner=owner, endpoint=endpoint, key=key).first()
-    if not existing:
-        return None
+    cached = cache.get(_idempotency_cache_key(owner.id, endpoint, key))
+    if cached is not None:
+        existing = IdempotencyRecord(
+            owner=owner,
+            endpoint=endpoint,
+            key=key,
+            request_hash=cached["request_hash"],
+            response_status=cached["response_status"],
+            response_body=cached["response_body"],
+            expires_at=datetime.fromisoformat(cached["expires_at"]),
+        )
+    else:
+        existing = IdempotencyRecord.objects.filter(
+            owner=owner,
+            endpoint=endpoint,
+            key=key,
+            expires_at__gt=timezone.now(),
+        ).first()
+        if not existing:
+            return None
+        _cache_idempotency_record(existing)
 
     if existing.request_hash != digest:
         raise IdempotencyConflictError("Idempotency key reused with a different payload.")
@@ -128,7 +259,8 @@ def _save_idempotency(*, owner, endpoint: str, key: str | None, payload: dict, r
     if not key:
         return None
 
-    IdempotencyRecord.objects.update_or_create(
+    # Saving over an expired row reuses its key for the new request.
+    record, _ = IdempotencyRecord.objects.update_or_create(
         owner=owner,
         endpoint=endpoint,
         key=key,
@@ -136,13 +268,27 @@ def _save_idempotency(*, owner, endpoint: str, key: str | None, payload: dict, r
             "request_hash": _request_hash(payload),
             "response_status": response_status,
             "response_body": response_body,
+            "expires_at": idempotency_expiry(),
         },
     )
+    transaction.on_commit(lambda: _cache_idempotency_record(record))
 
 
-def _ensure_policy(resource: MarketplaceResource, start_at: datetime):
-    policy, _ = ResourcePolicy.objects.get_or_create(resource=resource)
+def prune_idempotency_records(*, batch_size: int = 1000):
+    """Delete expired idempotency records in batches; returns how many were removed."""
     now = timezone.now()
+    deleted = 0
+    while True:
+        expired_ids = list(
+            IdempotencyRecord.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size]
+        )
+        if not expired_ids:
+            return deleted
+        deleted += IdempotencyRecord.objects.filter(id__in=expired_ids).delete()[0]
+
+
+def _assert_policy_window(policy: ResourcePolicy, start_at: datetime, *, now: datetime | None = None):
+    now = now or timezone.now()
 
     min_start = now + timedelta(hours=policy.min_notice_hours)
     max_start = now + timedelta(days=policy.max_horizon_days)
@@ -152,6 +298,10 @@ def _ensure_policy(resource: MarketplaceResource, start_at: datetime):
     if start_at > max_start:
         raise PolicyViolationError("Requested start violates max_horizon_days policy.")
 
+
+def _ensure_policy(resource: MarketplaceResource, start_at: datetime):
+    policy, _ = ResourcePolicy.objects.get_or_create(resource=resource)
+    _assert_policy_window(policy, start_at)
     return policy
 
 
@@ -193,20 +343,54 @@ def _reserve_capacity(slots, attendee_count: int):
     slot_ids = [slot.id for slot in slots]
     if slot_ids:
         AvailabilitySlot.objects.filter(id__in=slot_ids).update(capacity_reserved=F("capacity_reserved") + attendee_count)
+        refresh_capacity_calendar_on_commit(
+            slots[0].resource_id,
+            min(slot.start_at for slot in slots),
+            max(slot.end_at for slot in slots),
+        )
 
 
 def _release_capacity(resource: MarketplaceResource, start_at: datetime, end_at: datetime, attendee_count: int):
     if attendee_count <= 0:
         return
-    slot_ids = list(
+    slot_rows = list(
         AvailabilitySlot.objects.filter(resource=resource, is_bookable=True)
         .filter(_overlap_q(start_at, end_at))
-        .values_list("id", flat=True)
+        .values_list("id", "start_at", "end_at")
     )
-    if slot_ids:
-        AvailabilitySlot.objects.filter(id__in=slot_ids).update(
+    if slot_rows:
+        AvailabilitySlot.objects.filter(id__in=[slot_id for slot_id, _, _ in slot_rows]).update(
             capacity_reserved=F("capacity_reserved") - attendee_count
         )
+        refresh_capacity_calendar_on_commit(
+            resource.id,
+            min(slot_start for _, slot_start, _ in slot_rows),
+            max(slot_end for _, _, slot_end in slot_rows),
+        )
+
+
+def get_resource_capacity(
+    *,
+    resource: MarketplaceResource,
+    start_at: datetime,
+    end_at: datetime,
+    attendee_count: int = 1,
+):
+    if end_at <= start_at:
+        raise PolicyViolationError("Capacity end time must be after start time.")
+    max_days = max(1, int(getattr(settings, "SCHEDULING_CAPACITY_CALENDAR_MAX_DAYS", 92)))
+    if end_at - start_at > timedelta(days=max_days):
+        raise PolicyViolationError(f"Capacity range cannot exceed {max_days} days.")
+
+    min_remaining = get_capacity_calendar(resource.id, start_at, end_at).min_remaining(start_at, end_at)
+    return {
+        "resource_id": resource.id,
+        "start_at": start_at,
+        "end_at": end_at,
+        "attendee_count": attendee_count,
+        "min_remaining": min_remaining,
+        "available": min_remaining >= attendee_count,
+    }
 
 
 def create_request(
@@ -419,6 +603,218 @@ def create_booking(
     return booking, True
 
 
+def _windows_q(items):
+    query = Q()
+    for item in items:
+        query |= Q(resource_id=item["resource"].id) & _overlap_q(item["start_at"], item["end_at"])
+    return query
+
+
+def create_bookings_batch(*, organizer, event, items, idempotency_key: str | None = None):
+    """Book every ``{resource, start_at, end_at, attendee_count}`` in ``items`` or none of them.
+
+    Resources are locked in id order so overlapping batches cannot deadlock, and
+    conflicts, slots, audit and outbox rows are each handled with one statement
+    for the whole batch. Returns the bookings in item order and whether they are new.
+    """
+    payload = {
+        "event_id": event.id,
+        "items": [
+            {
+                "resource_id": item["resource"].id,
+                "start_at": item["start_at"].isoformat(),
+                "end_at": item["end_at"].isoformat(),
+                "attendee_count": item["attendee_count"],
+            }
+            for item in items
+        ],
+    }
+    existing = _get_or_assert_idempotency(
+        owner=organizer,
+        endpoint="scheduling.booking.batch_create",
+        key=idempotency_key,
+        payload=payload,
+    )
+    if existing:
+        booking_ids = existing.response_body.get("booking_ids") or []
+        if booking_ids:
+            stored = Booking.objects.in_bulk(booking_ids)
+            missing_ids = [booking_id for booking_id in booking_ids if booking_id not in stored]
+            if missing_ids:
+                # Same as create_booking's replay: a vanished booking is an error, not a rebook.
+                raise Booking.DoesNotExist(f"Booking matching query does not exist: {missing_ids}.")
+            return [stored[booking_id] for booking_id in booking_ids], False
+
+    if not items:
+        raise PolicyViolationError("A booking batch needs at least one item.")
+    by_resource = defaultdict(list)
+    for item in items:
+        if item["end_at"] <= item["start_at"]:
+            raise PolicyViolationError("Booking end time must be after start time.")
+        by_resource[item["resource"].id].append(item)
+    for resource_id, resource_items in by_resource.items():
+        resource_items = sorted(resource_items, key=lambda item: item["start_at"])
+        for previous, current in zip(resource_items, resource_items[1:]):
+            if current["start_at"] < previous["end_at"]:
+                raise PolicyViolationError(f"Batch contains overlapping windows for resource #{resource_id}.")
+
+    policies = {policy.resource_id: policy for policy in ResourcePolicy.objects.filter(resource_id__in=by_resource)}
+    missing = [ResourcePolicy(resource_id=resource_id) for resource_id in by_resource if resource_id not in policies]
+    if missing:
+        ResourcePolicy.objects.bulk_create(missing, ignore_conflicts=True)
+        policies.update(
+            {policy.resource_id: policy for policy in ResourcePolicy.objects.filter(resource_id__in=by_resource)}
+        )
+    now = timezone.now()
+    for item in items:
+        policy = policies[item["resource"].id]
+        if policy.booking_mode == ResourcePolicy.BookingMode.APPROVAL_REQUIRED:
+            raise ConflictError(f"Resource #{item['resource'].id} requires request approval. Use /requests instead.")
+        _assert_policy_window(policy, item["start_at"], now=now)
+
+    with transaction.atomic():
+        list(MarketplaceResource.objects.select_for_update().filter(id__in=by_resource).order_by("id"))
+
+        conflicts = list(
+            Booking.objects.filter(status__in=Booking.ACTIVE_STATES).filter(_windows_q(items)).order_by("start_at")
+        )
+        for item in items:
+            conflict = next(
+                (
+                    booking
+                    for booking in conflicts
+                    if booking.resource_id == item["resource"].id
+                    and booking.start_at < item["end_at"]
+                    and booking.end_at > item["start_at"]
+                ),
+                None,
+            )
+            if conflict:
+                _record_conflict_incident(
+                    operation=BookingConflictIncident.Operation.CREATE,
+                    conflict_source=BookingConflictIncident.ConflictSource.APPLICATION_CHECK,
+                    resource=item["resource"],
+                    event=event,
+                    organizer=organizer,
+                    requested_start_at=item["start_at"],
+                    requested_end_at=item["end_at"],
+                    message=f"Resource is already booked for booking #{conflict.id}.",
+                    details={"conflicting_booking_id": conflict.id, "batch": True},
+                )
+                raise ConflictError(f"Resource is already booked for booking #{conflict.id}.")
+
+        slots = list(
+            AvailabilitySlot.objects.select_for_update()
+            .filter(is_bookable=True)
+            .filter(_windows_q(items))
+            .order_by("resource_id", "start_at")
+        )
+        reserved = Counter()
+        for item in items:
+            for slot in slots:
+                if (
+                    slot.resource_id == item["resource"].id
+                    and slot.start_at < item["end_at"]
+                    and slot.end_at > item["start_at"]
+                ):
+                    reserved[slot.id] += item["attendee_count"]
+        touched_slots = [slot for slot in slots if reserved[slot.id]]
+        for slot in touched_slots:
+            if slot.capacity_remaining < reserved[slot.id]:
+                raise ConflictError(
+                    f"Slot capacity exceeded for window {slot.start_at.isoformat()} - {slot.end_at.isoformat()}."
+                )
+        if touched_slots:
+            AvailabilitySlot.objects.filter(id__in=[slot.id for slot in touched_slots]).update(
+                capacity_reserved=F("capacity_reserved")
+                + Case(*(When(id=slot.id, then=Value(reserved[slot.id])) for slot in touched_slots))
+            )
+            slots_by_resource = defaultdict(list)
+            for slot in touched_slots:
+                slots_by_resource[slot.resource_id].append(slot)
+            for resource_id, resource_slots in slots_by_resource.items():
+                refresh_capacity_calendar_on_commit(
+                    resource_id,
+                    min(slot.start_at for slot in resource_slots),
+                    max(slot.end_at for slot in resource_slots),
+                )
+
+        try:
+            with transaction.atomic():
+                bookings = Booking.objects.bulk_create(
+                    [
+                        Booking(
+                            event=event,
+                            organizer=organizer,
+                            resource=item["resource"],
+                            start_at=item["start_at"],
+                            end_at=item["end_at"],
+                            attendee_count=item["attendee_count"],
+                            status=Booking.Status.CONFIRMED,
+                            source=Booking.Source.INSTANT,
+                            idempotency_key=idempotency_key,
+                        )
+                        for item in items
+                    ]
+                )
+        except IntegrityError as exc:
+            # The constraint error does not say which window clashed, so a multi-resource
+            # batch is recorded against all of its resources instead of guessing one.
+            _record_conflict_incident(
+                operation=BookingConflictIncident.Operation.CREATE,
+                conflict_source=BookingConflictIncident.ConflictSource.DB_CONSTRAINT,
+                resource=items[0]["resource"] if len(by_resource) == 1 else None,
+                event=event,
+                organizer=organizer,
+                requested_start_at=min(item["start_at"] for item in items),
+                requested_end_at=max(item["end_at"] for item in items),
+                message="Resource has a conflicting booking for this time window.",
+                details={"source": "integrity_error", "batch": True, "resource_ids": sorted(by_resource)},
+            )
+            raise ConflictError("Resource has a conflicting booking for this time window.") from exc
+
+        # bulk_create skips post_save, so do what the Booking receivers would have done.
+        bump_resource_versions_on_commit(by_resource)
+        AuditLog.objects.bulk_create(
+            [
+                AuditLog(
+                    actor=organizer,
+                    action="booking.created",
+                    target_type="Booking",
+                    target_id=str(booking.id),
+                    after_data={"status": booking.status, "resource_id": booking.resource_id, "event_id": event.id},
+                )
+                for booking in bookings
+            ]
+        )
+        _emit_outbox_bulk(
+            [
+                {
+                    "event_type": "booking.confirmed",
+                    "aggregate_type": "booking",
+                    "aggregate_id": booking.id,
+                    "payload": {
+                        "booking_id": booking.id,
+                        "resource_id": booking.resource_id,
+                        "organizer_id": organizer.id,
+                        "event_id": event.id,
+                    },
+                }
+                for booking in bookings
+            ]
+        )
+
+    _save_idempotency(
+        owner=organizer,
+        endpoint="scheduling.booking.batch_create",
+        key=idempotency_key,
+        payload=payload,
+        response_status=201,
+        response_body={"booking_ids": [booking.id for booking in bookings]},
+    )
+    return bookings, True
+
+
 def approve_request(*, reviewer, booking_request: BookingRequest, provider_message: str = ""):
     with transaction.atomic():
         locked_request = (
@@ -532,7 +928,11 @@ def cancel_booking(*, actor, booking: Booking, reason: str = ""):
             event_type="booking.cancelled",
             aggregate_type="booking",
             aggregate_id=locked_booking.id,
-            payload={"booking_id": locked_booking.id, "reason": reason},
+            payload={
+                "booking_id": locked_booking.id,
+                "resource_id": locked_booking.resource_id,
+                "reason": reason,
+            },
         )
 
         return locked_booking
@@ -631,6 +1031,7 @@ def reschedule_booking(*, actor, booking: Booking, new_start_at: datetime, new_e
             aggregate_id=locked_booking.id,
             payload={
                 "booking_id": locked_booking.id,
+                "resource_id": locked_booking.resource_id,
                 "old_start": old_start.isoformat(),
                 "old_end": old_end.isoformat(),
                 "new_start": new_start_at.isoformat(),
@@ -644,13 +1045,28 @@ def reschedule_booking(*, actor, booking: Booking, new_start_at: datetime, new_e
 def _iter_rule_dates(rule: AvailabilityRule, range_start: date, range_end: date):
     current = max(rule.effective_start_date, range_start)
     effective_end = min(rule.effective_end_date or range_end, range_end)
+    if current > effective_end:
+        return
 
-    while current <= effective_end:
-        if rule.frequency == AvailabilityRule.Frequency.DAILY:
-            yield current
-        elif current.weekday() in (rule.weekdays or []):
-            yield current
-        current += timedelta(days=1)
+    first_ordinal = current.toordinal()
+    span = effective_end.toordinal() - first_ordinal
+    if rule.frequency == AvailabilityRule.Frequency.DAILY:
+        offsets = [0]
+        stride = 1
+    else:
+        # Jump straight to each matching weekday and step a week at a time.
+        weekdays = {day for day in (rule.weekdays or []) if isinstance(day, int) and 0 <= day <= 6}
+        offsets = sorted((weekday - current.weekday()) % 7 for weekday in weekdays)
+        stride = 7
+        if not offsets:
+            return
+
+    for week_offset in range(0, span + 1, stride):
+        for offset in offsets:
+            day = week_offset + offset
+            if day > span:
+                break
+            yield date.fromordinal(first_ordinal + day)
 
 
 def _resolve_local_datetime(local_dt: datetime, tz: ZoneInfo, prefer_fold: int = 0):
@@ -669,36 +1085,125 @@ def _resolve_local_datetime(local_dt: datetime, tz: ZoneInfo, prefer_fold: int =
     return valid[0][1]
 
 
+@lru_cache(maxsize=256)
+def _zone_day_offsets(tz_name: str, year: int):
+    """Map each local date of ``year`` to its constant UTC offset, or None on DST transition days."""
+    tz = ZoneInfo(tz_name)
+    offsets = {}
+    current = date(year, 1, 1)
+    midnight = datetime.combine(current, time.min, tzinfo=tz)
+    while current.year == year:
+        next_day = current + timedelta(days=1)
+        next_midnight = datetime.combine(next_day, time.min, tzinfo=tz)
+        offset = midnight.utcoffset()
+        is_stable = (
+            offset == next_midnight.utcoffset()
+            and offset == midnight.replace(fold=1).utcoffset()
+            and offset == next_midnight.replace(fold=1).utcoffset()
+        )
+        offsets[current] = offset if is_stable else None
+        current, midnight = next_day, next_midnight
+    return offsets
+
+
+@lru_cache(maxsize=65536)
+def _local_to_utc(tz_name: str, local_date: date, local_time: time):
+    offset = _zone_day_offsets(tz_name, local_date.year)[local_date]
+    local_dt = datetime.combine(local_date, local_time)
+    if offset is not None:
+        return (local_dt - offset).replace(tzinfo=datetime_timezone.utc)
+
+    aware = _resolve_local_datetime(local_dt, ZoneInfo(tz_name), prefer_fold=0)
+    return aware.astimezone(datetime_timezone.utc) if aware else None
+
+
 def _rule_slot_to_utc(rule: AvailabilityRule, slot_date: date):
-    tz = ZoneInfo(rule.timezone or "UTC")
-    local_start = datetime.combine(slot_date, rule.local_start_time)
-    local_end = datetime.combine(slot_date, rule.local_end_time)
+    tz_name = rule.timezone or "UTC"
 
     # DST policy:
     # - ambiguous local times pick fold=0 (earlier occurrence),
     # - nonexistent local times are skipped entirely.
-    aware_start = _resolve_local_datetime(local_start, tz, prefer_fold=0)
-    aware_end = _resolve_local_datetime(local_end, tz, prefer_fold=0)
-    if not aware_start or not aware_end:
+    # Days without a DST transition use the zone's constant offset for that day.
+    utc_start = _local_to_utc(tz_name, slot_date, rule.local_start_time)
+    utc_end = _local_to_utc(tz_name, slot_date, rule.local_end_time)
+    if not utc_start or not utc_end:
         return None
 
-    utc_start = aware_start.astimezone(datetime_timezone.utc)
-    utc_end = aware_end.astimezone(datetime_timezone.utc)
     if utc_end <= utc_start:
         return None
     return utc_start, utc_end
 
 
-def _apply_exceptions(resource: MarketplaceResource, start_at: datetime, end_at: datetime):
-    exceptions = AvailabilityException.objects.filter(resource=resource).filter(_overlap_q(start_at, end_at))
-    for exception in exceptions:
-        if exception.exception_type == AvailabilityException.ExceptionType.BLACKOUT:
-            return False
-    return True
+def _merge_intervals(intervals):
+    merged = []
+    for start_at, end_at in sorted(intervals):
+        if merged and start_at <= merged[-1][1]:
+            if end_at > merged[-1][1]:
+                merged[-1][1] = end_at
+            continue
+        merged.append([start_at, end_at])
+    return merged
+
+
+def _overlaps_merged(merged, start_at: datetime, end_at: datetime):
+    # merged intervals are disjoint and sorted, so ends are sorted as well.
+    index = bisect_right(merged, start_at, key=lambda interval: interval[1])
+    return index < len(merged) and merged[index][0] < end_at
+
+
+def _group_by_resource(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.resource_id].append(row)
+    return grouped
+
+
+def _rule_candidate_windows(rules, start_at: datetime, end_at: datetime):
+    windows = []
+    for rule in rules:
+        for slot_date in _iter_rule_dates(rule, start_at.date(), end_at.date()):
+            slot_window = _rule_slot_to_utc(rule, slot_date)
+            if not slot_window:
+                continue
+            utc_start, utc_end = slot_window
+            if utc_end <= start_at or utc_start >= end_at:
+                continue
+            windows.append((utc_start, utc_end, rule.capacity))
+    return windows
+
+
+def _search_resource_qs(*, resource_type: str | None, city: str | None):
+    resources = MarketplaceResource.objects.filter(is_active=True)
+    if resource_type:
+        resources = resources.filter(resource_type=resource_type)
+    if city:
+        resources = resources.filter(city__iexact=city)
+    return resources.order_by("id")
+
 
+def _search_resource_page(*, resource_type: str | None, city: str | None, limit: int, offset: int):
+    return list(_search_resource_qs(resource_type=resource_type, city=city)[offset : offset + limit])
 
-def _has_active_overlap(resource: MarketplaceResource, start_at: datetime, end_at: datetime):
-    return _active_booking_qs(resource).filter(_overlap_q(start_at, end_at)).exists()
+
+def _normalized_search_query(
+    *,
+    start_at: datetime,
+    end_at: datetime,
+    resource_type: str | None,
+    city: str | None,
+    attendee_count: int,
+    limit: int,
+    **extra,
+):
+    return {
+        "start_at": start_at.astimezone(datetime_timezone.utc).isoformat(),
+        "end_at": end_at.astimezone(datetime_timezone.utc).isoformat(),
+        "resource_type": resource_type or "",
+        "city": (city or "").strip().lower(),
+        "attendee_count": attendee_count,
+        "limit": limit,
+        **extra,
+    }
 
 
 def search_availability(
@@ -710,26 +1215,244 @@ def search_availability(
     attendee_count: int = 1,
     limit: int = 25,
     offset: int = 0,
+    use_cache: bool = False,
 ):
-    resources = MarketplaceResource.objects.filter(is_active=True)
-    if resource_type:
-        resources = resources.filter(resource_type=resource_type)
-    if city:
-        resources = resources.filter(city__iexact=city)
+    if not use_cache:
+        resources = _search_resource_page(resource_type=resource_type, city=city, limit=limit, offset=offset)
+        return _compute_availability(resources, start_at=start_at, end_at=end_at, attendee_count=attendee_count)
+
+    query = _normalized_search_query(
+        start_at=start_at,
+        end_at=end_at,
+        resource_type=resource_type,
+        city=city,
+        attendee_count=attendee_count,
+        limit=limit,
+        offset=offset,
+    )
+    # Page membership is guarded by the catalog version, page contents by per-resource versions.
+    cache_key = search_cache_key(query, get_catalog_version())
+    cached = get_cached_search(cache_key)
+    if cached is not None:
+        return cached
+
+    resources = _search_resource_page(resource_type=resource_type, city=city, limit=limit, offset=offset)
+    # Versions are read before computing so a concurrent write can only cause a miss, never a stale hit.
+    versions = get_resource_versions([resource.id for resource in resources])
+    results = _compute_availability(resources, start_at=start_at, end_at=end_at, attendee_count=attendee_count)
+    store_cached_search(cache_key, versions=versions, results=results)
+    return results
 
-    resources = resources.order_by("id")[offset : offset + limit]
-    results = []
 
+def encode_search_cursor(after_id: int):
+    raw = json.dumps({"after_id": after_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str | None):
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after_id = int(json.loads(raw)["after_id"])
+    except (ValueError, TypeError, KeyError):
+        raise PolicyViolationError("Invalid search cursor.")
+    if after_id < 0:
+        raise PolicyViolationError("Invalid search cursor.")
+    return after_id
+
+
+def iter_availability(
+    *,
+    start_at: datetime,
+    end_at: datetime,
+    resource_type: str | None = None,
+    city: str | None = None,
+    attendee_count: int = 1,
+    after_id: int = 0,
+    batch_size: int = 25,
+    versions: dict | None = None,
+):
+    """Yield ``(resource_id, row)`` for every matching resource after ``after_id``.
+
+    ``row`` is None for resources without free windows. Resources are pulled in
+    keyset order, one batch at a time, so callers can stop as soon as they have enough.
+    """
+    resource_qs = _search_resource_qs(resource_type=resource_type, city=city)
+    while True:
+        resources = list(resource_qs.filter(id__gt=after_id)[:batch_size])
+        if not resources:
+            return
+        if versions is not None:
+            versions.update(get_resource_versions([resource.id for resource in resources]))
+        rows = {
+            row["resource_id"]: row
+            for row in _compute_availability(
+                resources,
+                start_at=start_at,
+                end_at=end_at,
+                attendee_count=attendee_count,
+            )
+        }
+        for resource in resources:
+            yield resource.id, rows.get(resource.id)
+        if len(resources) < batch_size:
+            return
+        after_id = resources[-1].id
+
+
+def iter_availability_page(
+    *,
+    start_at: datetime,
+    end_at: datetime,
+    resource_type: str | None = None,
+    city: str | None = None,
+    attendee_count: int = 1,
+    limit: int = 25,
+    after_id: int = 0,
+    versions: dict | None = None,
+):
+    """Yield ``{"result": row}`` per resource with windows, then a final ``{"next_cursor": ...}``.
+
+    Scanning stops once ``limit`` rows were found or SCHEDULING_SEARCH_MAX_SCAN_RESOURCES
+    resources were examined; the cursor resumes after the last resource examined.
+    """
+    max_scan = max(limit, int(getattr(settings, "SCHEDULING_SEARCH_MAX_SCAN_RESOURCES", 500)))
+    found = 0
+    scanned = 0
+    next_cursor = None
+    for resource_id, row in iter_availability(
+        start_at=start_at,
+        end_at=end_at,
+        resource_type=resource_type,
+        city=city,
+        attendee_count=attendee_count,
+        after_id=after_id,
+        batch_size=limit,
+        versions=versions,
+    ):
+        scanned += 1
+        if row:
+            found += 1
+            yield {"result": row}
+        if found >= limit or scanned >= max_scan:
+            next_cursor = encode_search_cursor(resource_id)
+            break
+    yield {"next_cursor": next_cursor}
+
+
+def search_availability_keyset(
+    *,
+    start_at: datetime,
+    end_at: datetime,
+    resource_type: str | None = None,
+    city: str | None = None,
+    attendee_count: int = 1,
+    limit: int = 25,
+    cursor: str | None = None,
+    use_cache: bool = False,
+):
+    after_id = decode_search_cursor(cursor)
+    cache_key = None
+    if use_cache:
+        query = _normalized_search_query(
+            start_at=start_at,
+            end_at=end_at,
+            resource_type=resource_type,
+            city=city,
+            attendee_count=attendee_count,
+            limit=limit,
+            after_id=after_id,
+        )
+        cache_key = search_cache_key(query, get_catalog_version())
+        cached = get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+
+    versions = {} if use_cache else None
+    page = {"results": [], "next_cursor": None}
+    for item in iter_availability_page(
+        start_at=start_at,
+        end_at=end_at,
+        resource_type=resource_type,
+        city=city,
+        attendee_count=attendee_count,
+        limit=limit,
+        after_id=after_id,
+        versions=versions,
+    ):
+        if "result" in item:
+            page["results"].append(item["result"])
+        else:
+            page["next_cursor"] = item["next_cursor"]
+
+    if cache_key:
+        store_cached_search(cache_key, versions=versions, results=page)
+    return page
+
+
+def _compute_availability(resources, *, start_at: datetime, end_at: datetime, attendee_count: int):
+    if not resources:
+        return []
+    resource_ids = [resource.id for resource in resources]
+
+    # Load everything the page needs up front; free windows are then computed in memory
+    # so the query count does not grow with the number of resources, slots or rule dates.
+    slots_by_resource = _group_by_resource(
+        AvailabilitySlot.objects.filter(resource_id__in=resource_ids, is_bookable=True)
+        .filter(_overlap_q(start_at, end_at))
+        .order_by("start_at")
+    )
+    rules_by_resource = _group_by_resource(
+        AvailabilityRule.objects.filter(
+            resource_id__in=resource_ids,
+            is_active=True,
+            effective_start_date__lte=end_at.date(),
+        )
+        .filter(Q(effective_end_date__isnull=True) | Q(effective_end_date__gte=start_at.date()))
+        .order_by("resource_id", "id")
+    )
+    rule_windows_by_resource = {
+        resource_id: _rule_candidate_windows(rules, start_at, end_at)
+        for resource_id, rules in rules_by_resource.items()
+    }
+
+    # Slots and rule windows may extend past the search range, so blackouts are loaded
+    # for the envelope of every candidate window rather than for the range itself.
+    candidate_bounds = [(slot.start_at, slot.end_at) for slots in slots_by_resource.values() for slot in slots]
+    candidate_bounds.extend(
+        (window_start, window_end)
+        for windows in rule_windows_by_resource.values()
+        for window_start, window_end, _ in windows
+    )
+    if not candidate_bounds:
+        return []
+    envelope_start = min(bound[0] for bound in candidate_bounds)
+    envelope_end = max(bound[1] for bound in candidate_bounds)
+
+    booking_indexes = get_booking_indexes(resource_ids, envelope_start, envelope_end)
+    blackouts_by_resource = {
+        resource_id: _merge_intervals((exception.start_at, exception.end_at) for exception in exceptions)
+        for resource_id, exceptions in _group_by_resource(
+            AvailabilityException.objects.filter(
+                resource_id__in=resource_ids,
+                exception_type=AvailabilityException.ExceptionType.BLACKOUT,
+            )
+            .filter(_overlap_q(envelope_start, envelope_end))
+            .only("resource_id", "start_at", "end_at")
+        ).items()
+    }
+    booking_mode_by_resource = dict(
+        ResourcePolicy.objects.filter(resource_id__in=resource_ids).values_list("resource_id", "booking_mode")
+    )
+
+    results = []
     for resource in resources:
+        booking_index = booking_indexes[resource.id]
         windows = []
-        materialized_slots = (
-            AvailabilitySlot.objects.filter(resource=resource, is_bookable=True)
-            .filter(_overlap_q(start_at, end_at))
-            .order_by("start_at")
-        )
 
-        for slot in materialized_slots:
-            if slot.capacity_remaining >= attendee_count and not _has_active_overlap(resource, slot.start_at, slot.end_at):
+        for slot in slots_by_resource.get(resource.id, []):
+            if slot.capacity_remaining >= attendee_count and not booking_index.overlaps(slot.start_at, slot.end_at):
                 windows.append(
                     {
                         "start_at": slot.start_at,
@@ -740,34 +1463,22 @@ def search_availability(
                 )
 
         if not windows:
-            rule_qs = AvailabilityRule.objects.filter(
-                resource=resource,
-                is_active=True,
-                effective_start_date__lte=end_at.date(),
-            ).filter(Q(effective_end_date__isnull=True) | Q(effective_end_date__gte=start_at.date()))
-            for rule in rule_qs:
-                for slot_date in _iter_rule_dates(rule, start_at.date(), end_at.date()):
-                    slot_window = _rule_slot_to_utc(rule, slot_date)
-                    if not slot_window:
-                        continue
-                    utc_start, utc_end = slot_window
-                    if utc_end <= start_at or utc_start >= end_at:
-                        continue
-                    if not _apply_exceptions(resource, utc_start, utc_end):
-                        continue
-                    if _has_active_overlap(resource, utc_start, utc_end):
-                        continue
-                    windows.append(
-                        {
-                            "start_at": utc_start,
-                            "end_at": utc_end,
-                            "capacity_remaining": rule.capacity,
-                            "source": "rule",
-                        }
-                    )
+            blackouts = blackouts_by_resource.get(resource.id, [])
+            for utc_start, utc_end, capacity in rule_windows_by_resource.get(resource.id, []):
+                if _overlaps_merged(blackouts, utc_start, utc_end):
+                    continue
+                if booking_index.overlaps(utc_start, utc_end):
+                    continue
+                windows.append(
+                    {
+                        "start_at": utc_start,
+                        "end_at": utc_end,
+                        "capacity_remaining": capacity,
+                        "source": "rule",
+                    }
+                )
 
         if windows:
-            policy = ResourcePolicy.objects.filter(resource=resource).first()
             results.append(
                 {
                     "resource_id": resource.id,
@@ -779,7 +1490,10 @@ def search_availability(
                     "venue_id": resource.venue_id,
                     "artist_id": resource.artist_id,
                     "vendor_id": resource.vendor_id,
-                    "booking_mode": policy.booking_mode if policy else ResourcePolicy.BookingMode.APPROVAL_REQUIRED,
+                    "booking_mode": booking_mode_by_resource.get(
+                        resource.id,
+                        ResourcePolicy.BookingMode.APPROVAL_REQUIRED,
+                    ),
                     "windows": sorted(windows, key=lambda item: item["start_at"])[:30],
                 }
             )
@@ -793,6 +1507,9 @@ def materialize_availability_slots(
     end_date: date | None = None,
     horizon_days: int = 180,
     resource_id: int | None = None,
+    batch_size: int = 500,
+    shard_index: int = 0,
+    shard_count: int = 1,
 ):
     if start_date is None:
         start_date = timezone.localdate()
@@ -800,6 +1517,8 @@ def materialize_availability_slots(
         end_date = start_date + timedelta(days=horizon_days)
     if end_date < start_date:
         raise PolicyViolationError("end_date must be on or after start_date.")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise PolicyViolationError("shard_index must be in range [0, shard_count).")
 
     rule_qs = AvailabilityRule.objects.filter(
         is_active=True,
@@ -807,54 +1526,109 @@ def materialize_availability_slots(
     ).filter(Q(effective_end_date__isnull=True) | Q(effective_end_date__gte=start_date))
     if resource_id:
         rule_qs = rule_qs.filter(resource_id=resource_id)
+    if shard_count > 1:
+        # Shards own whole resources, so concurrent shards never write the same slot rows.
+        rule_qs = rule_qs.annotate(resource_shard=Mod("resource_id", shard_count)).filter(resource_shard=shard_index)
     rules = list(rule_qs.select_related("resource").order_by("resource_id", "id"))
 
-    created = 0
-    updated = 0
-    skipped_nonexistent = 0
+    # Local rule dates can land up to a day either side once converted to UTC.
+    window_floor = datetime.combine(start_date - timedelta(days=1), datetime.min.time(), tzinfo=datetime_timezone.utc)
+    window_ceiling = datetime.combine(end_date + timedelta(days=2), datetime.min.time(), tzinfo=datetime_timezone.utc)
+    resource_filter = Q(resource_id=resource_id) if resource_id else Q(resource_id__in=rule_qs.values("resource_id"))
+
+    blackouts_by_resource = {
+        blackout_resource_id: _merge_intervals((exception.start_at, exception.end_at) for exception in exceptions)
+        for blackout_resource_id, exceptions in _group_by_resource(
+            AvailabilityException.objects.filter(resource_filter)
+            .filter(exception_type=AvailabilityException.ExceptionType.BLACKOUT)
+            .filter(_overlap_q(window_floor, window_ceiling))
+            .only("resource_id", "start_at", "end_at")
+        ).items()
+    }
 
+    now = timezone.now()
+    skipped_nonexistent = 0
+    desired_slots = {}
     for rule in rules:
+        blackouts = blackouts_by_resource.get(rule.resource_id, [])
         for slot_date in _iter_rule_dates(rule, start_date, end_date):
             slot_window = _rule_slot_to_utc(rule, slot_date)
             if not slot_window:
                 skipped_nonexistent += 1
                 continue
-
             utc_start, utc_end = slot_window
-            is_bookable = _apply_exceptions(rule.resource, utc_start, utc_end)
-            desired_capacity = rule.capacity
-
-            slot, was_created = AvailabilitySlot.objects.get_or_create(
-                resource=rule.resource,
-                start_at=utc_start,
-                end_at=utc_end,
-                defaults={
-                    "source_rule": rule,
-                    "capacity_total": desired_capacity,
-                    "is_bookable": is_bookable,
-                },
+            is_bookable = not _overlaps_merged(blackouts, utc_start, utc_end)
+            desired_slots[(rule.resource_id, utc_start, utc_end)] = (rule, is_bookable)
+
+    created = 0
+    updated = 0
+    with transaction.atomic():
+        # Diff against rows read in the same transaction; writes below only ever raise
+        # capacity_total relative to the live capacity_reserved, never a snapshot of it.
+        existing_slots = {
+            (slot.resource_id, slot.start_at, slot.end_at): slot
+            for slot in AvailabilitySlot.objects.filter(resource_filter)
+            .filter(start_at__gte=window_floor, start_at__lt=window_ceiling)
+            .only(
+                "id",
+                "resource_id",
+                "source_rule_id",
+                "start_at",
+                "end_at",
+                "capacity_total",
+                "capacity_reserved",
+                "is_bookable",
+                "version",
             )
-            if was_created:
-                created += 1
+        }
+        slots_to_create = []
+        update_groups = defaultdict(list)
+        touched_resource_ids = set()
+        for key, (rule, is_bookable) in desired_slots.items():
+            resource_id_for_slot, utc_start, utc_end = key
+            slot = existing_slots.get(key)
+            if slot is None:
+                slots_to_create.append(
+                    AvailabilitySlot(
+                        resource_id=resource_id_for_slot,
+                        source_rule=rule,
+                        start_at=utc_start,
+                        end_at=utc_end,
+                        capacity_total=rule.capacity,
+                        is_bookable=is_bookable,
+                    )
+                )
+                touched_resource_ids.add(resource_id_for_slot)
                 continue
-
-            target_capacity = max(slot.capacity_reserved, desired_capacity)
             needs_update = (
                 slot.source_rule_id != rule.id
-                or slot.capacity_total != target_capacity
+                or slot.capacity_total != max(slot.capacity_reserved, rule.capacity)
                 or slot.is_bookable != is_bookable
             )
-            if not needs_update:
-                continue
-
-            AvailabilitySlot.objects.filter(id=slot.id).update(
-                source_rule=rule,
-                capacity_total=target_capacity,
-                is_bookable=is_bookable,
-                version=F("version") + 1,
-                updated_at=timezone.now(),
+            if needs_update:
+                update_groups[(rule.id, rule.capacity, is_bookable)].append(slot.id)
+                touched_resource_ids.add(resource_id_for_slot)
+
+        bump_resource_versions_on_commit(touched_resource_ids)
+        invalidate_capacity_calendars_on_commit(touched_resource_ids)
+        if slots_to_create:
+            AvailabilitySlot.objects.bulk_create(slots_to_create, batch_size=batch_size, ignore_conflicts=True)
+            # ignore_conflicts drops rows a concurrent writer already inserted, so count what landed.
+            created = (
+                AvailabilitySlot.objects.filter(resource_filter)
+                .filter(start_at__gte=window_floor, start_at__lt=window_ceiling)
+                .count()
+                - len(existing_slots)
             )
-            updated += 1
+        for (source_rule_id, desired_capacity, is_bookable), slot_ids in update_groups.items():
+            for offset in range(0, len(slot_ids), batch_size):
+                updated += AvailabilitySlot.objects.filter(id__in=slot_ids[offset : offset + batch_size]).update(
+                    source_rule_id=source_rule_id,
+                    capacity_total=Greatest(F("capacity_reserved"), Value(desired_capacity)),
+                    is_bookable=is_bookable,
+                    version=F("version") + 1,
+                    updated_at=now,
+                )
 
     return {
         "rules_processed": len(rules),
@@ -866,101 +1640,278 @@ def materialize_availability_slots(
     }
 
 
-def build_calendar_view(*, user, start_at: datetime, end_at: datetime, scope: str, event_id: int | None = None, resource_id: int | None = None):
-    if end_at <= start_at:
-        raise PolicyViolationError("Calendar end time must be after start time.")
+def _materialization_horizon():
+    today = timezone.localdate()
+    horizon_days = max(0, int(getattr(settings, "SCHEDULING_MATERIALIZATION_HORIZON_DAYS", 180)))
+    return today, today + timedelta(days=horizon_days)
 
-    events = []
 
-    if scope == "organizer":
-        booking_qs = Booking.objects.filter(organizer=user).filter(_overlap_q(start_at, end_at))
-        if event_id:
-            booking_qs = booking_qs.filter(event_id=event_id)
+def mark_availability_dirty(*, resource_id: int, start_date: date, end_date: date, reason: str = ""):
+    horizon_start, horizon_end = _materialization_horizon()
+    start_date = max(start_date, horizon_start)
+    end_date = min(end_date, horizon_end)
+    if end_date < start_date:
+        return None
+    return AvailabilityDirtyRange.objects.create(
+        resource_id=resource_id,
+        start_date=start_date,
+        end_date=end_date,
+        reason=reason,
+    )
 
-        request_qs = BookingRequest.objects.filter(organizer=user).filter(
-            Q(requested_start_at__lt=end_at) & Q(requested_end_at__gt=start_at)
-        )
-        if event_id:
-            request_qs = request_qs.filter(event_id=event_id)
 
-    elif scope == "resource":
-        booking_qs = Booking.objects.filter(resource__owner=user).filter(_overlap_q(start_at, end_at))
-        request_qs = BookingRequest.objects.filter(resource__owner=user).filter(
-            Q(requested_start_at__lt=end_at) & Q(requested_end_at__gt=start_at)
-        )
-        if resource_id:
-            booking_qs = booking_qs.filter(resource_id=resource_id)
-            request_qs = request_qs.filter(resource_id=resource_id)
+def _rule_date_range(effective_start_date: date, effective_end_date: date | None):
+    _, horizon_end = _materialization_horizon()
+    return effective_start_date, effective_end_date or horizon_end
 
-    else:
-        booking_qs = Booking.objects.filter(_overlap_q(start_at, end_at))
-        request_qs = BookingRequest.objects.filter(
-            Q(requested_start_at__lt=end_at) & Q(requested_end_at__gt=start_at)
-        )
-        if event_id:
-            booking_qs = booking_qs.filter(event_id=event_id)
-            request_qs = request_qs.filter(event_id=event_id)
-        if resource_id:
-            booking_qs = booking_qs.filter(resource_id=resource_id)
-            request_qs = request_qs.filter(resource_id=resource_id)
-
-    for booking in booking_qs.select_related("event", "resource"):
-        events.append(
-            {
-                "type": "booking",
-                "id": booking.id,
-                "status": booking.status,
-                "event_id": booking.event_id,
-                "resource_id": booking.resource_id,
-                "title": f"{booking.resource.display_name} booking",
-                "start_at": booking.start_at,
-                "end_at": booking.end_at,
-            }
-        )
 
-    for booking_request in request_qs.select_related("event", "resource"):
-        events.append(
-            {
-                "type": "request",
-                "id": booking_request.id,
-                "status": booking_request.status,
-                "event_id": booking_request.event_id,
-                "resource_id": booking_request.resource_id,
-                "title": f"{booking_request.resource.display_name} request",
-                "start_at": booking_request.requested_start_at,
-                "end_at": booking_request.requested_end_at,
-            }
+def _exception_date_range(start_at: datetime, end_at: datetime):
+    # Rule dates are local to the rule timezone, so pad a day on each side of the UTC span.
+    return start_at.date() - timedelta(days=1), end_at.date() + timedelta(days=1)
+
+
+def mark_rule_dirty(rule: AvailabilityRule, *, previous: AvailabilityRule | None = None, reason: str = "rule.changed"):
+    ranges = [_rule_date_range(rule.effective_start_date, rule.effective_end_date)]
+    if previous is not None:
+        ranges.append(_rule_date_range(previous.effective_start_date, previous.effective_end_date))
+    for resource_id in {rule.resource_id, getattr(previous, "resource_id", rule.resource_id)}:
+        mark_availability_dirty(
+            resource_id=resource_id,
+            start_date=min(start for start, _ in ranges),
+            end_date=max(end for _, end in ranges),
+            reason=reason,
         )
 
-    return sorted(events, key=lambda item: item["start_at"])
 
+def mark_exception_dirty(
+    exception: AvailabilityException,
+    *,
+    previous: AvailabilityException | None = None,
+    reason: str = "exception.changed",
+):
+    ranges = [_exception_date_range(exception.start_at, exception.end_at)]
+    if previous is not None:
+        ranges.append(_exception_date_range(previous.start_at, previous.end_at))
+    for resource_id in {exception.resource_id, getattr(previous, "resource_id", exception.resource_id)}:
+        mark_availability_dirty(
+            resource_id=resource_id,
+            start_date=min(start for start, _ in ranges),
+            end_date=max(end for _, end in ranges),
+            reason=reason,
+        )
 
-def expire_pending_requests(limit: int = 500):
-    now = timezone.now()
-    request_ids = list(
-        BookingRequest.objects.filter(status=BookingRequest.Status.PENDING, expires_at__lt=now)
-        .order_by("expires_at")
-        .values_list("id", flat=True)[:limit]
+
+def materialize_dirty_availability(limit: int = 500):
+    dirty_rows = list(
+        AvailabilityDirtyRange.objects.order_by("created_at", "id")
+        .values("id", "resource_id", "start_date", "end_date")[:limit]
     )
-    if not request_ids:
-        return 0
+    summary = {"ranges_processed": 0, "materialized_ranges": 0, "slots_created": 0, "slots_updated": 0}
+    if not dirty_rows:
+        return summary
+
+    # Coalesce overlapping or adjacent ranges per resource before materializing.
+    merged_by_resource = defaultdict(list)
+    for row in sorted(dirty_rows, key=lambda item: (item["resource_id"], item["start_date"])):
+        merged = merged_by_resource[row["resource_id"]]
+        if merged and row["start_date"] <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], row["end_date"])
+            continue
+        merged.append([row["start_date"], row["end_date"]])
+
+    for resource_id, ranges in merged_by_resource.items():
+        for start_date, end_date in ranges:
+            result = materialize_availability_slots(
+                start_date=start_date,
+                end_date=end_date,
+                resource_id=resource_id,
+            )
+            summary["materialized_ranges"] += 1
+            summary["slots_created"] += result["slots_created"]
+            summary["slots_updated"] += result["slots_updated"]
 
-    with transaction.atomic():
-        updated = BookingRequest.objects.filter(id__in=request_ids, status=BookingRequest.Status.PENDING).update(
+    summary["ranges_processed"] = AvailabilityDirtyRange.objects.filter(
+        id__in=[row["id"] for row in dirty_rows]
+    ).delete()[0]
+    return summary
+
+
+def _calendar_scope(*, user, scope: str, event_id: int | None, resource_id: int | None):
+    # Organizer calendars filter by event, resource calendars by resource, admin by either.
+    if scope == "organizer":
+        return {"actor_type": CalendarEvent.ActorType.ORGANIZER, "actor_user": user, "event_id": event_id}
+    if scope == "resource":
+        return {"actor_type": CalendarEvent.ActorType.RESOURCE, "actor_user": user, "resource_id": resource_id}
+    return {
+        "actor_type": CalendarEvent.ActorType.ADMIN,
+        "actor_user": None,
+        "event_id": event_id,
+        "resource_id": resource_id,
+    }
+
+
+def build_calendar_view(*, user, start_at: datetime, end_at: datetime, scope: str, event_id: int | None = None, resource_id: int | None = None):
+    if end_at <= start_at:
+        raise PolicyViolationError("Calendar end time must be after start time.")
+
+    # The CalendarEvent projection is kept current by the outbox calendar consumer.
+    return read_calendar(
+        start_at=start_at,
+        end_at=end_at,
+        **_calendar_scope(user=user, scope=scope, event_id=event_id, resource_id=resource_id),
+    )
+
+
+def sync_calendar_view(
+    *,
+    user,
+    scope: str,
+    sync_token: str | None = None,
+    event_id: int | None = None,
+    resource_id: int | None = None,
+):
+    return sync_calendar(
+        sync_token=sync_token,
+        **_calendar_scope(user=user, scope=scope, event_id=event_id, resource_id=resource_id),
+    )
+
+
+def _calendar_feed_token_hash(token: str):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_calendar_feed_token(*, user, scope: str):
+    """Create or rotate the user's feed token for ``scope``; the raw token is only returned here."""
+    token = secrets.token_urlsafe(32)
+    CalendarFeedToken.objects.update_or_create(
+        user=user,
+        scope=scope,
+        defaults={"token_hash": _calendar_feed_token_hash(token)},
+    )
+    return token
+
+
+def revoke_calendar_feed_token(*, user, scope: str):
+    deleted, _ = CalendarFeedToken.objects.filter(user=user, scope=scope).delete()
+    return bool(deleted)
+
+
+def get_calendar_feed_token(token: str):
+    return (
+        CalendarFeedToken.objects.select_related("user")
+        .filter(token_hash=_calendar_feed_token_hash(token), user__is_active=True)
+        .first()
+    )
+
+
+def calendar_feed_validators_for(*, user, scope: str):
+    scope_kwargs = _calendar_scope(user=user, scope=scope, event_id=None, resource_id=None)
+    return calendar_feed_validators(actor_type=scope_kwargs["actor_type"], actor_user=scope_kwargs["actor_user"])
+
+
+def iter_calendar_feed(*, user, scope: str):
+    scope_kwargs = _calendar_scope(user=user, scope=scope, event_id=None, resource_id=None)
+    return iter_calendar_ics(actor_type=scope_kwargs["actor_type"], actor_user=scope_kwargs["actor_user"])
+
+
+def _expire_due_request_chunk(*, cutoff: datetime, size: int):
+    """Mark up to ``size`` requests that were due at ``cutoff`` as expired; return the ids it changed."""
+    now = timezone.now()
+    if connection.vendor == "postgresql":
+        table = connection.ops.quote_name(BookingRequest._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS request
+                SET status = %s, updated_at = %s
+                FROM (
+                    SELECT id
+                    FROM {table}
+                    WHERE status = %s AND expires_at < %s
+                    ORDER BY expires_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ) AS due
+                WHERE request.id = due.id
+                RETURNING request.id
+                """,
+                [BookingRequest.Status.EXPIRED, now, BookingRequest.Status.PENDING, cutoff, size],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    candidates = list(
+        BookingRequest.objects.filter(status=BookingRequest.Status.PENDING, expires_at__lt=cutoff)
+        .order_by("expires_at", "id")
+        .values_list("id", flat=True)[:size]
+    )
+    if not candidates:
+        return []
+    # Same conditional write and re-read by stamp as the outbox claim, so requests
+    # approved or withdrawn in between keep their status and get no event.
+    BookingRequest.objects.filter(id__in=candidates, status=BookingRequest.Status.PENDING).update(
+        status=BookingRequest.Status.EXPIRED,
+        updated_at=now,
+    )
+    return list(
+        BookingRequest.objects.filter(
+            id__in=candidates,
             status=BookingRequest.Status.EXPIRED,
-            updated_at=timezone.now(),
-        )
-        for request_id in request_ids:
-            _emit_outbox(
-                event_type="request.expired",
-                aggregate_type="booking_request",
-                aggregate_id=request_id,
-                payload={"request_id": request_id},
+            updated_at=now,
+        ).values_list("id", flat=True)
+    )
+
+
+def expire_pending_requests(limit: int | None = None, *, batch_size: int = 1000):
+    """Expire every pending request whose ``expires_at`` has passed, ``batch_size`` at a time.
+
+    Each chunk is one set-based UPDATE plus one outbox insert in its own
+    transaction, and only the rows that chunk actually changed get a
+    ``request.expired`` event. Requests falling due during the run are left to
+    the next one. ``limit`` caps the total. Returns throughput figures.
+    """
+    started = time_module.monotonic()
+    cutoff = timezone.now()
+    expired = 0
+    batches = 0
+    while limit is None or expired < limit:
+        size = batch_size if limit is None else min(batch_size, limit - expired)
+        with transaction.atomic():
+            request_ids = _expire_due_request_chunk(cutoff=cutoff, size=size)
+            _emit_outbox_bulk(
+                [
+                    {
+                        "event_type": "request.expired",
+                        "aggregate_type": "booking_request",
+                        "aggregate_id": request_id,
+                        "payload": {"request_id": request_id},
+                    }
+                    for request_id in request_ids
+                ]
             )
-    return updated
+        if not request_ids:
+            break
+        expired += len(request_ids)
+        batches += 1
+
+    elapsed = time_module.monotonic() - started
+    metrics = {
+        "expired": expired,
+        "batches": batches,
+        "elapsed_seconds": round(elapsed, 3),
+        "per_second": round(expired / elapsed, 1) if elapsed > 0 else float(expired),
+    }
+    if expired:
+        logger.info(
+            "Expired %s booking request(s) in %s batch(es) over %.3fs (%.1f/s).",
+            expired,
+            batches,
+            elapsed,
+            metrics["per_second"],
+        )
+    return metrics
 
 
-def _create_in_app_notification(
+def _in_app_notification(
     *,
     recipient,
     notification_type: str,
@@ -973,7 +1924,7 @@ def _create_in_app_notification(
 ):
     if recipient is None:
         return None
-    return Notification.objects.create(
+    return Notification(
         recipient=recipient,
         sender=sender,
         notification_type=notification_type,
@@ -985,195 +1936,191 @@ def _create_in_app_notification(
     )
 
 
-def _dispatch_notification_for_event(event: OutboxEvent):
+# Outbox event types with in-app notifications, keyed to the row their payload references.
+NOTIFICATION_SOURCES = {
+    "request.created": "request",
+    "request.approved": "request",
+    "request.declined": "request",
+    "request.expired": "request",
+    "booking.confirmed": "booking",
+    "booking.cancelled": "booking",
+    "booking.rescheduled": "booking",
+}
+
+
+def _load_notification_sources(events):
+    """Fetch every request and booking referenced by ``events`` with one query per model."""
+    source_ids = defaultdict(set)
+    for event in events:
+        kind = NOTIFICATION_SOURCES.get(event.event_type)
+        source_id = (event.payload or {}).get(f"{kind}_id") if kind else None
+        if source_id is not None:
+            source_ids[kind].add(source_id)
+
+    querysets = {
+        "request": BookingRequest.objects.select_related("organizer", "resource__owner", "event"),
+        "booking": Booking.objects.select_related("organizer", "resource__owner", "event"),
+    }
+    sources = {}
+    for kind, ids in source_ids.items():
+        for row in querysets[kind].filter(id__in=ids):
+            sources[(kind, str(row.id))] = row
+    return sources
+
+
+def _build_event_notifications(event: OutboxEvent, sources: dict):
     payload = event.payload or {}
+    kind = NOTIFICATION_SOURCES.get(event.event_type)
+    if kind is None:
+        return []
+    source = sources.get((kind, str(payload.get(f"{kind}_id"))))
+    if source is None:
+        return []
 
     if event.event_type == "request.created":
-        booking_request = (
-            BookingRequest.objects.select_related("organizer", "resource__owner", "event")
-            .filter(id=payload.get("request_id"))
-            .first()
-        )
-        if not booking_request:
-            return
-
-        _create_in_app_notification(
-            recipient=booking_request.resource.owner,
-            sender=booking_request.organizer,
-            notification_type=Notification.NotificationType.BOOKING_REQUEST,
-            title=f"New booking request for {booking_request.resource.display_name}",
-            message=f"{booking_request.organizer.username} requested {booking_request.event.name}.",
-            link_type="booking",
-            link_id=booking_request.id,
-            data={
-                "request_id": booking_request.id,
-                "resource_id": booking_request.resource_id,
-                "event_id": booking_request.event_id,
-            },
-        )
-        return
+        booking_request = source
+        return [
+            _in_app_notification(
+                recipient=booking_request.resource.owner,
+                sender=booking_request.organizer,
+                notification_type=Notification.NotificationType.BOOKING_REQUEST,
+                title=f"New booking request for {booking_request.resource.display_name}",
+                message=f"{booking_request.organizer.username} requested {booking_request.event.name}.",
+                link_type="booking",
+                link_id=booking_request.id,
+                data={
+                    "request_id": booking_request.id,
+                    "resource_id": booking_request.resource_id,
+                    "event_id": booking_request.event_id,
+                },
+            )
+        ]
 
     if event.event_type == "request.approved":
-        booking_request = (
-            BookingRequest.objects.select_related("organizer", "resource", "event")
-            .filter(id=payload.get("request_id"))
-            .first()
-        )
-        if not booking_request:
-            return
-
-        _create_in_app_notification(
-            recipient=booking_request.organizer,
-            notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
-            title=f"Request approved for {booking_request.resource.display_name}",
-            message=f"Your booking request for {booking_request.event.name} was approved.",
-            link_type="booking",
-            link_id=payload.get("booking_id"),
-            data={
-                "request_id": booking_request.id,
-                "booking_id": payload.get("booking_id"),
-                "resource_id": booking_request.resource_id,
-                "event_id": booking_request.event_id,
-            },
-        )
-        return
+        booking_request = source
+        return [
+            _in_app_notification(
+                recipient=booking_request.organizer,
+                notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
+                title=f"Request approved for {booking_request.resource.display_name}",
+                message=f"Your booking request for {booking_request.event.name} was approved.",
+                link_type="booking",
+                link_id=payload.get("booking_id"),
+                data={
+                    "request_id": booking_request.id,
+                    "booking_id": payload.get("booking_id"),
+                    "resource_id": booking_request.resource_id,
+                    "event_id": booking_request.event_id,
+                },
+            )
+        ]
 
     if event.event_type == "request.declined":
-        booking_request = (
-            BookingRequest.objects.select_related("organizer", "resource", "event")
-            .filter(id=payload.get("request_id"))
-            .first()
-        )
-        if not booking_request:
-            return
-
-        _create_in_app_notification(
-            recipient=booking_request.organizer,
-            notification_type=Notification.NotificationType.BOOKING_REJECTED,
-            title=f"Request declined for {booking_request.resource.display_name}",
-            message=f"Your booking request for {booking_request.event.name} was declined.",
-            link_type="booking",
-            link_id=booking_request.id,
-            data={
-                "request_id": booking_request.id,
-                "resource_id": booking_request.resource_id,
-                "event_id": booking_request.event_id,
-            },
-        )
-        return
+        booking_request = source
+        return [
+            _in_app_notification(
+                recipient=booking_request.organizer,
+                notification_type=Notification.NotificationType.BOOKING_REJECTED,
+                title=f"Request declined for {booking_request.resource.display_name}",
+                message=f"Your booking request for {booking_request.event.name} was declined.",
+                link_type="booking",
+                link_id=booking_request.id,
+                data={
+                    "request_id": booking_request.id,
+                    "resource_id": booking_request.resource_id,
+                    "event_id": booking_request.event_id,
+                },
+            )
+        ]
 
     if event.event_type == "request.expired":
-        booking_request = (
-            BookingRequest.objects.select_related("organizer", "resource", "event")
-            .filter(id=payload.get("request_id"))
-            .first()
-        )
-        if not booking_request:
-            return
-
-        _create_in_app_notification(
-            recipient=booking_request.organizer,
-            notification_type=Notification.NotificationType.BOOKING_REJECTED,
-            title=f"Request expired for {booking_request.resource.display_name}",
-            message=f"Your booking request for {booking_request.event.name} expired before review.",
-            link_type="booking",
-            link_id=booking_request.id,
-            data={
-                "request_id": booking_request.id,
-                "resource_id": booking_request.resource_id,
-                "event_id": booking_request.event_id,
-            },
-        )
-        return
+        booking_request = source
+        return [
+            _in_app_notification(
+                recipient=booking_request.organizer,
+                notification_type=Notification.NotificationType.BOOKING_REJECTED,
+                title=f"Request expired for {booking_request.resource.display_name}",
+                message=f"Your booking request for {booking_request.event.name} expired before review.",
+                link_type="booking",
+                link_id=booking_request.id,
+                data={
+                    "request_id": booking_request.id,
+                    "resource_id": booking_request.resource_id,
+                    "event_id": booking_request.event_id,
+                },
+            )
+        ]
 
     if event.event_type == "booking.confirmed":
-        booking = (
-            Booking.objects.select_related("organizer", "resource__owner", "event")
-            .filter(id=payload.get("booking_id"))
-            .first()
-        )
-        if not booking:
-            return
+        booking = source
         if booking.source == Booking.Source.REQUEST:
             # Organizer notification already emitted on request.approved.
-            return
-
-        _create_in_app_notification(
-            recipient=booking.resource.owner,
-            sender=booking.organizer,
-            notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
-            title=f"New confirmed booking for {booking.resource.display_name}",
-            message=f"{booking.organizer.username} booked {booking.event.name}.",
-            link_type="booking",
-            link_id=booking.id,
-            data={
-                "booking_id": booking.id,
-                "resource_id": booking.resource_id,
-                "event_id": booking.event_id,
-            },
-        )
-        return
+            return []
+        return [
+            _in_app_notification(
+                recipient=booking.resource.owner,
+                sender=booking.organizer,
+                notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
+                title=f"New confirmed booking for {booking.resource.display_name}",
+                message=f"{booking.organizer.username} booked {booking.event.name}.",
+                link_type="booking",
+                link_id=booking.id,
+                data={
+                    "booking_id": booking.id,
+                    "resource_id": booking.resource_id,
+                    "event_id": booking.event_id,
+                },
+            )
+        ]
 
     if event.event_type == "booking.cancelled":
-        booking = (
-            Booking.objects.select_related("organizer", "resource__owner", "event", "cancelled_by")
-            .filter(id=payload.get("booking_id"))
-            .first()
-        )
-        if not booking:
-            return
-
+        booking = source
         cancelled_by_organizer = booking.cancelled_by_id == booking.organizer_id
         recipient = booking.resource.owner if cancelled_by_organizer else booking.organizer
         sender = booking.organizer if cancelled_by_organizer else booking.resource.owner
-        _create_in_app_notification(
-            recipient=recipient,
-            sender=sender,
-            notification_type=Notification.NotificationType.BOOKING_CANCELLED,
-            title=f"Booking cancelled for {booking.resource.display_name}",
-            message=f"Booking for {booking.event.name} was cancelled.",
-            link_type="booking",
-            link_id=booking.id,
-            data={
-                "booking_id": booking.id,
-                "resource_id": booking.resource_id,
-                "event_id": booking.event_id,
-                "reason": payload.get("reason", ""),
-            },
-        )
-        return
-
-    if event.event_type == "booking.rescheduled":
-        booking = (
-            Booking.objects.select_related("organizer", "resource__owner", "event")
-            .filter(id=payload.get("booking_id"))
-            .first()
-        )
-        if not booking:
-            return
+        return [
+            _in_app_notification(
+                recipient=recipient,
+                sender=sender,
+                notification_type=Notification.NotificationType.BOOKING_CANCELLED,
+                title=f"Booking cancelled for {booking.resource.display_name}",
+                message=f"Booking for {booking.event.name} was cancelled.",
+                link_type="booking",
+                link_id=booking.id,
+                data={
+                    "booking_id": booking.id,
+                    "resource_id": booking.resource_id,
+                    "event_id": booking.event_id,
+                    "reason": payload.get("reason", ""),
+                },
+            )
+        ]
 
-        message = (
-            f"Booking for {booking.event.name} moved to "
-            f"{payload.get('new_start')} - {payload.get('new_end')}."
-        )
-        _create_in_app_notification(
+    booking = source
+    message = (
+        f"Booking for {booking.event.name} moved to "
+        f"{payload.get('new_start')} - {payload.get('new_end')}."
+    )
+    data = {
+        "booking_id": booking.id,
+        "resource_id": booking.resource_id,
+        "event_id": booking.event_id,
+        "old_start": payload.get("old_start"),
+        "old_end": payload.get("old_end"),
+        "new_start": payload.get("new_start"),
+        "new_end": payload.get("new_end"),
+    }
+    return [
+        _in_app_notification(
             recipient=booking.organizer,
             notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
             title=f"Booking rescheduled for {booking.resource.display_name}",
             message=message,
             link_type="booking",
             link_id=booking.id,
-            data={
-                "booking_id": booking.id,
-                "resource_id": booking.resource_id,
-                "event_id": booking.event_id,
-                "old_start": payload.get("old_start"),
-                "old_end": payload.get("old_end"),
-                "new_start": payload.get("new_start"),
-                "new_end": payload.get("new_end"),
-            },
-        )
-        _create_in_app_notification(
+            data=data,
+        ),
+        _in_app_notification(
             recipient=booking.resource.owner,
             sender=booking.organizer,
             notification_type=Notification.NotificationType.BOOKING_CONFIRMED,
@@ -1181,16 +2128,59 @@ def _dispatch_notification_for_event(event: OutboxEvent):
             message=message,
             link_type="booking",
             link_id=booking.id,
-            data={
-                "booking_id": booking.id,
-                "resource_id": booking.resource_id,
-                "event_id": booking.event_id,
-                "old_start": payload.get("old_start"),
-                "old_end": payload.get("old_end"),
-                "new_start": payload.get("new_start"),
-                "new_end": payload.get("new_end"),
-            },
-        )
+            data=dict(data),
+        ),
+    ]
+
+
+def _push_notifications(notifications):
+    """Broadcast new notifications to their recipients' sockets in a single loop hop."""
+    if not notifications:
+        return
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        async def send_all():
+            await asyncio.gather(
+                *(
+                    channel_layer.group_send(
+                        f"notifications_{notification.recipient_id}",
+                        build_notification_event(notification),
+                    )
+                    for notification in notifications
+                )
+            )
+
+        async_to_sync(send_all)()
+    except Exception as exc:
+        # Sockets are best effort; the rows are already committed.
+        logger.warning("Failed to broadcast scheduling notifications: %s", exc)
+
+
+def _dispatch_notifications_for_events(events):
+    """Create the in-app notifications for ``events``; return ``{event_id: error or None}``.
+
+    Sources are fetched once per model, every row goes in through one ``bulk_create``
+    and the WebSocket pushes share one batch, so a pass costs the same few queries
+    however many events it claimed.
+    """
+    sources = _load_notification_sources(events)
+    results = {}
+    notifications = []
+    for event in events:
+        try:
+            built = _build_event_notifications(event, sources)
+        except Exception as exc:
+            results[event.id] = exc
+            continue
+        notifications.extend(notification for notification in built if notification is not None)
+        results[event.id] = None
+
+    created = Notification.objects.bulk_create(notifications)
+    _push_notifications(created)
+    return results
 
 
 class WebhookCircuitOpenError(RuntimeError):
@@ -1199,6 +2189,14 @@ class WebhookCircuitOpenError(RuntimeError):
         self.retry_in_seconds = max(1, retry_in_seconds)
 
 
+class WebhookBatchDeferred(Exception):
+    """Not a failure: a partial batch is held back until ``flush_at`` to collect more events."""
+
+    def __init__(self, flush_at: datetime):
+        super().__init__(f"Webhook batch held until {flush_at.isoformat()}.")
+        self.flush_at = flush_at
+
+
 def _webhook_cache_key(webhook_url: str, suffix: str):
     digest = hashlib.sha256(webhook_url.encode("utf-8")).hexdigest()[:16]
     return f"scheduling:webhook:{digest}:{suffix}"
@@ -1211,28 +2209,47 @@ def _cache_increment(key: str, timeout: int):
     return next_value
 
 
-def _record_webhook_metric(webhook_url: str, metric_name: str):
+def _record_webhook_metrics(counts):
+    """Apply ``{(url, metric_name): delta}`` in one round trip where the cache allows it."""
+    deltas = {
+        _webhook_cache_key(webhook_url, f"metric:{metric_name}"): delta
+        for (webhook_url, metric_name), delta in counts.items()
+    }
     ttl = max(60, int(getattr(settings, "SCHEDULING_WEBHOOK_METRICS_TTL_SECONDS", 86400)))
-    metric_key = _webhook_cache_key(webhook_url, f"metric:{metric_name}")
-    return _cache_increment(metric_key, ttl)
-
-
-def _webhook_circuit_state(webhook_url: str):
-    opened_until_ts = cache.get(_webhook_cache_key(webhook_url, "circuit:open_until"))
-    if not opened_until_ts:
-        return False, 0
-
-    remaining = int(opened_until_ts - timezone.now().timestamp())
-    if remaining <= 0:
-        cache.delete(_webhook_cache_key(webhook_url, "circuit:open_until"))
-        return False, 0
-    return True, remaining
-
-
-def _mark_webhook_success(webhook_url: str):
-    _record_webhook_metric(webhook_url, "success")
-    cache.delete(_webhook_cache_key(webhook_url, "circuit:failures"))
-    cache.delete(_webhook_cache_key(webhook_url, "circuit:open_until"))
+    incr_many(deltas, timeout=ttl)
+
+
+def _webhook_circuit_states(webhook_urls):
+    """Return ``{url: seconds_remaining}`` for open circuits, read with one ``get_many``."""
+    keys = {_webhook_cache_key(webhook_url, "circuit:open_until"): webhook_url for webhook_url in webhook_urls}
+    if not keys:
+        return {}
+    now_ts = timezone.now().timestamp()
+    open_circuits = {}
+    expired = []
+    for key, opened_until_ts in cache.get_many(list(keys)).items():
+        if not opened_until_ts:
+            continue
+        remaining = int(opened_until_ts - now_ts)
+        if remaining <= 0:
+            expired.append(key)
+        else:
+            open_circuits[keys[key]] = remaining
+    if expired:
+        cache.delete_many(expired)
+    return open_circuits
+
+
+def _reset_webhook_circuits(webhook_urls):
+    if not webhook_urls:
+        return
+    cache.delete_many(
+        [
+            _webhook_cache_key(webhook_url, suffix)
+            for webhook_url in webhook_urls
+            for suffix in ("circuit:failures", "circuit:open_until")
+        ]
+    )
 
 
 def _mark_webhook_failure(
@@ -1240,8 +2257,9 @@ def _mark_webhook_failure(
     *,
     failure_threshold: int | None = None,
     open_seconds: int | None = None,
+    metrics: Counter,
 ):
-    _record_webhook_metric(webhook_url, "failed")
+    metrics[(webhook_url, "failed")] += 1
 
     threshold = max(
         1,
@@ -1270,34 +2288,96 @@ def _mark_webhook_failure(
     return open_seconds
 
 
-def _build_webhook_headers(*, event: OutboxEvent, request_body: bytes, secret: str = ""):
+def _sign_webhook_headers(headers: dict, *, request_body: bytes, secret: str = ""):
     timestamp = str(int(timezone.now().timestamp()))
-    idempotency_key = f"scheduling-outbox-{event.id}"
+    headers["X-Scheduling-Timestamp"] = timestamp
+    if secret:
+        signed_bytes = timestamp.encode("utf-8") + b"." + request_body
+        signature = hmac.new(secret.encode("utf-8"), signed_bytes, hashlib.sha256).hexdigest()
+        headers["X-Scheduling-Signature"] = f"v1={signature}"
+    return headers
+
+
+def _build_webhook_headers(*, event: OutboxEvent, request_body: bytes, secret: str = ""):
     headers = {
         "Content-Type": "application/json",
         "X-Scheduling-Event": event.event_type,
         "X-Scheduling-Delivery-Id": str(event.id),
-        "X-Scheduling-Timestamp": timestamp,
-        "Idempotency-Key": idempotency_key,
+        "Idempotency-Key": f"scheduling-outbox-{event.id}",
     }
+    return _sign_webhook_headers(headers, request_body=request_body, secret=secret)
 
-    if secret:
-        signed_bytes = timestamp.encode("utf-8") + b"." + request_body
-        signature = hmac.new(secret.encode("utf-8"), signed_bytes, hashlib.sha256).hexdigest()
-        headers["X-Scheduling-Signature"] = f"v1={signature}"
-    return headers
+
+def _build_webhook_batch_headers(*, events, request_body: bytes, secret: str = ""):
+    # The key depends only on which events are in the batch, so a retried batch
+    # deduplicates while each element keeps its own outbox_id.
+    event_ids = ",".join(str(event.id) for event in events)
+    headers = {
+        "Content-Type": "application/json",
+        "X-Scheduling-Event": "batch",
+        "X-Scheduling-Batch-Size": str(len(events)),
+        "X-Scheduling-Delivery-Ids": event_ids,
+        "Idempotency-Key": f"scheduling-outbox-batch-{hashlib.sha256(event_ids.encode('utf-8')).hexdigest()[:32]}",
+    }
+    return _sign_webhook_headers(headers, request_body=request_body, secret=secret)
+
+
+def _clamp_batch_size(value):
+    return min(WebhookTarget.MAX_BATCH_SIZE, max(1, int(value or 1)))
+
+
+WEBHOOK_TARGETS_VERSION_KEY = "scheduling:webhook:targets:version"
+_webhook_targets_lock = threading.Lock()
+_webhook_targets_cache = {"version": None, "targets": None}
+
+
+def bump_webhook_targets_version():
+    # Seeded from the clock so an evicted key never returns at a version a process already holds.
+    try:
+        cache.incr(WEBHOOK_TARGETS_VERSION_KEY)
+    except ValueError:
+        cache.set(WEBHOOK_TARGETS_VERSION_KEY, time_module.time_ns(), timeout=None)
+
+
+def bump_webhook_targets_version_on_commit():
+    transaction.on_commit(bump_webhook_targets_version)
+
+
+def clear_webhook_targets_cache():
+    with _webhook_targets_lock:
+        _webhook_targets_cache.update(version=None, targets=None)
 
 
 def _webhook_targets():
+    """Normalized webhook targets, reloaded only when the shared version key moves."""
+    version = cache.get(WEBHOOK_TARGETS_VERSION_KEY)
+    if version is None:
+        cache.add(WEBHOOK_TARGETS_VERSION_KEY, time_module.time_ns(), timeout=None)
+        version = cache.get(WEBHOOK_TARGETS_VERSION_KEY)
+    with _webhook_targets_lock:
+        if _webhook_targets_cache["targets"] is not None and _webhook_targets_cache["version"] == version:
+            return _webhook_targets_cache["targets"]
+
+    targets, complete = _load_webhook_targets()
+    if complete:
+        with _webhook_targets_lock:
+            _webhook_targets_cache.update(version=version, targets=targets)
+    return targets
+
+
+def _load_webhook_targets():
     default_timeout = max(1, int(getattr(settings, "SCHEDULING_WEBHOOK_TIMEOUT_SECONDS", 5)))
     default_secret = str(getattr(settings, "SCHEDULING_WEBHOOK_SECRET", "") or "")
     default_threshold = max(1, int(getattr(settings, "SCHEDULING_WEBHOOK_CIRCUIT_FAILURE_THRESHOLD", 5)))
     default_open_seconds = max(5, int(getattr(settings, "SCHEDULING_WEBHOOK_CIRCUIT_OPEN_SECONDS", 120)))
 
+    complete = True
     try:
         db_targets = list(WebhookTarget.objects.filter(is_active=True).order_by("id"))
     except Exception:
+        # Not cached: the table may simply not be migrated yet.
         db_targets = []
+        complete = False
     if db_targets:
         return [
             {
@@ -1308,10 +2388,12 @@ def _webhook_targets():
                 "timeout": max(1, int(target.timeout_seconds or default_timeout)),
                 "failure_threshold": max(1, int(target.failure_threshold or default_threshold)),
                 "open_seconds": max(5, int(target.open_seconds or default_open_seconds)),
+                "max_batch_size": _clamp_batch_size(target.max_batch_size),
+                "max_linger_seconds": max(0, int(target.max_linger_seconds or 0)),
                 "source": "database",
             }
             for target in db_targets
-        ]
+        ], complete
 
     explicit_targets = getattr(settings, "SCHEDULING_WEBHOOK_TARGETS", None)
     if explicit_targets:
@@ -1325,6 +2407,8 @@ def _webhook_targets():
                         "timeout": default_timeout,
                         "failure_threshold": default_threshold,
                         "open_seconds": default_open_seconds,
+                        "max_batch_size": 1,
+                        "max_linger_seconds": 0,
                         "source": "settings",
                     }
                 )
@@ -1341,10 +2425,12 @@ def _webhook_targets():
                             int(target.get("failure_threshold", default_threshold)),
                         ),
                         "open_seconds": max(5, int(target.get("open_seconds", default_open_seconds))),
+                        "max_batch_size": _clamp_batch_size(target.get("max_batch_size", 1)),
+                        "max_linger_seconds": max(0, int(target.get("max_linger_seconds", 0))),
                         "source": "settings",
                     }
                 )
-        return normalized
+        return normalized, complete
 
     return [
         {
@@ -1353,88 +2439,157 @@ def _webhook_targets():
             "timeout": default_timeout,
             "failure_threshold": default_threshold,
             "open_seconds": default_open_seconds,
+            "max_batch_size": 1,
+            "max_linger_seconds": 0,
             "source": "settings",
         }
         for webhook_url in list(getattr(settings, "SCHEDULING_WEBHOOK_URLS", []))
-    ]
+    ], complete
+
+
+def _webhook_event_document(event: OutboxEvent):
+    return {
+        "event_type": event.event_type,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat(),
+        "outbox_id": event.id,
+    }
+
+
+def _webhook_request_body(event: OutboxEvent):
+    return json.dumps(_webhook_event_document(event), default=str).encode("utf-8")
+
+
+def _webhook_delivery_error(target: dict, result, metrics: Counter):
+    """Record the outcome of one delivery; return the error to surface, or None.
 
+    Metric increments go into ``metrics`` for the caller to flush; a success also
+    leaves circuit resets to the caller.
+    """
+    webhook_url = target["url"]
+    if isinstance(result, int) and result < 300:
+        metrics[(webhook_url, "success")] += 1
+        return None
+    if isinstance(result, int):
+        result = RuntimeError(f"Webhook target {webhook_url} returned {result}.")
+
+    opened_for = _mark_webhook_failure(
+        webhook_url,
+        failure_threshold=target.get("failure_threshold"),
+        open_seconds=target.get("open_seconds"),
+        metrics=metrics,
+    )
+    if isinstance(result, urllib_error.HTTPError):
+        if opened_for:
+            error = RuntimeError(
+                f"Webhook target {webhook_url} failed with HTTP {result.code}; circuit opened for {opened_for}s."
+            )
+        else:
+            error = RuntimeError(f"Webhook target {webhook_url} returned HTTP {result.code}.")
+    elif isinstance(result, urllib_error.URLError):
+        if opened_for:
+            error = RuntimeError(
+                f"Webhook target {webhook_url} failed ({result.reason}); circuit opened for {opened_for}s."
+            )
+        else:
+            error = RuntimeError(f"Webhook target {webhook_url} failed: {result.reason}.")
+    elif opened_for:
+        error = RuntimeError(f"Webhook target {webhook_url} failed ({result}); circuit opened for {opened_for}s.")
+    else:
+        return result
+    error.__cause__ = result
+    return error
 
-def _dispatch_webhooks_for_event(event: OutboxEvent):
+
+def _dispatch_webhooks_for_events(events, *, skip=frozenset()):
+    """Deliver ``events`` to every webhook target concurrently.
+
+    ``skip`` holds ``(event_id, url)`` pairs that must not be sent this pass. Returns
+    ``{(event_id, url): error or None}`` for every pair that was due; an open circuit
+    only holds back its own target. Targets with ``max_batch_size`` above one get
+    consecutive events as one JSON array per request.
+    """
     targets = _webhook_targets()
-    if not targets:
-        return
+    if not targets or not events:
+        return {}
 
-    request_body = json.dumps(
-        {
-            "event_type": event.event_type,
-            "aggregate_type": event.aggregate_type,
-            "aggregate_id": event.aggregate_id,
-            "payload": event.payload,
-            "created_at": event.created_at.isoformat(),
-            "outbox_id": event.id,
-        },
-        default=str,
-    ).encode("utf-8")
+    max_concurrency = max(1, int(getattr(settings, "SCHEDULING_WEBHOOK_MAX_CONCURRENCY_PER_TARGET", 8)))
+    open_circuits = _webhook_circuit_states([target["url"] for target in targets])
 
+    now = timezone.now()
+    metrics = Counter()
+    results = {}
+    deliveries = []
+    request_bodies = {}
     for target in targets:
         webhook_url = target["url"]
-        _record_webhook_metric(webhook_url, "attempted")
-
-        is_open, remaining = _webhook_circuit_state(webhook_url)
-        if is_open:
-            _record_webhook_metric(webhook_url, "skipped_circuit")
-            raise WebhookCircuitOpenError(webhook_url, remaining)
-
-        req = urllib_request.Request(
-            url=webhook_url,
-            data=request_body,
-            method="POST",
-            headers=_build_webhook_headers(
-                event=event,
-                request_body=request_body,
-                secret=target["secret"],
-            ),
+        due_events = [event for event in events if (event.id, webhook_url) not in skip]
+        if not due_events:
+            continue
+        if webhook_url in open_circuits:
+            metrics[(webhook_url, "attempted")] += len(due_events)
+            metrics[(webhook_url, "skipped_circuit")] += len(due_events)
+            for event in due_events:
+                results[(event.id, webhook_url)] = WebhookCircuitOpenError(webhook_url, open_circuits[webhook_url])
+            continue
+
+        batch_size = target.get("max_batch_size", 1)
+        if batch_size <= 1:
+            metrics[(webhook_url, "attempted")] += len(due_events)
+            for event in due_events:
+                if event.id not in request_bodies:
+                    request_bodies[event.id] = _webhook_request_body(event)
+                req = urllib_request.Request(
+                    url=webhook_url,
+                    data=request_bodies[event.id],
+                    method="POST",
+                    headers=_build_webhook_headers(
+                        event=event,
+                        request_body=request_bodies[event.id],
+                        secret=target["secret"],
+                    ),
+                )
+                deliveries.append((target, [event], req))
+            continue
+
+        chunks = [due_events[index : index + batch_size] for index in range(0, len(due_events), batch_size)]
+        # A short trailing batch waits until its oldest event has lingered long enough.
+        flush_at = min(event.created_at for event in chunks[-1]) + timedelta(
+            seconds=target.get("max_linger_seconds", 0)
         )
-        try:
-            with urllib_request.urlopen(req, timeout=target["timeout"]) as response:
-                status_code = int(getattr(response, "status", 200))
-                if status_code >= 400:
-                    raise RuntimeError(f"Webhook target {webhook_url} returned {status_code}.")
-        except urllib_error.HTTPError as exc:
-            opened_for = _mark_webhook_failure(
-                webhook_url,
-                failure_threshold=target.get("failure_threshold"),
-                open_seconds=target.get("open_seconds"),
-            )
-            if opened_for:
-                raise RuntimeError(
-                    f"Webhook target {webhook_url} failed with HTTP {exc.code}; circuit opened for {opened_for}s."
-                ) from exc
-            raise RuntimeError(f"Webhook target {webhook_url} returned HTTP {exc.code}.") from exc
-        except urllib_error.URLError as exc:
-            opened_for = _mark_webhook_failure(
-                webhook_url,
-                failure_threshold=target.get("failure_threshold"),
-                open_seconds=target.get("open_seconds"),
+        if len(chunks[-1]) < batch_size and flush_at > now:
+            for event in chunks.pop():
+                results[(event.id, webhook_url)] = WebhookBatchDeferred(flush_at)
+        for chunk in chunks:
+            request_body = json.dumps([_webhook_event_document(event) for event in chunk], default=str).encode("utf-8")
+            metrics[(webhook_url, "attempted")] += len(chunk)
+            req = urllib_request.Request(
+                url=webhook_url,
+                data=request_body,
+                method="POST",
+                headers=_build_webhook_batch_headers(
+                    events=chunk,
+                    request_body=request_body,
+                    secret=target["secret"],
+                ),
             )
-            if opened_for:
-                raise RuntimeError(
-                    f"Webhook target {webhook_url} failed ({exc.reason}); circuit opened for {opened_for}s."
-                ) from exc
-            raise RuntimeError(f"Webhook target {webhook_url} failed: {exc.reason}.") from exc
-        except Exception as exc:
-            opened_for = _mark_webhook_failure(
-                webhook_url,
-                failure_threshold=target.get("failure_threshold"),
-                open_seconds=target.get("open_seconds"),
-            )
-            if opened_for:
-                raise RuntimeError(
-                    f"Webhook target {webhook_url} failed ({exc}); circuit opened for {opened_for}s."
-                ) from exc
-            raise
+            deliveries.append((target, chunk, req))
 
-        _mark_webhook_success(webhook_url)
+    responses = get_webhook_engine().deliver(
+        [(req, target["timeout"], max_concurrency) for target, _, req in deliveries]
+    )
+    recovered = {}
+    for (target, chunk, _), response in zip(deliveries, responses):
+        error = _webhook_delivery_error(target, response, metrics)
+        recovered[target["url"]] = error is None
+        for event in chunk:
+            results[(event.id, target["url"])] = error
+    # A target whose last response in the pass succeeded starts its circuit afresh.
+    _reset_webhook_circuits([webhook_url for webhook_url, succeeded in recovered.items() if succeeded])
+    _record_webhook_metrics(metrics)
+    return results
 
 
 def _compute_retry_delay_seconds(attempt_number: int):
@@ -1444,48 +2599,32 @@ def _compute_retry_delay_seconds(attempt_number: int):
     return min(max_delay, exponential)
 
 
-def _mark_outbox_failure(
-    event: OutboxEvent,
-    error_message: str,
+def _apply_delivery_failure(
+    delivery: OutboxDelivery,
+    error: Exception,
     max_attempts: int,
     *,
-    retry_in_seconds: int | None = None,
-    count_attempt: bool = True,
+    now: datetime,
 ):
-    now = timezone.now()
-    attempt_number = event.attempts + (1 if count_attempt else 0)
-
-    if count_attempt and attempt_number >= max_attempts:
-        OutboxDeadLetter.objects.create(
-            outbox_event=event,
-            event_type=event.event_type,
-            aggregate_type=event.aggregate_type,
-            aggregate_id=event.aggregate_id,
-            payload=event.payload,
-            attempts=attempt_number,
-            error_message=error_message,
-            metadata={"last_status": event.status},
-        )
-        OutboxEvent.objects.filter(id=event.id).update(
-            status=OutboxEvent.Status.DEAD_LETTER,
-            attempts=attempt_number,
-            last_error=error_message,
-            next_attempt_at=now,
-            updated_at=now,
-        )
-        return "dead_lettered"
-
-    retry_delay = retry_in_seconds
-    if retry_delay is None:
-        retry_delay = _compute_retry_delay_seconds(max(1, event.attempts + 1))
-    OutboxEvent.objects.filter(id=event.id).update(
-        status=OutboxEvent.Status.FAILED,
-        attempts=attempt_number,
-        last_error=error_message,
-        next_attempt_at=now + timedelta(seconds=retry_delay),
-        updated_at=now,
-    )
-    return "failed"
+    """Update ``delivery`` in memory for a failed attempt.
+
+    Failures back off exponentially until ``max_attempts``, then dead-letter. An open
+    circuit defers the delivery for the circuit's remaining time without using an attempt.
+    """
+    count_attempt = not isinstance(error, WebhookCircuitOpenError)
+    retry_delay = error.retry_in_seconds if not count_attempt else _compute_retry_delay_seconds(delivery.attempts + 1)
+    delivery.attempts += 1 if count_attempt else 0
+    delivery.last_error = str(error)
+    delivery.updated_at = now
+    if count_attempt and delivery.attempts >= max_attempts:
+        delivery.status = OutboxDelivery.Status.DEAD_LETTER
+        delivery.next_attempt_at = now
+    else:
+        delivery.status = OutboxDelivery.Status.FAILED
+        delivery.next_attempt_at = now + timedelta(seconds=retry_delay)
+
+
+OUTBOX_OUTCOME_FIELDS = ["status", "attempts", "last_error", "next_attempt_at", "updated_at"]
 
 
 def replay_dead_letter(*, dead_letter: OutboxDeadLetter, actor):
@@ -1499,6 +2638,8 @@ def replay_dead_letter(*, dead_letter: OutboxDeadLetter, actor):
         next_attempt_at=timezone.now(),
         last_error="",
     )
+    signal_outbox_wakeup()
+    adjust_outbox_counts_on_commit({OutboxEvent.Status.PENDING: 1})
 
     metadata = dict(dead_letter.metadata or {})
     metadata["replay_count"] = int(metadata.get("replay_count", 0)) + 1
@@ -1519,32 +2660,42 @@ def replay_dead_letter(*, dead_letter: OutboxDeadLetter, actor):
 
 
 def get_webhook_metrics_snapshot():
+    targets = _webhook_targets()
+    metric_names = ("attempted", "success", "failed", "skipped_circuit")
+    metric_values = cache.get_many(
+        [
+            _webhook_cache_key(target["url"], f"metric:{metric_name}")
+            for target in targets
+            for metric_name in metric_names
+        ]
+    )
+    open_circuits = _webhook_circuit_states([target["url"] for target in targets])
+
     snapshot = []
-    for target in _webhook_targets():
+    for target in targets:
         webhook_url = target["url"]
-        circuit_open, circuit_remaining_seconds = _webhook_circuit_state(webhook_url)
         snapshot.append(
             {
                 "url": webhook_url,
                 "description": target.get("description", ""),
                 "source": target.get("source", "settings"),
-                "circuit_open": circuit_open,
-                "circuit_remaining_seconds": circuit_remaining_seconds,
+                "circuit_open": webhook_url in open_circuits,
+                "circuit_remaining_seconds": open_circuits.get(webhook_url, 0),
                 "timeout_seconds": int(target.get("timeout", 5)),
                 "failure_threshold": int(target.get("failure_threshold", 5)),
                 "open_seconds": int(target.get("open_seconds", 120)),
                 "metrics": {
-                    "attempted": int(cache.get(_webhook_cache_key(webhook_url, "metric:attempted")) or 0),
-                    "success": int(cache.get(_webhook_cache_key(webhook_url, "metric:success")) or 0),
-                    "failed": int(cache.get(_webhook_cache_key(webhook_url, "metric:failed")) or 0),
-                    "skipped_circuit": int(cache.get(_webhook_cache_key(webhook_url, "metric:skipped_circuit")) or 0),
+                    metric_name: int(
+                        metric_values.get(_webhook_cache_key(webhook_url, f"metric:{metric_name}")) or 0
+                    )
+                    for metric_name in metric_names
                 },
             }
         )
     return snapshot
 
 
-def get_constraint_monitor_status():
+def get_constraint_monitor_status(counters: dict | None = None):
     vendor = connection.vendor
     constraint_present = None
     if vendor == "postgresql":
@@ -1561,38 +2712,25 @@ def get_constraint_monitor_status():
             row = cursor.fetchone()
             constraint_present = bool(row[0]) if row else False
 
-    last_24h = timezone.now() - timedelta(hours=24)
-    by_source = (
-        BookingConflictIncident.objects.filter(created_at__gte=last_24h)
-        .values("conflict_source")
-        .annotate(count=Count("id"))
-    )
-    by_operation = (
-        BookingConflictIncident.objects.filter(created_at__gte=last_24h)
-        .values("operation")
-        .annotate(count=Count("id"))
-    )
-
+    counters = counters or get_ops_counters()
     return {
         "database_vendor": vendor,
         "constraint_present": constraint_present,
-        "last_24h_conflicts_total": BookingConflictIncident.objects.filter(created_at__gte=last_24h).count(),
-        "last_24h_by_source": {row["conflict_source"]: row["count"] for row in by_source},
-        "last_24h_by_operation": {row["operation"]: row["count"] for row in by_operation},
+        "last_24h_conflicts_total": counters["last_24h_conflicts_total"],
+        "last_24h_by_source": counters["last_24h_by_source"],
+        "last_24h_by_operation": counters["last_24h_by_operation"],
     }
 
 
 def get_scheduling_ops_summary():
-    outbox_counts = (
-        OutboxEvent.objects.values("status")
-        .annotate(count=Count("id"))
-        .order_by("status")
-    )
+    # Counters are maintained on every status transition and incident insert, so
+    # loading the dashboard costs no aggregates over the outbox or incident tables.
+    counters = get_ops_counters()
     return {
-        "outbox_counts": {row["status"]: row["count"] for row in outbox_counts},
-        "dead_letter_count": OutboxDeadLetter.objects.count(),
+        "outbox_counts": counters["outbox_counts"],
+        "dead_letter_count": counters["dead_letter_count"],
         "webhooks": get_webhook_metrics_snapshot(),
-        "constraints": get_constraint_monitor_status(),
+        "constraints": get_constraint_monitor_status(counters),
         "recent_conflict_incidents": list(
             BookingConflictIncident.objects.order_by("-created_at").values(
                 "id",
@@ -1610,71 +2748,251 @@ def get_scheduling_ops_summary():
     }
 
 
+def _claim_outbox_events(limit: int):
+    """Lock and mark up to ``limit`` due events as processing, returning them.
+
+    On PostgreSQL this is a single UPDATE over a ``FOR UPDATE SKIP LOCKED`` subquery,
+    so concurrent dispatchers drain disjoint rows. Elsewhere the candidates are
+    stamped with a claim-specific ``updated_at`` and re-read by that stamp.
+    """
+    claimable = [OutboxEvent.Status.PENDING, OutboxEvent.Status.FAILED]
+    now = timezone.now()
+
+    if connection.vendor == "postgresql":
+        table = connection.ops.quote_name(OutboxEvent._meta.db_table)
+        # The joined subquery hands back each row's pre-claim status for the ops counters.
+        events = list(
+            OutboxEvent.objects.raw(
+                f"""
+                UPDATE {table} AS outbox
+                SET status = %s, updated_at = %s
+                FROM (
+                    SELECT id, status AS previous_status
+                    FROM {table}
+                    WHERE status IN (%s, %s) AND next_attempt_at <= %s
+                    ORDER BY created_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ) AS claimed
+                WHERE outbox.id = claimed.id
+                RETURNING outbox.*, claimed.previous_status
+                """,
+                [OutboxEvent.Status.PROCESSING, now, *claimable, now, limit],
+            )
+        )
+        _count_claimed(event.previous_status for event in events)
+        return sorted(events, key=lambda event: (event.created_at, event.id))
+
+    candidates = dict(
+        OutboxEvent.objects.filter(status__in=claimable, next_attempt_at__lte=now)
+        .order_by("created_at")
+        .values_list("id", "status")[:limit]
+    )
+    if not candidates:
+        return []
+    # The status filter makes the claim conditional, so rows another worker took
+    # between the read and the write are skipped rather than claimed twice.
+    OutboxEvent.objects.filter(id__in=list(candidates), status__in=claimable).update(
+        status=OutboxEvent.Status.PROCESSING,
+        updated_at=now,
+    )
+    events = list(
+        OutboxEvent.objects.filter(
+            id__in=list(candidates),
+            status=OutboxEvent.Status.PROCESSING,
+            updated_at=now,
+        ).order_by("created_at", "id")
+    )
+    _count_claimed(candidates[event.id] for event in events)
+    return events
+
+
+def _count_claimed(previous_statuses):
+    deltas = Counter(previous_statuses)
+    deltas = {status: -count for status, count in deltas.items()}
+    deltas[OutboxEvent.Status.PROCESSING] = -sum(deltas.values())
+    adjust_outbox_counts_on_commit(deltas)
+
+
 def dispatch_outbox_events(
     limit: int = 100,
     *,
     consume_notifications: bool = True,
     consume_webhooks: bool = True,
+    consume_calendar: bool = True,
 ):
-    if not consume_notifications and not consume_webhooks:
-        return {"processed": 0, "failed": 0, "dead_lettered": 0}
+    if not consume_notifications and not consume_webhooks and not consume_calendar:
+        return {"claimed": 0, "processed": 0, "failed": 0, "dead_lettered": 0}
 
-    now = timezone.now()
     max_attempts = max(1, int(getattr(settings, "SCHEDULING_OUTBOX_MAX_ATTEMPTS", 5)))
+    events = _claim_outbox_events(limit)
 
-    event_ids = list(
-        OutboxEvent.objects.filter(
-            status__in=[OutboxEvent.Status.PENDING, OutboxEvent.Status.FAILED],
-            next_attempt_at__lte=now,
-        )
-        .order_by("created_at")
-        .values_list("id", flat=True)[:limit]
-    )
+    if not events:
+        return {"claimed": 0, "processed": 0, "failed": 0, "dead_lettered": 0}
 
-    processed = 0
+    now = timezone.now()
+    events_by_id = {event.id: event for event in events}
+    # One row per (event, consumer); only consumers that are due get called again.
+    deliveries = defaultdict(dict)
+    for delivery in OutboxDelivery.objects.filter(outbox_event_id__in=list(events_by_id)):
+        deliveries[delivery.outbox_event_id][delivery.consumer] = delivery
+    touched = []
+
+    def is_due(event, consumer):
+        delivery = deliveries[event.id].get(consumer)
+        return delivery is None or delivery.is_due(now)
+
+    def record(event, consumer, error=None):
+        delivery = deliveries[event.id].get(consumer)
+        if delivery is None:
+            delivery = deliveries[event.id][consumer] = OutboxDelivery(
+                outbox_event=event,
+                consumer=consumer,
+                next_attempt_at=now,
+            )
+        if error is None:
+            delivery.status = OutboxDelivery.Status.SENT
+            delivery.attempts += 1
+            delivery.last_error = ""
+            delivery.updated_at = now
+        elif isinstance(error, WebhookBatchDeferred):
+            delivery.status = OutboxDelivery.Status.PENDING
+            delivery.next_attempt_at = error.flush_at
+            delivery.updated_at = now
+        else:
+            _apply_delivery_failure(delivery, error, max_attempts, now=now)
+        touched.append(delivery)
+
+    if consume_notifications:
+        notification_events = [event for event in events if is_due(event, OutboxDelivery.NOTIFICATIONS_CONSUMER)]
+        try:
+            results = _dispatch_notifications_for_events(notification_events) if notification_events else {}
+        except Exception as exc:
+            for event in notification_events:
+                record(event, OutboxDelivery.NOTIFICATIONS_CONSUMER, exc)
+        else:
+            for event in notification_events:
+                record(event, OutboxDelivery.NOTIFICATIONS_CONSUMER, results.get(event.id))
+
+    if consume_calendar:
+        calendar_events = [event for event in events if is_due(event, OutboxDelivery.CALENDAR_CONSUMER)]
+        try:
+            if calendar_events:
+                project_calendar_for_outbox_events(calendar_events)
+        except Exception as exc:
+            for event in calendar_events:
+                record(event, OutboxDelivery.CALENDAR_CONSUMER, exc)
+        else:
+            for event in calendar_events:
+                record(event, OutboxDelivery.CALENDAR_CONSUMER)
+
+    if consume_webhooks:
+        webhook_events = [event for event in events if is_due(event, OutboxDelivery.WEBHOOKS_CONSUMER)]
+        webhook_prefix = OutboxDelivery.webhook_consumer("")
+        skip = {
+            (event_id, consumer[len(webhook_prefix) :])
+            for event_id, rows in deliveries.items()
+            for consumer, delivery in rows.items()
+            if consumer.startswith(webhook_prefix) and not delivery.is_due(now)
+        }
+        try:
+            # Webhooks for the whole batch go out concurrently.
+            results = _dispatch_webhooks_for_events(webhook_events, skip=skip) if webhook_events else {}
+        except Exception as exc:
+            for event in webhook_events:
+                record(event, OutboxDelivery.WEBHOOKS_CONSUMER, exc)
+        else:
+            for event in webhook_events:
+                if OutboxDelivery.WEBHOOKS_CONSUMER in deliveries[event.id]:
+                    record(event, OutboxDelivery.WEBHOOKS_CONSUMER)
+            for (event_id, webhook_url), error in results.items():
+                record(events_by_id[event_id], OutboxDelivery.webhook_consumer(webhook_url), error)
+
+    sent_ids = []
+    failed_events = []
+    dead_letters = []
     failed = 0
     dead_lettered = 0
 
-    for event_id in event_ids:
-        # Claim event for processing (prevents duplicate processing by concurrent workers).
-        claimed = OutboxEvent.objects.filter(
-            id=event_id,
-            status__in=[OutboxEvent.Status.PENDING, OutboxEvent.Status.FAILED],
-            next_attempt_at__lte=timezone.now(),
-        ).update(status=OutboxEvent.Status.PROCESSING, updated_at=timezone.now())
-        if not claimed:
+    def in_scope(consumer):
+        if consumer == OutboxDelivery.NOTIFICATIONS_CONSUMER:
+            return consume_notifications
+        if consumer == OutboxDelivery.CALENDAR_CONSUMER:
+            return consume_calendar
+        return consume_webhooks
+
+    for event in events:
+        rows = [delivery for consumer, delivery in deliveries[event.id].items() if in_scope(consumer)]
+        dead = [delivery for delivery in rows if delivery.status == OutboxDelivery.Status.DEAD_LETTER]
+        # Rows that were due but not retried belong to targets that no longer exist.
+        waiting = [
+            delivery
+            for delivery in rows
+            if delivery.status in {OutboxDelivery.Status.PENDING, OutboxDelivery.Status.FAILED}
+            and delivery.next_attempt_at > now
+        ]
+        if not dead and not waiting:
+            sent_ids.append(event.id)
             continue
 
-        event = OutboxEvent.objects.get(id=event_id)
-        try:
-            if consume_notifications:
-                _dispatch_notification_for_event(event)
-            if consume_webhooks:
-                _dispatch_webhooks_for_event(event)
-        except WebhookCircuitOpenError as exc:
-            _mark_outbox_failure(
-                event,
-                str(exc),
-                max_attempts=max_attempts,
-                retry_in_seconds=exc.retry_in_seconds,
-                count_attempt=False,
+        event.attempts = max([event.attempts, *(delivery.attempts for delivery in rows)])
+        event.updated_at = now
+        failed_events.append(event)
+        if dead:
+            dead_letters.append(
+                OutboxDeadLetter(
+                    outbox_event=event,
+                    event_type=event.event_type,
+                    aggregate_type=event.aggregate_type,
+                    aggregate_id=event.aggregate_id,
+                    payload=event.payload,
+                    attempts=event.attempts,
+                    error_message=dead[0].last_error,
+                    metadata={"last_status": event.status, "consumers": [delivery.consumer for delivery in dead]},
+                )
             )
-            failed += 1
-            continue
-        except Exception as exc:
-            outcome = _mark_outbox_failure(event, str(exc), max_attempts=max_attempts)
-            if outcome == "dead_lettered":
-                dead_lettered += 1
-            else:
-                failed += 1
+            event.status = OutboxEvent.Status.DEAD_LETTER
+            event.last_error = dead[0].last_error
+            event.next_attempt_at = now
+            dead_lettered += 1
             continue
 
-        OutboxEvent.objects.filter(id=event.id).update(
+        event.next_attempt_at = min(delivery.next_attempt_at for delivery in waiting)
+        retrying = [delivery for delivery in waiting if delivery.status == OutboxDelivery.Status.FAILED]
+        if retrying:
+            event.status = OutboxEvent.Status.FAILED
+            event.last_error = retrying[0].last_error
+            failed += 1
+        else:
+            # Only held back by batch linger; nothing has failed.
+            event.status = OutboxEvent.Status.PENDING
+
+    # Outcomes are written once per batch instead of once per event.
+    if sent_ids:
+        OutboxEvent.objects.filter(id__in=sent_ids).update(
             status=OutboxEvent.Status.SENT,
-            attempts=event.attempts + 1,
+            attempts=F("attempts") + 1,
             last_error="",
             updated_at=timezone.now(),
         )
-        processed += 1
-
-    return {"processed": processed, "failed": failed, "dead_lettered": dead_lettered}
+    if dead_letters:
+        OutboxDeadLetter.objects.bulk_create(dead_letters)
+    if failed_events:
+        OutboxEvent.objects.bulk_update(failed_events, OUTBOX_OUTCOME_FIELDS)
+    new_deliveries = [delivery for delivery in touched if delivery.pk is None]
+    existing_deliveries = [delivery for delivery in touched if delivery.pk is not None]
+    if new_deliveries:
+        OutboxDelivery.objects.bulk_create(new_deliveries)
+    if existing_deliveries:
+        OutboxDelivery.objects.bulk_update(existing_deliveries, OUTBOX_OUTCOME_FIELDS)
+
+    outcome_counts = Counter(event.status for event in failed_events)
+    outcome_counts[OutboxEvent.Status.SENT] += len(sent_ids)
+    outcome_counts[OutboxEvent.Status.PROCESSING] -= len(events)
+    adjust_outbox_counts_on_commit(outcome_counts, dead_letters=len(dead_letters))
+    return {
+        "claimed": len(events),
+        "processed": len(sent_ids),
+        "failed": failed,
+        "dead_lettered": dead_lettered,
+    }
@@ -0,0 +1,72 @@
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    AvailabilityException,
+    AvailabilityRule,
+    AvailabilitySlot,
+    Booking,
+    MarketplaceResource,
+    ResourcePolicy,
+)
+from .calendar_projection import project_calendar_for_resources
+from .capacity import invalidate_capacity_calendars_on_commit
+from .intervals import invalidate_booking_index
+from .search_cache import bump_catalog_version, bump_resource_versions_on_commit
+from .services import clear_webhook_targets_cache
+
+
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=AvailabilitySlot)
+@receiver(post_delete, sender=AvailabilitySlot)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=ResourcePolicy)
+@receiver(post_delete, sender=ResourcePolicy)
+def invalidate_resource_search(sender, instance, **kwargs):
+    bump_resource_versions_on_commit([instance.resource_id])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_booking_index(sender, instance, **kwargs):
+    # Covers booking writes that bypass the service layer (admin edits, fixtures).
+    resource_id = instance.resource_id
+    transaction.on_commit(lambda: invalidate_booking_index(resource_id))
+
+
+@receiver(post_save, sender=AvailabilitySlot)
+@receiver(post_delete, sender=AvailabilitySlot)
+def invalidate_capacity_calendar(sender, instance, **kwargs):
+    invalidate_capacity_calendars_on_commit([instance.resource_id])
+
+
+@receiver(post_save, sender=MarketplaceResource)
+@receiver(post_delete, sender=MarketplaceResource)
+def invalidate_search_catalog(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+    bump_resource_versions_on_commit([instance.id])
+
+
+@receiver(post_save, sender=MarketplaceResource)
+def reproject_resource_calendar(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_calendar_snapshot", None)
+    instance._calendar_snapshot = instance.calendar_fields()
+    if created or raw or previous is None or previous == instance._calendar_snapshot:
+        return
+    # Internal to the calendar read model, so it runs on commit rather than through the
+    # outbox that webhook subscribers see. rebuild_scheduling_calendar repairs a failure.
+    resource_id = instance.id
+    transaction.on_commit(lambda: project_calendar_for_resources([resource_id]), robust=True)
+
+
+@receiver(setting_changed)
+def reset_webhook_targets(setting, **kwargs):
+    # Settings-defined targets are cached per process too; override_settings must not see stale ones.
+    if setting.startswith("SCHEDULING_WEBHOOK_"):
+        clear_webhook_targets_cache()
@@ -1,42 +1,110 @@
 import hashlib
 import hmac
+import json
+import os
+import signal
+import threading
+import time as time_module
+from contextlib import nullcontext
 from datetime import date, datetime, time, timedelta, timezone as datetime_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from zoneinfo import ZoneInfo
 from urllib import error as urllib_error
-from unittest.mock import patch
+from urllib import request as urllib_request
+from unittest.mock import AsyncMock, Mock, patch
 
+from asgiref.sync import async_to_sync
 from django.core.cache import cache
-from django.db import IntegrityError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
 from events.models import Event
 from notifications.models import Notification
 
+from .calendar_projection import project_calendar_events, project_calendar_for_resources
 from .models import (
+    AuditLog,
+    AvailabilityDirtyRange,
+    AvailabilityException,
     AvailabilityRule,
     AvailabilitySlot,
     BookingConflictIncident,
     Booking,
     BookingRequest,
+    CalendarEvent,
+    CalendarFeedToken,
+    IdempotencyRecord,
     MarketplaceResource,
     OutboxDeadLetter,
     OutboxEvent,
+    OutboxEventArchive,
     ResourcePolicy,
     WebhookTarget,
 )
-from .services import dispatch_outbox_events, materialize_availability_slots, search_availability
+from . import capacity as capacity_module
+from .capacity import get_capacity_calendar
+from .exceptions import ConflictError
+from . import intervals as intervals_module
+from .intervals import BookingIntervalIndex, get_booking_indexes
+from .ops_counters import SEEDED_KEY, SEEDING_KEY, adjust_outbox_counts, get_ops_counters
+from .outbox_retention import _ensure_archive_partitions
+from .outbox_wakeup import CacheOutboxWaiter
+from .services import (
+    _emit_outbox,
+    _iter_rule_dates,
+    _local_to_utc,
+    _record_conflict_incident,
+    _release_capacity,
+    _reserve_capacity,
+    _resolve_local_datetime,
+    _webhook_targets,
+    _zone_day_offsets,
+    cancel_booking,
+    create_bookings_batch,
+    dispatch_outbox_events,
+    expire_pending_requests,
+    materialize_availability_slots,
+    materialize_dirty_availability,
+    search_availability,
+)
+from .webhook_engine import WebhookDeliveryEngine
+
+
+WEBHOOK_POST = "scheduling.webhook_engine.WebhookDeliveryEngine._post"
 
 
-class _DummyUrlOpenResponse:
-    def __init__(self, status=200):
-        self.status = status
+class _KeepAliveWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
 
-    def __enter__(self):
-        return self
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time_module.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+        if self.path.endswith("/moved"):
+            self.send_response(302)
+            self.send_header("Location", "/ok")
+        else:
+            self.send_response(500 if self.path.endswith("/broken") else 204)
+            # Records the absolute-form target a proxied request arrives with.
+            server.paths.append(self.path)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
 
-    def __exit__(self, exc_type, exc, tb):
-        return False
+    def log_message(self, format, *args):
+        pass
 
 
 class SchedulingWorkflowTests(TestCase):
@@ -120,6 +188,51 @@ class SchedulingWorkflowTests(TestCase):
         self.assertEqual(response_one.data["id"], response_two.data["id"])
         self.assertEqual(Booking.objects.count(), 1)
 
+    def test_idempotent_replays_are_served_from_cache_and_expired_keys_pruned(self):
+        cache.clear()
+        ResourcePolicy.objects.create(
+            resource=self.resource,
+            booking_mode=ResourcePolicy.BookingMode.INSTANT,
+            min_notice_hours=0,
+            max_horizon_days=365,
+        )
+        start_at, end_at = self._time_window()
+        payload = {
+            "event_id": self.event.id,
+            "resource_id": self.resource.id,
+            "start_at": start_at.isoformat(),
+            "end_at": end_at.isoformat(),
+            "attendee_count": 1,
+        }
+        self.client.force_authenticate(self.organizer)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.post(
+                "/api/scheduling/bookings/create/", payload, format="json", HTTP_IDEMPOTENCY_KEY="idem-cache-1"
+            )
+        self.assertEqual(first.status_code, 201)
+
+        with CaptureQueriesContext(connection) as queries:
+            replay = self.client.post(
+                "/api/scheduling/bookings/create/", payload, format="json", HTTP_IDEMPOTENCY_KEY="idem-cache-1"
+            )
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.data["id"], first.data["id"])
+        self.assertFalse([query for query in queries if "idempotencyrecord" in query["sql"]])
+
+        conflicting = self.client.post(
+            "/api/scheduling/bookings/create/",
+            {**payload, "attendee_count": 2},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="idem-cache-1",
+        )
+        self.assertEqual(conflicting.status_code, 409)
+
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        stdout = StringIO()
+        call_command("prune_scheduling_idempotency", stdout=stdout)
+        self.assertIn("Pruned 1 expired", stdout.getvalue())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
     def test_request_approval_creates_booking(self):
         ResourcePolicy.objects.create(
             resource=self.resource,
@@ -192,6 +305,125 @@ class SchedulingWorkflowTests(TestCase):
         self.assertEqual(conflict_response.status_code, 409)
         self.assertIn("already booked", str(conflict_response.data["detail"]).lower())
 
+    def test_batch_booking_is_all_or_nothing_and_writes_in_bulk(self):
+        second = MarketplaceResource.objects.create(
+            owner=self.provider,
+            resource_type=MarketplaceResource.ResourceType.VENUE,
+            display_name="Harbour Hall",
+            timezone="UTC",
+            city="Johannesburg",
+            is_active=True,
+        )
+        for resource in (self.resource, second):
+            ResourcePolicy.objects.create(
+                resource=resource,
+                booking_mode=ResourcePolicy.BookingMode.INSTANT,
+                min_notice_hours=0,
+                max_horizon_days=365,
+            )
+        start_at, end_at = self._time_window()
+        later_start, later_end = start_at + timedelta(days=1), end_at + timedelta(days=1)
+        self.client.force_authenticate(self.organizer)
+
+        payload = {
+            "event_id": self.event.id,
+            "items": [
+                {"resource_id": second.id, "start_at": start_at.isoformat(), "end_at": end_at.isoformat()},
+                {"resource_id": self.resource.id, "start_at": start_at.isoformat(), "end_at": end_at.isoformat()},
+                {"resource_id": self.resource.id, "start_at": later_start.isoformat(), "end_at": later_end.isoformat()},
+            ],
+        }
+        response = self.client.post("/api/scheduling/bookings/batch/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [row["resource"] for row in response.data["results"]],
+            [second.id, self.resource.id, self.resource.id],
+        )
+        booking_ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(
+            AuditLog.objects.filter(action="booking.created", target_id__in=map(str, booking_ids)).count(), 3
+        )
+        self.assertEqual(OutboxEvent.objects.filter(event_type="booking.confirmed").count(), 3)
+
+        # The first window is free, the second collides: neither is booked.
+        self.client.force_authenticate(self.organizer_two)
+        conflicting = {
+            "event_id": self.event_two.id,
+            "items": [
+                {
+                    "resource_id": second.id,
+                    "start_at": (start_at + timedelta(days=3)).isoformat(),
+                    "end_at": (end_at + timedelta(days=3)).isoformat(),
+                },
+                {"resource_id": self.resource.id, "start_at": later_start.isoformat(), "end_at": later_end.isoformat()},
+            ],
+        }
+        conflict_response = self.client.post("/api/scheduling/bookings/batch/", conflicting, format="json")
+        self.assertEqual(conflict_response.status_code, 409)
+        self.assertIn("already booked", str(conflict_response.data["detail"]).lower())
+        self.assertEqual(Booking.objects.count(), 3)
+        self.assertEqual(OutboxEvent.objects.filter(event_type="booking.confirmed").count(), 3)
+
+        overlapping = {
+            "event_id": self.event_two.id,
+            "items": [
+                {"resource_id": second.id, "start_at": later_start.isoformat(), "end_at": later_end.isoformat()},
+                {
+                    "resource_id": second.id,
+                    "start_at": (later_start + timedelta(hours=1)).isoformat(),
+                    "end_at": (later_end + timedelta(hours=1)).isoformat(),
+                },
+            ],
+        }
+        overlap_response = self.client.post("/api/scheduling/bookings/batch/", overlapping, format="json")
+        self.assertEqual(overlap_response.status_code, 400)
+
+        # Policy windows are checked by the same rule as single bookings.
+        too_far = {
+            "event_id": self.event_two.id,
+            "items": [
+                {
+                    "resource_id": second.id,
+                    "start_at": (start_at + timedelta(days=400)).isoformat(),
+                    "end_at": (end_at + timedelta(days=400)).isoformat(),
+                }
+            ],
+        }
+        too_far_response = self.client.post("/api/scheduling/bookings/batch/", too_far, format="json")
+        self.assertEqual(too_far_response.status_code, 400)
+        self.assertIn("max_horizon_days", str(too_far_response.data["detail"]))
+
+        # A database-level conflict in a multi-resource batch is not pinned on the first item.
+        free_items = [
+            {
+                "resource": resource,
+                "start_at": start_at + timedelta(days=5),
+                "end_at": end_at + timedelta(days=5),
+                "attendee_count": 1,
+            }
+            for resource in (self.resource, second)
+        ]
+        with patch("scheduling.services.Booking.objects.bulk_create", side_effect=IntegrityError("overlap")), patch(
+            "scheduling.services._record_conflict_incident"
+        ) as record_incident:
+            with self.assertRaises(ConflictError):
+                create_bookings_batch(organizer=self.organizer_two, event=self.event_two, items=free_items)
+        incident = record_incident.call_args.kwargs
+        self.assertIsNone(incident["resource"])
+        self.assertEqual(incident["details"]["resource_ids"], sorted([self.resource.id, second.id]))
+
+        # An idempotent replay whose bookings were removed fails like create_booking's replay.
+        replayed, created = create_bookings_batch(
+            organizer=self.organizer_two, event=self.event_two, items=free_items, idempotency_key="batch-replay"
+        )
+        self.assertTrue(created)
+        replayed[0].delete()
+        with self.assertRaises(Booking.DoesNotExist):
+            create_bookings_batch(
+                organizer=self.organizer_two, event=self.event_two, items=free_items, idempotency_key="batch-replay"
+            )
+        self.assertEqual(Booking.objects.filter(organizer=self.organizer_two).count(), 1)
+
     def test_cancellation_window_blocks_non_admin_cancel(self):
         ResourcePolicy.objects.create(
             resource=self.resource,
@@ -311,6 +543,7 @@ class SchedulingWorkflowTests(TestCase):
 
 class SchedulingTimezoneEdgeCaseTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.provider = self._make_user("tz_provider", "vendor")
         self.resource = MarketplaceResource.objects.create(
             owner=self.provider,
@@ -412,6 +645,535 @@ class SchedulingTimezoneEdgeCaseTests(TestCase):
         self.assertEqual(window["start_at"], datetime(2026, 6, 1, 8, 0, tzinfo=datetime_timezone.utc))
         self.assertEqual(window["end_at"], datetime(2026, 6, 1, 10, 0, tzinfo=datetime_timezone.utc))
 
+    def test_cached_offsets_match_fold_resolution_across_transitions(self):
+        local_times = [time(0, 0), time(0, 30), time(1, 30), time(2, 30), time(12, 0), time(23, 59)]
+        for tz_name in ("America/New_York", "Europe/London", "Australia/Lord_Howe", "America/Santiago"):
+            tz = ZoneInfo(tz_name)
+            current = date(2026, 1, 1)
+            while current.year == 2026:
+                for local_time in local_times:
+                    local_dt = datetime.combine(current, local_time)
+                    aware = _resolve_local_datetime(local_dt, tz, prefer_fold=0)
+                    expected = aware.astimezone(datetime_timezone.utc) if aware else None
+                    self.assertEqual(_local_to_utc(tz_name, current, local_time), expected, (tz_name, local_dt))
+                current += timedelta(days=1)
+
+        transition_days = [
+            day for day, offset in _zone_day_offsets("America/New_York", 2026).items() if offset is None
+        ]
+        self.assertEqual(transition_days, [date(2026, 3, 8), date(2026, 11, 1)])
+
+class SchedulingMaterializationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = self._make_user("materialize_provider", "vendor")
+        self.resource = MarketplaceResource.objects.create(
+            owner=self.provider,
+            resource_type=MarketplaceResource.ResourceType.VENUE,
+            display_name="Materialized Hall",
+            timezone="UTC",
+            city="Pretoria",
+            is_active=True,
+        )
+
+    @staticmethod
+    def _make_user(username, user_type):
+        from users.models import CustomUser
+
+        return CustomUser.objects.create_user(
+            username=username,
+            password="test-pass-123",
+            user_type=user_type,
+            email=f"{username}@example.com",
+        )
+
+    def _daily_rule(self, **overrides):
+        fields = {
+            "resource": self.resource,
+            "timezone": "UTC",
+            "frequency": AvailabilityRule.Frequency.DAILY,
+            "effective_start_date": date(2026, 7, 1),
+            "local_start_time": time(9, 0),
+            "local_end_time": time(17, 0),
+            "capacity": 3,
+        }
+        fields.update(overrides)
+        return AvailabilityRule.objects.create(**fields)
+
+    def test_bulk_materialization_diffs_existing_slots_in_fixed_queries(self):
+        rule = self._daily_rule()
+        existing = AvailabilitySlot.objects.create(
+            resource=self.resource,
+            source_rule=rule,
+            start_at=datetime(2026, 7, 2, 9, 0, tzinfo=datetime_timezone.utc),
+            end_at=datetime(2026, 7, 2, 17, 0, tzinfo=datetime_timezone.utc),
+            capacity_total=3,
+            capacity_reserved=2,
+        )
+        unchanged = AvailabilitySlot.objects.create(
+            resource=self.resource,
+            source_rule=rule,
+            start_at=datetime(2026, 7, 3, 9, 0, tzinfo=datetime_timezone.utc),
+            end_at=datetime(2026, 7, 3, 17, 0, tzinfo=datetime_timezone.utc),
+            capacity_total=3,
+        )
+        AvailabilityException.objects.create(
+            resource=self.resource,
+            exception_type=AvailabilityException.ExceptionType.BLACKOUT,
+            start_at=datetime(2026, 7, 2, 12, 0, tzinfo=datetime_timezone.utc),
+            end_at=datetime(2026, 7, 2, 13, 0, tzinfo=datetime_timezone.utc),
+        )
+
+        # Two reads, then (inside a savepoint) the slot diff, one bulk insert, a count of the rows
+        # that actually landed and one grouped update per (rule, capacity, bookability).
+        with self.assertNumQueries(8):
+            result = materialize_availability_slots(
+                start_date=date(2026, 7, 1),
+                end_date=date(2026, 7, 10),
+                resource_id=self.resource.id,
+            )
+
+        self.assertEqual(result["rules_processed"], 1)
+        self.assertEqual(result["slots_created"], 8)
+        self.assertEqual(result["slots_updated"], 1)
+        self.assertEqual(AvailabilitySlot.objects.filter(resource=self.resource).count(), 10)
+
+        existing.refresh_from_db()
+        self.assertFalse(existing.is_bookable)
+        self.assertEqual(existing.capacity_reserved, 2)
+        self.assertEqual(existing.version, 2)
+        unchanged.refresh_from_db()
+        self.assertEqual(unchanged.version, 1)
+
+        rerun = materialize_availability_slots(
+            start_date=date(2026, 7, 1),
+            end_date=date(2026, 7, 10),
+            resource_id=self.resource.id,
+        )
+        self.assertEqual(rerun["slots_created"], 0)
+        self.assertEqual(rerun["slots_updated"], 0)
+
+    def test_rule_date_expansion_matches_day_by_day_walk(self):
+        range_start, range_end = date(2026, 7, 1), date(2026, 9, 30)
+        cases = [
+            (AvailabilityRule.Frequency.DAILY, [], date(2026, 6, 20), None),
+            (AvailabilityRule.Frequency.WEEKLY, [0], date(2026, 7, 3), date(2026, 8, 17)),
+            (AvailabilityRule.Frequency.WEEKLY, [6, 2, 4], date(2026, 7, 1), None),
+            (AvailabilityRule.Frequency.WEEKLY, [1, 5], date(2026, 9, 29), date(2026, 10, 5)),
+            (AvailabilityRule.Frequency.WEEKLY, [3], date(2026, 10, 1), None),
+        ]
+        for frequency, weekdays, effective_start, effective_end in cases:
+            rule = AvailabilityRule(
+                frequency=frequency,
+                weekdays=weekdays,
+                effective_start_date=effective_start,
+                effective_end_date=effective_end,
+            )
+            expected = []
+            current = max(effective_start, range_start)
+            while current <= min(effective_end or range_end, range_end):
+                if frequency == AvailabilityRule.Frequency.DAILY or current.weekday() in weekdays:
+                    expected.append(current)
+                current += timedelta(days=1)
+            self.assertEqual(list(_iter_rule_dates(rule, range_start, range_end)), expected, (frequency, weekdays))
+
+    def test_shard_option_limits_command_to_owned_resources(self):
+        other_resource = MarketplaceResource.objects.create(
+            owner=self.provider,
+            resource_type=MarketplaceResource.ResourceType.VENUE,
+            display_name="Second Hall",
+            timezone="UTC",
+            is_active=True,
+        )
+        self._daily_rule()
+        self._daily_rule(resource=other_resource)
+        owned_resource = self.resource if self.resource.id % 2 == 0 else other_resource
+
+        output = StringIO()
+        call_command(
+            "materialize_availability_slots",
+            "--start-date=2026-07-01",
+            "--end-date=2026-07-02",
+            "--shard=0/2",
+            stdout=output,
+        )
+
+        self.assertIn("rules=1 created=2", output.getvalue())
+        self.assertEqual(
+            set(AvailabilitySlot.objects.values_list("resource_id", flat=True).distinct()),
+            {owned_resource.id},
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("materialize_availability_slots", "--shard=2/2", stdout=StringIO())
+
+    def test_workers_option_merges_counts_from_every_worker(self):
+        other_resource = MarketplaceResource.objects.create(
+            owner=self.provider,
+            resource_type=MarketplaceResource.ResourceType.VENUE,
+            display_name="Second Hall",
+            timezone="UTC",
+            is_active=True,
+        )
+        self._daily_rule()
+        self._daily_rule(resource=other_resource)
+        AvailabilitySlot.objects.create(
+            resource=other_resource,
+            start_at=datetime(2026, 7, 1, 9, 0, tzinfo=datetime_timezone.utc),
+            end_at=datetime(2026, 7, 1, 17, 0, tzinfo=datetime_timezone.utc),
+            capacity_total=1,
+        )
+
+        # Worker processes cannot see the test transaction, so the pool runs its shards in-process.
+        pool = Mock()
+        pool.map.side_effect = lambda function, shard_kwargs: [function(kwargs) for kwargs in shard_kwargs]
+        output = StringIO()
+        with patch(
+            "scheduling.management.commands.materialize_availability_slots._process_pool",
+            return_value=nullcontext(pool),
+        ) as process_pool:
+            call_command(
+                "materialize_availability_slots",
+                "--start-date=2026-07-01",
+                "--end-date=2026-07-02",
+                "--workers=2",
+                stdout=output,
+            )
+
+        process_pool.assert_called_once_with(2)
+        shards = [(kwargs["shard_index"], kwargs["shard_count"]) for kwargs in pool.map.call_args.args[1]]
+        self.assertEqual(shards, [(0, 2), (1, 2)])
+        self.assertIn("rules=2 created=3 updated=1", output.getvalue())
+        self.assertEqual(AvailabilitySlot.objects.count(), 4)
+
+    def test_rule_and_exception_changes_rematerialize_only_dirty_ranges(self):
+        today = timezone.localdate()
+        api = APIClient()
+        api.force_authenticate(self.provider)
+
+        created = api.post(
+            "/api/scheduling/availability-rules/",
+            {
+                "resource": self.resource.id,
+                "timezone": "UTC",
+                "frequency": AvailabilityRule.Frequency.DAILY,
+                "weekdays": [],
+                "effective_start_date": (today + timedelta(days=2)).isoformat(),
+                "effective_end_date": (today + timedelta(days=4)).isoformat(),
+                "local_start_time": "09:00",
+                "local_end_time": "11:00",
+                "capacity": 2,
+            },
+            format="json",
+        )
+        self.assertEqual(created.status_code, 201)
+        dirty = AvailabilityDirtyRange.objects.get(resource=self.resource)
+        self.assertEqual(dirty.start_date, today + timedelta(days=2))
+        self.assertEqual(dirty.end_date, today + timedelta(days=4))
+
+        result = materialize_dirty_availability()
+        self.assertEqual(result["ranges_processed"], 1)
+        self.assertEqual(result["slots_created"], 3)
+        self.assertFalse(AvailabilityDirtyRange.objects.exists())
+
+        blackout_day = today + timedelta(days=3)
+        blackout_start = datetime.combine(blackout_day, time(10, 0), tzinfo=datetime_timezone.utc)
+        response = api.post(
+            "/api/scheduling/availability-exceptions/",
+            {
+                "resource": self.resource.id,
+                "exception_type": AvailabilityException.ExceptionType.BLACKOUT,
+                "start_at": blackout_start.isoformat(),
+                "end_at": (blackout_start + timedelta(hours=1)).isoformat(),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        result = materialize_dirty_availability()
+        self.assertEqual(result["slots_updated"], 1)
+        self.assertFalse(
+            AvailabilitySlot.objects.get(resource=self.resource, start_at__date=blackout_day).is_bookable
+        )
+
+        deleted = api.delete(f"/api/scheduling/availability-exceptions/{response.data['id']}/")
+        self.assertEqual(deleted.status_code, 204)
+        materialize_dirty_availability()
+        self.assertTrue(AvailabilitySlot.objects.get(resource=self.resource, start_at__date=blackout_day).is_bookable)
+
+        deleted_rule = api.delete(f"/api/scheduling/availability-rules/{created.data['id']}/")
+        self.assertEqual(deleted_rule.status_code, 204)
+        dirty = AvailabilityDirtyRange.objects.get(resource=self.resource)
+        self.assertEqual((dirty.start_date, dirty.end_date), (today + timedelta(days=2), today + timedelta(days=4)))
+        self.assertEqual(dirty.reason, "rule.deleted")
+
+
+class SchedulingAvailabilitySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = self._make_user("search_provider", "vendor")
+        self.organizer = self._make_user("search_organizer", "organizer")
+        self.event = Event.objects.create(
+            user=self.organizer,
+            organizer=self.organizer,
+            name="Search Event",
+            date=date(2026, 6, 1),
+        )
+        self.resources = [
+            MarketplaceResource.objects.create(
+                owner=self.provider,
+                resource_type=MarketplaceResource.ResourceType.VENDOR,
+                display_name=f"Search Vendor {index}",
+                timezone="UTC",
+                city="Durban",
+                is_active=True,
+            )
+            for index in range(3)
+        ]
+
+    @staticmethod
+    def _make_user(username, user_type):
+        from users.models import CustomUser
+
+        return CustomUser.objects.create_user(
+            username=username,
+            password="test-pass-123",
+            user_type=user_type,
+            email=f"{username}@example.com",
+        )
+
+    def _utc(self, day, hour):
+        return datetime(2026, 6, day, hour, 0, tzinfo=datetime_timezone.utc)
+
+    def test_search_uses_fixed_query_count_and_filters_in_memory(self):
+        slot_resource, rule_resource, blackout_resource = self.resources
+        ResourcePolicy.objects.create(
+            resource=slot_resource,
+            booking_mode=ResourcePolicy.BookingMode.INSTANT,
+        )
+        for day in (1, 2, 3):
+            AvailabilitySlot.objects.create(
+                resource=slot_resource,
+                start_at=self._utc(day, 8),
+                end_at=self._utc(day, 12),
+                capacity_total=2,
+            )
+        # Overlaps the day-1 slot but falls outside the search range itself.
+        Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=slot_resource,
+            start_at=self._utc(1, 8),
+            end_at=self._utc(1, 9),
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        for resource in (rule_resource, blackout_resource):
+            AvailabilityRule.objects.create(
+                resource=resource,
+                timezone="UTC",
+                frequency=AvailabilityRule.Frequency.DAILY,
+                effective_start_date=date(2026, 6, 1),
+                local_start_time=time(10, 0),
+                local_end_time=time(14, 0),
+                capacity=4,
+            )
+        AvailabilityException.objects.create(
+            resource=blackout_resource,
+            exception_type=AvailabilityException.ExceptionType.BLACKOUT,
+            start_at=self._utc(1, 0),
+            end_at=self._utc(4, 0),
+        )
+
+        with self.assertNumQueries(6):
+            results = search_availability(start_at=self._utc(1, 10), end_at=self._utc(3, 11))
+
+        self.assertEqual([row["resource_id"] for row in results], [slot_resource.id, rule_resource.id])
+        slot_row, rule_row = results
+        self.assertEqual(slot_row["booking_mode"], ResourcePolicy.BookingMode.INSTANT)
+        self.assertEqual([window["start_at"] for window in slot_row["windows"]], [self._utc(2, 8), self._utc(3, 8)])
+        self.assertEqual({window["source"] for window in slot_row["windows"]}, {"slot"})
+        self.assertEqual(rule_row["booking_mode"], ResourcePolicy.BookingMode.APPROVAL_REQUIRED)
+        self.assertEqual(
+            [window["start_at"] for window in rule_row["windows"]],
+            [self._utc(1, 10), self._utc(2, 10), self._utc(3, 10)],
+        )
+        self.assertEqual(rule_row["windows"][0]["capacity_remaining"], 4)
+
+    def test_booking_index_answers_overlaps_and_refreshes_on_cancel(self):
+        index = BookingIntervalIndex(
+            [
+                (self._utc(1, 8), self._utc(1, 10), 1),
+                (self._utc(1, 9), self._utc(1, 18), 2),
+                (self._utc(2, 8), self._utc(2, 9), 3),
+            ]
+        )
+        self.assertTrue(index.overlaps(self._utc(1, 17), self._utc(1, 19)))
+        self.assertFalse(index.overlaps(self._utc(1, 18), self._utc(2, 8)))
+        self.assertEqual(index.find_conflict(self._utc(1, 9), self._utc(1, 10)), 1)
+        self.assertEqual(index.find_conflict(self._utc(1, 9), self._utc(1, 10), exclude_booking_id=1), 2)
+
+        resource = self.resources[0]
+        AvailabilitySlot.objects.create(
+            resource=resource,
+            start_at=self._utc(5, 8),
+            end_at=self._utc(5, 12),
+            capacity_total=2,
+            capacity_reserved=1,
+        )
+        booking = Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=resource,
+            start_at=self._utc(5, 9),
+            end_at=self._utc(5, 10),
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        self.assertEqual(search_availability(start_at=self._utc(5, 0), end_at=self._utc(6, 0)), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_booking(actor=self.organizer, booking=booking, reason="plans changed")
+
+        results = search_availability(start_at=self._utc(5, 0), end_at=self._utc(6, 0))
+        self.assertEqual([row["resource_id"] for row in results], [resource.id])
+
+    @override_settings(SCHEDULING_BOOKING_INDEX_MAX_RESOURCES=2, SCHEDULING_BOOKING_INDEX_HORIZON_DAYS=30)
+    def test_booking_indexes_are_bounded_per_process_and_by_horizon(self):
+        far_start = timezone.now() + timedelta(days=90)
+        far = Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=self.resources[0],
+            start_at=far_start,
+            end_at=far_start + timedelta(hours=2),
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        near_start, near_end = timezone.now() + timedelta(days=1), timezone.now() + timedelta(days=2)
+        resource_ids = [resource.id for resource in self.resources[:3]]
+        indexes = get_booking_indexes(resource_ids, near_start, near_end)
+        self.assertEqual(len(indexes[resource_ids[0]]), 0)
+        self.assertLessEqual(len(intervals_module._local_indexes), 2)
+        self.assertNotIn(resource_ids[0], intervals_module._local_indexes)
+
+        # A window past the built horizon triggers a rebuild that covers it.
+        far_index = get_booking_indexes([resource_ids[0]], far_start, far_start + timedelta(hours=1))[resource_ids[0]]
+        self.assertEqual(far_index.find_conflict(far_start, far_start + timedelta(hours=1)), far.id)
+
+    def test_search_endpoint_serves_cached_pages_until_resource_changes(self):
+        resource = self.resources[0]
+        AvailabilitySlot.objects.create(resource=resource, start_at=self._utc(8, 9), end_at=self._utc(8, 12))
+        api = APIClient()
+        api.force_authenticate(self.organizer)
+        params = {"start_at": self._utc(8, 0).isoformat(), "end_at": self._utc(9, 0).isoformat(), "city": "DURBAN"}
+
+        first = api.get("/api/scheduling/availability/search/", params)
+        self.assertEqual([row["resource_id"] for row in first.data["results"]], [resource.id])
+
+        with self.assertNumQueries(0):
+            cached = api.get("/api/scheduling/availability/search/", {**params, "city": "durban "})
+        self.assertEqual(cached.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                event=self.event,
+                organizer=self.organizer,
+                resource=resource,
+                start_at=self._utc(8, 10),
+                end_at=self._utc(8, 11),
+                status=Booking.Status.CONFIRMED,
+                source=Booking.Source.INSTANT,
+            )
+
+        refreshed = api.get("/api/scheduling/availability/search/", params)
+        self.assertEqual(refreshed.data["results"], [])
+
+    def test_keyset_pages_skip_resources_without_windows_and_stream_ndjson(self):
+        first, empty, last = self.resources
+        for resource in (first, last):
+            AvailabilitySlot.objects.create(resource=resource, start_at=self._utc(8, 9), end_at=self._utc(8, 12))
+        api = APIClient()
+        api.force_authenticate(self.organizer)
+        params = {"start_at": self._utc(8, 0).isoformat(), "end_at": self._utc(9, 0).isoformat(), "limit": 1}
+
+        page_one = api.get("/api/scheduling/availability/search/", params)
+        self.assertEqual([row["resource_id"] for row in page_one.data["results"]], [first.id])
+        self.assertIsNotNone(page_one.data["next_cursor"])
+
+        # The resource without windows is scanned past rather than leaving a short page.
+        page_two = api.get("/api/scheduling/availability/search/", {**params, "cursor": page_one.data["next_cursor"]})
+        self.assertEqual([row["resource_id"] for row in page_two.data["results"]], [last.id])
+
+        legacy = api.get("/api/scheduling/availability/search/", {**params, "offset": 1})
+        self.assertEqual(legacy.data["results"], [])
+
+        invalid = api.get("/api/scheduling/availability/search/", {**params, "cursor": "not-a-cursor"})
+        self.assertEqual(invalid.status_code, 400)
+
+        streamed = api.get("/api/scheduling/availability/search/", {**params, "limit": 5, "stream": "true"})
+        self.assertEqual(streamed["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(streamed.streaming_content).decode().splitlines()]
+        self.assertEqual([line["result"]["resource_id"] for line in lines[:-1]], [first.id, last.id])
+        self.assertEqual(lines[-1], {"next_cursor": None})
+
+    def test_capacity_calendar_answers_range_checks_and_follows_reservations(self):
+        resource = self.resources[0]
+        morning = AvailabilitySlot.objects.create(
+            resource=resource,
+            start_at=self._utc(8, 9),
+            end_at=self._utc(8, 12),
+            capacity_total=3,
+        )
+        AvailabilitySlot.objects.create(resource=resource, start_at=self._utc(8, 12), end_at=self._utc(8, 13))
+
+        calendar = get_capacity_calendar(resource.id, self._utc(7, 0), self._utc(10, 0))
+        self.assertEqual(calendar.min_remaining(self._utc(8, 9), self._utc(8, 12)), 3)
+        self.assertEqual(calendar.min_remaining(self._utc(8, 9), self._utc(8, 13)), 1)
+        self.assertEqual(calendar.min_remaining(self._utc(8, 13), self._utc(8, 14)), 0)
+
+        with self.assertNumQueries(0):
+            get_capacity_calendar(resource.id, self._utc(8, 0), self._utc(9, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _reserve_capacity([morning], 2)
+        calendar = get_capacity_calendar(resource.id, self._utc(8, 0), self._utc(9, 0))
+        self.assertEqual(calendar.min_remaining(self._utc(8, 10), self._utc(8, 11)), 1)
+
+        api = APIClient()
+        api.force_authenticate(self.organizer)
+        response = api.get(
+            f"/api/scheduling/resources/{resource.id}/capacity/",
+            {"start_at": self._utc(8, 9).isoformat(), "end_at": self._utc(8, 12).isoformat(), "attendee_count": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["min_remaining"], 1)
+        self.assertFalse(response.data["available"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _release_capacity(resource, self._utc(8, 10), self._utc(8, 11), 2)
+        calendar = get_capacity_calendar(resource.id, self._utc(8, 0), self._utc(9, 0))
+        self.assertEqual(calendar.min_remaining(self._utc(8, 9), self._utc(8, 12)), 3)
+
+        # A reservation committing between a reader's slot query and its cache store must win.
+        cache.clear()
+        build_days = capacity_module._build_days
+        interleaved = []
+
+        def build_then_commit_reservation(*args):
+            chunks = build_days(*args)
+            if not interleaved:
+                interleaved.append(True)
+                with self.captureOnCommitCallbacks(execute=True):
+                    _reserve_capacity([morning], 2)
+            return chunks
+
+        with patch("scheduling.capacity._build_days", side_effect=build_then_commit_reservation):
+            stale = get_capacity_calendar(resource.id, self._utc(8, 0), self._utc(9, 0))
+        self.assertEqual(stale.min_remaining(self._utc(8, 10), self._utc(8, 11)), 3)
+        calendar = get_capacity_calendar(resource.id, self._utc(8, 0), self._utc(9, 0))
+        self.assertEqual(calendar.min_remaining(self._utc(8, 10), self._utc(8, 11)), 1)
+
 
 class SchedulingOutboxWorkerTests(TestCase):
     def setUp(self):
@@ -475,6 +1237,318 @@ class SchedulingOutboxWorkerTests(TestCase):
         self.assertEqual(notification.notification_type, Notification.NotificationType.BOOKING_REQUEST)
         self.assertEqual(notification.link_id, booking_request.id)
 
+    def test_notification_fan_out_is_bulk_and_pushes_in_one_batch(self):
+        booking_requests = [
+            BookingRequest.objects.create(
+                event=self.event,
+                organizer=self.organizer,
+                resource=self.resource,
+                requested_start_at=timezone.now() + timedelta(days=10, hours=index * 3),
+                requested_end_at=timezone.now() + timedelta(days=10, hours=index * 3 + 2),
+                attendee_count=1,
+                status=BookingRequest.Status.PENDING,
+            )
+            for index in range(4)
+        ]
+        for index, booking_request in enumerate(booking_requests):
+            OutboxEvent.objects.create(
+                event_type="request.created" if index % 2 else "request.declined",
+                aggregate_type="booking_request",
+                aggregate_id=str(booking_request.id),
+                payload={"request_id": booking_request.id},
+            )
+
+        channel_layer = AsyncMock()
+        with patch("scheduling.services.get_channel_layer", return_value=channel_layer), patch(
+            "scheduling.services.async_to_sync", wraps=async_to_sync
+        ) as bridge:
+            # Claim (3), delivery rows, one source query, one bulk insert, then outcome writes (2).
+            with self.assertNumQueries(8):
+                result = dispatch_outbox_events(limit=10, consume_webhooks=False, consume_calendar=False)
+
+        self.assertEqual(result["processed"], 4)
+        self.assertEqual(Notification.objects.filter(recipient=self.provider).count(), 2)
+        self.assertEqual(Notification.objects.filter(recipient=self.organizer).count(), 2)
+        self.assertEqual(bridge.call_count, 1)
+        groups = sorted(call.args[0] for call in channel_layer.group_send.await_args_list)
+        self.assertEqual(
+            groups,
+            sorted([f"notifications_{self.provider.id}"] * 2 + [f"notifications_{self.organizer.id}"] * 2),
+        )
+        pushed_ids = {call.args[1]["notification"]["id"] for call in channel_layer.group_send.await_args_list}
+        self.assertEqual(pushed_ids, set(Notification.objects.values_list("id", flat=True)))
+
+    def test_calendar_consumer_projects_bookings_and_requests_per_scope(self):
+        admin = self._make_user("outbox_admin", "organizer", is_staff=True)
+        start_at = timezone.now() + timedelta(days=5)
+        booking = Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=self.resource,
+            start_at=start_at,
+            end_at=start_at + timedelta(hours=2),
+            attendee_count=1,
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        booking_request = BookingRequest.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=self.resource,
+            requested_start_at=start_at - timedelta(hours=3),
+            requested_end_at=start_at - timedelta(hours=1),
+            attendee_count=1,
+            status=BookingRequest.Status.PENDING,
+        )
+        OutboxEvent.objects.create(
+            event_type="booking.confirmed",
+            aggregate_type="booking",
+            aggregate_id=str(booking.id),
+            payload={"booking_id": booking.id, "resource_id": self.resource.id},
+        )
+        OutboxEvent.objects.create(
+            event_type="request.created",
+            aggregate_type="booking_request",
+            aggregate_id=str(booking_request.id),
+            payload={"request_id": booking_request.id},
+        )
+        window = {
+            "start_at": (start_at - timedelta(days=1)).isoformat(),
+            "end_at": (start_at + timedelta(days=1)).isoformat(),
+        }
+        api = APIClient()
+        api.force_authenticate(self.organizer)
+        self.assertEqual(api.get("/api/scheduling/calendar/", {"scope": "organizer", **window}).data["results"], [])
+
+        dispatch_outbox_events(limit=10, consume_notifications=False, consume_webhooks=False)
+        self.assertEqual(CalendarEvent.objects.count(), 6)
+
+        for user, scope in ((self.organizer, "organizer"), (self.provider, "resource"), (admin, "admin")):
+            api.force_authenticate(user)
+            with self.assertNumQueries(1):
+                response = api.get("/api/scheduling/calendar/", {"scope": scope, **window})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [(row["type"], row["id"], row["status"]) for row in response.data["results"]],
+                [("request", booking_request.id, "pending"), ("booking", booking.id, "confirmed")],
+            )
+
+        Booking.objects.filter(id=booking.id).update(status=Booking.Status.CANCELLED)
+        OutboxEvent.objects.create(
+            event_type="booking.cancelled",
+            aggregate_type="booking",
+            aggregate_id=str(booking.id),
+            payload={"booking_id": booking.id, "resource_id": self.resource.id},
+        )
+        dispatch_outbox_events(limit=10, consume_notifications=False, consume_webhooks=False)
+        api.force_authenticate(self.organizer)
+        results = api.get("/api/scheduling/calendar/", {"scope": "organizer", **window}).data["results"]
+        self.assertEqual(results[1]["status"], Booking.Status.CANCELLED)
+        self.assertEqual(CalendarEvent.objects.count(), 6)
+
+        CalendarEvent.objects.all().delete()
+        call_command("rebuild_scheduling_calendar", stdout=StringIO())
+        self.assertEqual(CalendarEvent.objects.filter(actor_type=CalendarEvent.ActorType.RESOURCE).count(), 2)
+
+        # Renaming the resource or handing it to another owner re-projects its rows.
+        new_owner = self._make_user("outbox_new_owner", "vendor")
+        resource = MarketplaceResource.objects.get(id=self.resource.id)
+        resource.save()
+        resource.display_name = "Harbour Hall"
+        resource.owner = new_owner
+        with patch(
+            "scheduling.signals.project_calendar_for_resources", wraps=project_calendar_for_resources
+        ) as reproject, self.captureOnCommitCallbacks(execute=True):
+            resource.save()
+            resource.save()
+        reproject.assert_called_once_with([resource.id])
+        # It stays internal: nothing reaches the outbox that webhook subscribers consume.
+        self.assertFalse(OutboxEvent.objects.filter(aggregate_type="resource").exists())
+        resource_rows = CalendarEvent.objects.filter(actor_type=CalendarEvent.ActorType.RESOURCE)
+        self.assertEqual(
+            sorted(resource_rows.values_list("actor_user_id", "is_deleted")),
+            sorted([(self.provider.id, True)] * 2 + [(new_owner.id, False)] * 2),
+        )
+        self.assertEqual(
+            set(CalendarEvent.objects.filter(is_deleted=False).values_list("title", flat=True)),
+            {"Harbour Hall booking", "Harbour Hall request"},
+        )
+
+    def test_calendar_projection_converges_when_the_same_booking_is_projected_from_stale_state(self):
+        start_at = timezone.now() + timedelta(days=5)
+        booking = Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=self.resource,
+            start_at=start_at,
+            end_at=start_at + timedelta(hours=2),
+            attendee_count=1,
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        self.assertEqual(project_calendar_events(booking_ids=[booking.id]), 3)
+
+        # booking.cancelled is handled first and the older booking.confirmed afterwards; both
+        # project from the locked current row rather than from their event's snapshot.
+        Booking.objects.filter(id=booking.id).update(status=Booking.Status.CANCELLED)
+        project_calendar_events(booking_ids=[booking.id])
+        self.assertEqual(project_calendar_events(booking_ids=[booking.id]), 0)
+        self.assertEqual(
+            sorted(CalendarEvent.objects.values_list("actor_type", "payload__status")),
+            [("admin", "cancelled"), ("organizer", "cancelled"), ("resource", "cancelled")],
+        )
+
+        # A projection that saw no rows cannot insert a second copy for any actor, admin included.
+        for row in CalendarEvent.objects.all():
+            row.pk = None
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                row.save()
+        self.assertEqual(CalendarEvent.objects.count(), 3)
+
+    @override_settings(SCHEDULING_CALENDAR_SYNC_OVERLAP_SECONDS=0)
+    def test_calendar_sync_returns_only_changes_and_tombstones(self):
+        start_at = timezone.now() + timedelta(days=5)
+        bookings = [
+            Booking.objects.create(
+                event=self.event,
+                organizer=self.organizer,
+                resource=self.resource,
+                start_at=start_at + timedelta(hours=index * 3),
+                end_at=start_at + timedelta(hours=index * 3 + 2),
+                attendee_count=1,
+                status=Booking.Status.CONFIRMED,
+                source=Booking.Source.INSTANT,
+            )
+            for index in range(3)
+        ]
+        self.assertEqual(project_calendar_events(booking_ids=[booking.id for booking in bookings]), 9)
+
+        api = APIClient()
+        api.force_authenticate(self.organizer)
+        initial = api.get("/api/scheduling/calendar/sync/", {"scope": "organizer"})
+        self.assertEqual(initial.status_code, 200)
+        self.assertTrue(initial.data["full_sync"])
+        self.assertEqual([row["id"] for row in initial.data["results"]], [booking.id for booking in bookings])
+
+        # Replaying unchanged sources writes nothing, so the next sync is empty.
+        self.assertEqual(project_calendar_events(booking_ids=[booking.id for booking in bookings]), 0)
+        token = initial.data["sync_token"]
+        unchanged = api.get("/api/scheduling/calendar/sync/", {"scope": "organizer", "sync_token": token})
+        self.assertEqual((unchanged.data["results"], unchanged.data["deleted"]), ([], []))
+
+        Booking.objects.filter(id=bookings[0].id).update(status=Booking.Status.CANCELLED)
+        Booking.objects.filter(id=bookings[1].id).update(end_at=F("end_at") + timedelta(hours=1))
+        self.assertEqual(project_calendar_events(booking_ids=[bookings[0].id, bookings[1].id]), 6)
+
+        with self.assertNumQueries(1):
+            changes = api.get(
+                "/api/scheduling/calendar/sync/", {"scope": "organizer", "sync_token": unchanged.data["sync_token"]}
+            )
+        self.assertFalse(changes.data["full_sync"])
+        self.assertEqual([row["id"] for row in changes.data["results"]], [bookings[1].id])
+        self.assertEqual(changes.data["deleted"], [{"type": "booking", "id": bookings[0].id}])
+
+        other_scope = api.get(
+            "/api/scheduling/calendar/sync/",
+            {"scope": "organizer", "event_id": self.event.id, "sync_token": changes.data["sync_token"]},
+        )
+        self.assertEqual(other_scope.status_code, 400)
+
+    def test_ics_feed_streams_with_validators_and_answers_304_without_reading_rows(self):
+        start_at = timezone.now() + timedelta(days=3)
+        booking = Booking.objects.create(
+            event=self.event,
+            organizer=self.organizer,
+            resource=self.resource,
+            start_at=start_at,
+            end_at=start_at + timedelta(hours=2),
+            attendee_count=1,
+            status=Booking.Status.CONFIRMED,
+            source=Booking.Source.INSTANT,
+        )
+        project_calendar_events(booking_ids=[booking.id])
+
+        api = APIClient()
+        api.force_authenticate(self.provider)
+        issued = api.post("/api/scheduling/calendar/feed-tokens/", {"scope": "resource"}, format="json")
+        self.assertEqual(issued.status_code, 201)
+        self.assertEqual(CalendarFeedToken.objects.get(user=self.provider).scope, "resource")
+        self.assertNotIn(issued.data["token"], CalendarFeedToken.objects.get(user=self.provider).token_hash)
+
+        feed_client = APIClient()
+        feed_path = f"/api/scheduling/calendar/feed/{issued.data['token']}.ics"
+        response = feed_client.get(feed_path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn(f"UID:booking-{booking.id}@scheduling\r\n", body)
+        self.assertIn("SUMMARY:Outbox Vendor booking\r\n", body)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("Last-Modified", response)
+
+        # Token lookup and the validator aggregate only.
+        with self.assertNumQueries(2):
+            cached = feed_client.get(feed_path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+        Booking.objects.filter(id=booking.id).update(status=Booking.Status.CANCELLED)
+        project_calendar_events(booking_ids=[booking.id])
+        changed = feed_client.get(feed_path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotIn("BEGIN:VEVENT", b"".join(changed.streaming_content).decode("utf-8"))
+
+        api.post("/api/scheduling/calendar/feed-tokens/", {"scope": "resource"}, format="json")
+        self.assertEqual(feed_client.get(feed_path).status_code, 404)
+
+    def test_expiry_pages_through_backlog_and_emits_events_in_bulk(self):
+        now = timezone.now()
+
+        def make_request(status, expires_at):
+            return BookingRequest.objects.create(
+                event=self.event,
+                organizer=self.organizer,
+                resource=self.resource,
+                requested_start_at=now + timedelta(days=10),
+                requested_end_at=now + timedelta(days=10, hours=2),
+                attendee_count=1,
+                status=status,
+                expires_at=expires_at,
+            )
+
+        due = [make_request(BookingRequest.Status.PENDING, now - timedelta(minutes=index + 1)) for index in range(7)]
+        not_due = make_request(BookingRequest.Status.PENDING, now + timedelta(hours=1))
+        approved = make_request(BookingRequest.Status.APPROVED, now - timedelta(hours=1))
+
+        # Per chunk: select, conditional update, re-read and one outbox insert inside a
+        # savepoint; then one empty select ends the run.
+        with self.assertNumQueries(3 * (4 + 2) + (1 + 2)):
+            metrics = expire_pending_requests(batch_size=3)
+        self.assertEqual(metrics["expired"], 7)
+        self.assertEqual(metrics["batches"], 3)
+        self.assertIn("per_second", metrics)
+
+        statuses = dict(BookingRequest.objects.values_list("id", "status"))
+        self.assertTrue(all(statuses[request.id] == BookingRequest.Status.EXPIRED for request in due))
+        self.assertEqual(statuses[not_due.id], BookingRequest.Status.PENDING)
+        self.assertEqual(statuses[approved.id], BookingRequest.Status.APPROVED)
+        self.assertEqual(
+            sorted(
+                OutboxEvent.objects.filter(event_type="request.expired").values_list("payload__request_id", flat=True)
+            ),
+            sorted(request.id for request in due),
+        )
+
+        make_request(BookingRequest.Status.PENDING, now - timedelta(minutes=1))
+        make_request(BookingRequest.Status.PENDING, now - timedelta(minutes=2))
+        stdout = StringIO()
+        call_command("expire_pending_booking_requests", "--limit", "1", stdout=stdout)
+        self.assertIn("Expired 1 booking request(s)", stdout.getvalue())
+        self.assertEqual(BookingRequest.objects.filter(status=BookingRequest.Status.PENDING).count(), 2)
+
     @override_settings(
         SCHEDULING_OUTBOX_MAX_ATTEMPTS=2,
         SCHEDULING_OUTBOX_RETRY_BASE_SECONDS=1,
@@ -488,7 +1562,7 @@ class SchedulingOutboxWorkerTests(TestCase):
             payload={"booking_id": 9999},
         )
 
-        with patch("scheduling.services._dispatch_webhooks_for_event", side_effect=RuntimeError("webhook down")):
+        with patch("scheduling.services._dispatch_webhooks_for_events", side_effect=RuntimeError("webhook down")):
             first = dispatch_outbox_events(limit=10)
         self.assertEqual(first["processed"], 0)
         self.assertEqual(first["failed"], 1)
@@ -500,8 +1574,9 @@ class SchedulingOutboxWorkerTests(TestCase):
 
         outbox_event.next_attempt_at = timezone.now() - timedelta(seconds=1)
         outbox_event.save(update_fields=["next_attempt_at"])
+        outbox_event.deliveries.update(next_attempt_at=outbox_event.next_attempt_at)
 
-        with patch("scheduling.services._dispatch_webhooks_for_event", side_effect=RuntimeError("webhook down")):
+        with patch("scheduling.services._dispatch_webhooks_for_events", side_effect=RuntimeError("webhook down")):
             second = dispatch_outbox_events(limit=10)
         self.assertEqual(second["processed"], 0)
         self.assertEqual(second["failed"], 0)
@@ -515,6 +1590,224 @@ class SchedulingOutboxWorkerTests(TestCase):
         self.assertEqual(dead_letter.event_type, outbox_event.event_type)
         self.assertIn("webhook down", dead_letter.error_message)
 
+    def test_dispatch_claims_batch_once_and_writes_outcomes_in_bulk(self):
+        events = [
+            OutboxEvent.objects.create(
+                event_type="booking.confirmed",
+                aggregate_type="booking",
+                aggregate_id=str(9000 + index),
+                payload={"booking_id": 9000 + index},
+            )
+            for index in range(4)
+        ]
+        # Already claimed by another dispatcher; must not be picked up again.
+        OutboxEvent.objects.filter(id=events[3].id).update(status=OutboxEvent.Status.PROCESSING)
+
+        def deliver(batch, skip):
+            self.assertEqual([event.id for event in batch], [event.id for event in events[:3]])
+            return {
+                (event.id, "https://hooks.example/a"): RuntimeError("webhook down") if event == events[1] else None
+                for event in batch
+            }
+
+        # Claim (read, mark, re-read) and delivery state read, then one SENT update, one
+        # FAILED bulk update and one insert of the per-consumer delivery rows.
+        with patch("scheduling.services._dispatch_webhooks_for_events", side_effect=deliver):
+            with self.assertNumQueries(7):
+                result = dispatch_outbox_events(limit=10, consume_notifications=False, consume_calendar=False)
+        self.assertEqual(result, {"claimed": 3, "processed": 2, "failed": 1, "dead_lettered": 0})
+
+        statuses = dict(OutboxEvent.objects.values_list("id", "status"))
+        self.assertEqual(statuses[events[0].id], OutboxEvent.Status.SENT)
+        self.assertEqual(statuses[events[1].id], OutboxEvent.Status.FAILED)
+        self.assertEqual(statuses[events[2].id], OutboxEvent.Status.SENT)
+        self.assertEqual(statuses[events[3].id], OutboxEvent.Status.PROCESSING)
+        self.assertEqual(OutboxEvent.objects.get(id=events[0].id).attempts, 1)
+
+        self.assertEqual(
+            dispatch_outbox_events(limit=10), {"claimed": 0, "processed": 0, "failed": 0, "dead_lettered": 0}
+        )
+
+    @override_settings(
+        SCHEDULING_WEBHOOK_URLS=["https://hooks.example/healthy", "https://hooks.example/flaky"],
+        SCHEDULING_OUTBOX_RETRY_BASE_SECONDS=1,
+    )
+    def test_retry_only_redelivers_to_failed_consumer(self):
+        outbox_event = OutboxEvent.objects.create(
+            event_type="booking.confirmed",
+            aggregate_type="booking",
+            aggregate_id="555",
+            payload={"booking_id": 555},
+        )
+        posted = []
+
+        def flaky_post(request_obj, timeout, max_concurrency):
+            posted.append(request_obj.full_url)
+            if request_obj.full_url.endswith("/flaky") and len(posted) <= 2:
+                raise urllib_error.URLError("flaky down")
+            return 200
+
+        with patch(WEBHOOK_POST, side_effect=flaky_post), patch(
+            "scheduling.services._dispatch_notifications_for_events",
+            side_effect=lambda events: dict.fromkeys(event.id for event in events),
+        ) as notify:
+            first = dispatch_outbox_events(limit=10)
+            self.assertEqual(first["failed"], 1)
+            outbox_event.refresh_from_db()
+            self.assertEqual(outbox_event.status, OutboxEvent.Status.FAILED)
+            self.assertIn("flaky down", outbox_event.last_error)
+
+            OutboxEvent.objects.filter(id=outbox_event.id).update(next_attempt_at=timezone.now())
+            outbox_event.deliveries.filter(consumer="webhook:https://hooks.example/flaky").update(
+                next_attempt_at=timezone.now()
+            )
+            second = dispatch_outbox_events(limit=10)
+
+        self.assertEqual(second["processed"], 1)
+        self.assertEqual(notify.call_count, 1)
+        self.assertEqual(sorted(posted[:2]), ["https://hooks.example/flaky", "https://hooks.example/healthy"])
+        self.assertEqual(posted[2:], ["https://hooks.example/flaky"])
+
+        deliveries = dict(outbox_event.deliveries.values_list("consumer", "attempts"))
+        self.assertEqual(
+            deliveries,
+            {
+                "notifications": 1,
+                "calendar": 1,
+                "webhook:https://hooks.example/healthy": 1,
+                "webhook:https://hooks.example/flaky": 2,
+            },
+        )
+
+    def test_archive_command_moves_old_sent_events_and_purges_archive(self):
+        old = timezone.now() - timedelta(days=30)
+        old_sent = OutboxEvent.objects.create(
+            event_type="booking.confirmed",
+            aggregate_type="booking",
+            aggregate_id="1",
+            payload={"booking_id": 1},
+            status=OutboxEvent.Status.SENT,
+            attempts=1,
+        )
+        old_sent.deliveries.create(consumer="notifications", status="sent", attempts=1)
+        old_failed = OutboxEvent.objects.create(
+            event_type="booking.confirmed",
+            aggregate_type="booking",
+            aggregate_id="2",
+            status=OutboxEvent.Status.FAILED,
+        )
+        recent_sent = OutboxEvent.objects.create(
+            event_type="booking.confirmed",
+            aggregate_type="booking",
+            aggregate_id="3",
+            status=OutboxEvent.Status.SENT,
+        )
+        OutboxEvent.objects.filter(id__in=[old_sent.id, old_failed.id]).update(created_at=old)
+
+        stdout = StringIO()
+        call_command("archive_scheduling_outbox", "--older-than-days", "14", "--batch-size", "1", stdout=stdout)
+
+        self.assertIn("Archived 1 outbox event(s)", stdout.getvalue())
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list("id", flat=True)),
+            {old_failed.id, recent_sent.id},
+        )
+        archived = OutboxEventArchive.objects.get()
+        self.assertEqual(archived.original_id, old_sent.id)
+        self.assertEqual(archived.payload, {"booking_id": 1})
+        self.assertEqual(archived.created_at, old)
+
+        stdout = StringIO()
+        call_command(
+            "archive_scheduling_outbox",
+            "--older-than-days",
+            "14",
+            "--purge-archive-older-than-days",
+            "20",
+            stdout=stdout,
+        )
+        self.assertIn("Purged 1 archived event(s)", stdout.getvalue())
+        self.assertFalse(OutboxEventArchive.objects.exists())
+
+    def test_archive_partition_creation_moves_month_rows_out_of_default_partition(self):
+        cursor = Mock()
+        # March: missing before and after the lock, with rows in DEFAULT. April: already exists.
+        cursor.fetchone.side_effect = [(False,), (False,), (True,), (True,)]
+        _ensure_archive_partitions(
+            cursor,
+            [
+                datetime(2026, 3, 14, tzinfo=datetime_timezone.utc),
+                datetime(2026, 4, 2, tzinfo=datetime_timezone.utc),
+            ],
+        )
+
+        statements = [" ".join(call.args[0].split()) for call in cursor.execute.call_args_list]
+        table = OutboxEventArchive._meta.db_table
+        march = f"{table}_y2026m03"
+        self.assertEqual(
+            [statement.split(" (")[0].split(" WHERE")[0] for statement in statements],
+            [
+                "SELECT to_regclass(%s) IS NOT NULL;",
+                f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;",
+                "SELECT to_regclass(%s) IS NOT NULL;",
+                "SELECT EXISTS",
+                f"ALTER TABLE {table} DETACH PARTITION {table}_default;",
+                f"CREATE TABLE {march} PARTITION OF {table} FOR VALUES FROM",
+                "WITH moved AS",
+                f"ALTER TABLE {table} ATTACH PARTITION {table}_default DEFAULT;",
+                "SELECT to_regclass(%s) IS NOT NULL;",
+            ],
+        )
+        self.assertIn(f"INSERT INTO {march} SELECT * FROM moved", statements[6])
+        self.assertEqual(cursor.execute.call_args_list[6].args[1], ["2026-03-01", "2026-04-01"])
+
+    def test_emit_wakes_idle_waiter_and_daemon_drains_on_sigterm(self):
+        stop_event = threading.Event()
+        waiter = CacheOutboxWaiter(check_interval=0.01)
+        self.assertFalse(waiter.wait(0.05, stop_event))
+        with self.captureOnCommitCallbacks(execute=True):
+            _emit_outbox(event_type="booking.confirmed", aggregate_type="booking", aggregate_id=1, payload={})
+        self.assertTrue(waiter.wait(0.05, stop_event))
+
+        passes = []
+
+        def dispatch_then_terminate(**kwargs):
+            passes.append(kwargs)
+            if len(passes) == 1:
+                os.kill(os.getpid(), signal.SIGTERM)
+            return {"claimed": 1, "processed": 1, "failed": 0, "dead_lettered": 0}
+
+        stdout = StringIO()
+        with patch(
+            "scheduling.management.commands.dispatch_scheduling_outbox.dispatch_outbox_events",
+            side_effect=dispatch_then_terminate,
+        ):
+            call_command("dispatch_scheduling_outbox", "--loop", "--poll-interval", "0.05", stdout=stdout)
+        self.assertEqual(len(passes), 1)
+        self.assertIn("processed=1", stdout.getvalue())
+
+    def test_daemon_keeps_claiming_while_full_batches_are_only_deferred(self):
+        waiter = Mock()
+        waiter.wait.side_effect = lambda timeout, stop_event: stop_event.wait(timeout)
+        passes = []
+
+        def dispatch_deferred_then_terminate(**kwargs):
+            passes.append(kwargs)
+            if len(passes) == 2:
+                os.kill(os.getpid(), signal.SIGTERM)
+            # Every claimed event is held back by batch linger, so nothing counts as an outcome.
+            claimed = kwargs["limit"] if len(passes) == 1 else 0
+            return {"claimed": claimed, "processed": 0, "failed": 0, "dead_lettered": 0}
+
+        with patch(
+            "scheduling.management.commands.dispatch_scheduling_outbox.dispatch_outbox_events",
+            side_effect=dispatch_deferred_then_terminate,
+        ), patch("scheduling.management.commands.dispatch_scheduling_outbox.get_outbox_waiter", return_value=waiter):
+            call_command("dispatch_scheduling_outbox", "--loop", "--limit", "2", stdout=StringIO())
+        self.assertEqual(len(passes), 2)
+        # Only the short second pass waits for a wake-up.
+        self.assertEqual(waiter.wait.call_count, 1)
+
     @override_settings(
         SCHEDULING_WEBHOOK_URLS=["https://hooks.example/signing"],
         SCHEDULING_WEBHOOK_SECRET="test-secret",
@@ -530,12 +1823,12 @@ class SchedulingOutboxWorkerTests(TestCase):
 
         captured = {}
 
-        def fake_urlopen(request_obj, timeout):
+        def fake_post(request_obj, timeout, max_concurrency):
             captured["request"] = request_obj
             captured["timeout"] = timeout
-            return _DummyUrlOpenResponse(status=200)
+            return 200
 
-        with patch("scheduling.services.urllib_request.urlopen", side_effect=fake_urlopen):
+        with patch(WEBHOOK_POST, side_effect=fake_post):
             result = dispatch_outbox_events(
                 limit=10,
                 consume_notifications=False,
@@ -577,7 +1870,7 @@ class SchedulingOutboxWorkerTests(TestCase):
             payload={"booking_id": 888},
         )
 
-        with patch("scheduling.services.urllib_request.urlopen", side_effect=urllib_error.URLError("network down")):
+        with patch(WEBHOOK_POST, side_effect=urllib_error.URLError("network down")):
             first = dispatch_outbox_events(limit=10, consume_notifications=False, consume_webhooks=True)
         self.assertEqual(first["processed"], 0)
         self.assertEqual(first["failed"], 1)
@@ -588,7 +1881,8 @@ class SchedulingOutboxWorkerTests(TestCase):
 
         outbox_event.next_attempt_at = timezone.now() - timedelta(seconds=1)
         outbox_event.save(update_fields=["next_attempt_at"])
-        with patch("scheduling.services.urllib_request.urlopen", side_effect=urllib_error.URLError("network down")):
+        outbox_event.deliveries.update(next_attempt_at=outbox_event.next_attempt_at)
+        with patch(WEBHOOK_POST, side_effect=urllib_error.URLError("network down")):
             second = dispatch_outbox_events(limit=10, consume_notifications=False, consume_webhooks=True)
         self.assertEqual(second["processed"], 0)
         self.assertEqual(second["failed"], 1)
@@ -599,9 +1893,10 @@ class SchedulingOutboxWorkerTests(TestCase):
 
         outbox_event.next_attempt_at = timezone.now() - timedelta(seconds=1)
         outbox_event.save(update_fields=["next_attempt_at"])
+        outbox_event.deliveries.update(next_attempt_at=outbox_event.next_attempt_at)
         with patch(
-            "scheduling.services.urllib_request.urlopen",
-            side_effect=AssertionError("urlopen should not be called while circuit is open"),
+            WEBHOOK_POST,
+            side_effect=AssertionError("webhook should not be posted while circuit is open"),
         ):
             third = dispatch_outbox_events(limit=10, consume_notifications=False, consume_webhooks=True)
 
@@ -614,6 +1909,110 @@ class SchedulingOutboxWorkerTests(TestCase):
         self.assertEqual(outbox_event.attempts, 2)
         self.assertIn("circuit is open", outbox_event.last_error.lower())
 
+    @override_settings(SCHEDULING_WEBHOOK_SECRET="test-secret")
+    def test_batched_target_posts_json_arrays_and_lingers_on_partial_batch(self):
+        WebhookTarget.objects.create(url="https://hooks.example/batch", max_batch_size=2, max_linger_seconds=60)
+        outbox_events = [
+            OutboxEvent.objects.create(
+                event_type="booking.confirmed",
+                aggregate_type="booking",
+                aggregate_id=str(index),
+                payload={"booking_id": index},
+            )
+            for index in range(3)
+        ]
+        posted = []
+
+        def fake_post(request_obj, timeout, max_concurrency):
+            posted.append(request_obj)
+            return 200
+
+        with patch(WEBHOOK_POST, side_effect=fake_post):
+            first = dispatch_outbox_events(
+                limit=10, consume_notifications=False, consume_webhooks=True, consume_calendar=False
+            )
+
+        self.assertEqual(first["processed"], 2)
+        self.assertEqual(first["failed"], 0)
+        self.assertEqual(len(posted), 1)
+        body = json.loads(posted[0].data)
+        self.assertEqual([item["outbox_id"] for item in body], [event.id for event in outbox_events[:2]])
+        headers = {key.lower(): value for key, value in posted[0].header_items()}
+        self.assertEqual(headers["x-scheduling-event"], "batch")
+        self.assertEqual(headers["x-scheduling-batch-size"], "2")
+        self.assertTrue(headers["idempotency-key"].startswith("scheduling-outbox-batch-"))
+        expected_signature = hmac.new(
+            b"test-secret",
+            f"{headers['x-scheduling-timestamp']}.{posted[0].data.decode('utf-8')}".encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+        self.assertEqual(headers["x-scheduling-signature"], f"v1={expected_signature}")
+
+        # The trailing event waits for company instead of going out alone.
+        lingering = outbox_events[2]
+        lingering.refresh_from_db()
+        self.assertEqual(lingering.status, OutboxEvent.Status.PENDING)
+        self.assertEqual(lingering.attempts, 0)
+        self.assertGreater(lingering.next_attempt_at, timezone.now())
+
+        past = timezone.now() - timedelta(minutes=5)
+        OutboxEvent.objects.filter(id=lingering.id).update(created_at=past, next_attempt_at=past)
+        lingering.deliveries.update(next_attempt_at=past)
+        with patch(WEBHOOK_POST, side_effect=fake_post):
+            second = dispatch_outbox_events(
+                limit=10, consume_notifications=False, consume_webhooks=True, consume_calendar=False
+            )
+
+        self.assertEqual(second["processed"], 1)
+        self.assertEqual([item["outbox_id"] for item in json.loads(posted[1].data)], [lingering.id])
+        lingering.refresh_from_db()
+        self.assertEqual(lingering.status, OutboxEvent.Status.SENT)
+
+    def test_webhook_engine_reuses_connections_and_bounds_per_target_concurrency(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveWebhookHandler)
+        server.lock = threading.Lock()
+        server.connections = set()
+        server.in_flight = 0
+        server.max_in_flight = 0
+        server.paths = []
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        engine = WebhookDeliveryEngine(max_workers=8)
+
+        def deliveries(path, count):
+            return [
+                (urllib_request.Request(f"{base_url}{path}", data=b"{}", method="POST"), 5, 2)
+                for _ in range(count)
+            ]
+
+        self.assertEqual(engine.deliver(deliveries("/ok", 6)), [204] * 6)
+        self.assertEqual(server.max_in_flight, 2)
+        self.assertEqual(len(server.connections), 2)
+
+        # The idle keep-alive sockets serve the next batch.
+        self.assertEqual(engine.deliver(deliveries("/ok", 2)), [204, 204])
+        self.assertEqual(len(server.connections), 2)
+
+        (broken,) = engine.deliver(deliveries("/broken", 1))
+        self.assertIsInstance(broken, urllib_error.HTTPError)
+        self.assertEqual(broken.code, 500)
+
+        # Redirects are failures rather than silently followed or counted as delivered.
+        (moved,) = engine.deliver(deliveries("/moved", 1))
+        self.assertIsInstance(moved, urllib_error.HTTPError)
+        self.assertEqual(moved.code, 302)
+
+        with patch.dict(os.environ, {"http_proxy": base_url, "no_proxy": ""}):
+            proxied = engine.deliver(
+                [(urllib_request.Request("http://hooks.invalid/ok", data=b"{}", method="POST"), 5, 2)]
+            )
+        self.assertEqual(proxied, [204])
+        self.assertEqual(server.paths[-1], "http://hooks.invalid/ok")
+
 
 class SchedulingPermissionApiTests(TestCase):
     def setUp(self):
@@ -963,6 +2362,7 @@ class SchedulingPermissionApiTests(TestCase):
 
 class SchedulingAdminOpsApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.admin = self._make_user("ops_admin", "organizer", is_staff=True)
         self.organizer = self._make_user("ops_organizer", "organizer")
@@ -1027,6 +2427,30 @@ class SchedulingAdminOpsApiTests(TestCase):
         self.assertFalse(updated.data["has_secret"])
         self.assertFalse(updated.data["is_active"])
 
+    def test_webhook_target_list_is_cached_until_api_writes(self):
+        cache.clear()
+        WebhookTarget.objects.create(url="https://hooks.example/cached")
+        self.assertEqual([target["url"] for target in _webhook_targets()], ["https://hooks.example/cached"])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(_webhook_targets()), 1)
+
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post(
+                "/api/scheduling/webhook-targets/",
+                {"url": "https://hooks.example/batched", "max_batch_size": 50, "max_linger_seconds": 2},
+                format="json",
+            )
+        self.assertEqual(created.status_code, 201)
+        targets = {target["url"]: target for target in _webhook_targets()}
+        self.assertEqual(targets["https://hooks.example/batched"]["max_batch_size"], 50)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/scheduling/webhook-targets/{created.data['id']}/", {"is_active": False}, format="json"
+            )
+        self.assertEqual([target["url"] for target in _webhook_targets()], ["https://hooks.example/cached"])
+
     def test_dead_letter_replay_requires_admin(self):
         dead_letter = OutboxDeadLetter.objects.create(
             event_type="booking.confirmed",
@@ -1103,3 +2527,54 @@ class SchedulingAdminOpsApiTests(TestCase):
         self.assertIn("webhooks", summary.data)
         self.assertIn("recent_conflict_incidents", summary.data)
         self.assertGreaterEqual(summary.data.get("dead_letter_count", 0), 1)
+
+    @override_settings(SCHEDULING_OUTBOX_MAX_ATTEMPTS=1)
+    def test_ops_counters_follow_transitions_without_table_aggregates(self):
+        OutboxEvent.objects.create(event_type="booking.confirmed", aggregate_type="booking", aggregate_id="1")
+        self.assertEqual(get_ops_counters()["outbox_counts"], {"pending": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _emit_outbox(event_type="booking.confirmed", aggregate_type="booking", aggregate_id=2, payload={})
+            _record_conflict_incident(
+                operation=BookingConflictIncident.Operation.CREATE,
+                conflict_source=BookingConflictIncident.ConflictSource.DB_CONSTRAINT,
+                resource=self.resource,
+                requested_start_at=timezone.now(),
+                requested_end_at=timezone.now() + timedelta(hours=1),
+                message="Overlap",
+            )
+        with self.assertNumQueries(0):
+            counters = get_ops_counters()
+        self.assertEqual(counters["outbox_counts"], {"pending": 2})
+        self.assertEqual(counters["last_24h_by_source"], {"db_constraint": 1})
+
+        with self.captureOnCommitCallbacks(execute=True), patch(
+            "scheduling.services._build_event_notifications",
+            side_effect=[[], RuntimeError("notify down")],
+        ):
+            dispatch_outbox_events(limit=10, consume_webhooks=False)
+        counters = get_ops_counters()
+        self.assertEqual(counters["outbox_counts"], {"sent": 1, "dead_letter": 1})
+        self.assertEqual(counters["dead_letter_count"], 1)
+
+        cache.delete(SEEDED_KEY)
+        self.assertEqual(get_ops_counters(), counters)
+
+    def test_ops_counter_rebuild_keeps_deltas_committed_while_it_reads_the_tables(self):
+        OutboxEvent.objects.create(event_type="booking.confirmed", aggregate_type="booking", aggregate_id="1")
+        dead_letter_count = OutboxDeadLetter.objects.count
+
+        def count_then_claim():
+            # Committed after the status aggregate was read, before the snapshot is stored.
+            adjust_outbox_counts({OutboxEvent.Status.PENDING: -1, OutboxEvent.Status.PROCESSING: 1})
+            return dead_letter_count()
+
+        with patch("scheduling.ops_counters.OutboxDeadLetter.objects.count", side_effect=count_then_claim):
+            counters = get_ops_counters()
+        self.assertEqual(counters["outbox_counts"], {"processing": 1})
+        self.assertIsNone(cache.get(SEEDING_KEY))
+
+        # The seeded marker expires, so the next read rebuilds from the tables and drops drift.
+        adjust_outbox_counts({OutboxEvent.Status.SENT: 5})
+        cache.delete(SEEDED_KEY)
+        self.assertEqual(get_ops_counters()["outbox_counts"], {"pending": 1})
@@ -10,9 +10,13 @@ from .views import (
     BookingConflictIncidentViewSet,
     BookingRequestViewSet,
     BookingViewSet,
+    CalendarFeedAPIView,
+    CalendarFeedTokenAPIView,
+    CalendarSyncAPIView,
     CalendarViewAPIView,
     CancelBookingAPIView,
     CreateBookingAPIView,
+    CreateBookingBatchAPIView,
     CreateRequestAPIView,
     DeclineRequestAPIView,
     MarketplaceResourceViewSet,
@@ -40,6 +44,7 @@ router.register(r"ops/conflict-incidents", BookingConflictIncidentViewSet, basen
 urlpatterns = [
     path("availability/search/", AvailabilitySearchAPIView.as_view(), name="scheduling-availability-search"),
     path("bookings/create/", CreateBookingAPIView.as_view(), name="scheduling-booking-create"),
+    path("bookings/batch/", CreateBookingBatchAPIView.as_view(), name="scheduling-booking-batch"),
     path("requests/create/", CreateRequestAPIView.as_view(), name="scheduling-request-create"),
     path("requests/<int:request_id>/approve/", ApproveRequestAPIView.as_view(), name="scheduling-request-approve"),
     path("requests/<int:request_id>/decline/", DeclineRequestAPIView.as_view(), name="scheduling-request-decline"),
@@ -50,6 +55,9 @@ urlpatterns = [
         name="scheduling-booking-reschedule",
     ),
     path("calendar/", CalendarViewAPIView.as_view(), name="scheduling-calendar"),
+    path("calendar/sync/", CalendarSyncAPIView.as_view(), name="scheduling-calendar-sync"),
+    path("calendar/feed-tokens/", CalendarFeedTokenAPIView.as_view(), name="scheduling-calendar-feed-token"),
+    path("calendar/feed/<str:token>.ics", CalendarFeedAPIView.as_view(), name="scheduling-calendar-feed"),
     path("ops/summary/", SchedulingOpsSummaryAPIView.as_view(), name="scheduling-ops-summary"),
     path("", include(router.urls)),
 ]
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import json
 from datetime import timedelta
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
@@ -36,8 +42,12 @@ from .serializers import (
     BookingConflictIncidentSerializer,
     BookingRequestSerializer,
     BookingSerializer,
+    CalendarFeedTokenSerializer,
     CalendarQuerySerializer,
+    CalendarSyncQuerySerializer,
     CancelBookingSerializer,
+    CapacityQuerySerializer,
+    CreateBookingBatchSerializer,
     CreateBookingSerializer,
     CreateRequestSerializer,
     MarketplaceResourceSerializer,
@@ -51,14 +61,28 @@ from .serializers import (
 from .services import (
     approve_request,
     build_calendar_view,
+    calendar_feed_validators_for,
+    bump_webhook_targets_version_on_commit,
     cancel_booking,
     create_booking,
+    create_bookings_batch,
     create_request,
     decline_request,
+    decode_search_cursor,
+    get_calendar_feed_token,
+    get_resource_capacity,
     get_scheduling_ops_summary,
+    issue_calendar_feed_token,
+    iter_availability_page,
+    iter_calendar_feed,
+    mark_exception_dirty,
+    mark_rule_dirty,
     replay_dead_letter,
     reschedule_booking,
+    revoke_calendar_feed_token,
     search_availability,
+    search_availability_keyset,
+    sync_calendar_view,
 )
 
 
@@ -87,7 +111,7 @@ class MarketplaceResourceViewSet(viewsets.ModelViewSet):
         qs = self.queryset
         if is_admin(self.request.user):
             return qs
-        if self.action in {"list", "retrieve"}:
+        if self.action in {"list", "retrieve", "capacity"}:
             return qs.filter(is_active=True)
         return qs.filter(owner=self.request.user)
 
@@ -100,6 +124,23 @@ class MarketplaceResourceViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to edit this resource.")
         serializer.save()
 
+    @action(detail=True, methods=["get"], url_path="capacity")
+    def capacity(self, request, pk=None):
+        resource = self.get_object()
+        serializer = CapacityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        try:
+            data = get_resource_capacity(
+                resource=resource,
+                start_at=payload["start_at"],
+                end_at=payload["end_at"],
+                attendee_count=payload["attendee_count"],
+            )
+        except PolicyViolationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
 
 class ResourcePolicyViewSet(viewsets.ModelViewSet):
     serializer_class = ResourcePolicySerializer
@@ -140,13 +181,19 @@ class AvailabilityRuleViewSet(viewsets.ModelViewSet):
         resource = serializer.validated_data["resource"]
         if not can_manage_resource(self.request.user, resource):
             raise PermissionDenied("You do not have permission to manage availability for this resource.")
-        serializer.save()
+        rule = serializer.save()
+        mark_rule_dirty(rule, reason="rule.created")
 
     def perform_update(self, serializer):
         rule = self.get_object()
         if not can_manage_resource(self.request.user, rule.resource):
             raise PermissionDenied("You do not have permission to update this rule.")
-        serializer.save(version=rule.version + 1)
+        updated_rule = serializer.save(version=rule.version + 1)
+        mark_rule_dirty(updated_rule, previous=rule, reason="rule.updated")
+
+    def perform_destroy(self, instance):
+        mark_rule_dirty(instance, reason="rule.deleted")
+        instance.delete()
 
 
 class AvailabilityExceptionViewSet(viewsets.ModelViewSet):
@@ -164,13 +211,19 @@ class AvailabilityExceptionViewSet(viewsets.ModelViewSet):
         resource = serializer.validated_data["resource"]
         if not can_manage_resource(self.request.user, resource):
             raise PermissionDenied("You do not have permission to manage exceptions for this resource.")
-        serializer.save()
+        exception = serializer.save()
+        mark_exception_dirty(exception, reason="exception.created")
 
     def perform_update(self, serializer):
         exception = self.get_object()
         if not can_manage_resource(self.request.user, exception.resource):
             raise PermissionDenied("You do not have permission to update this exception.")
-        serializer.save()
+        updated_exception = serializer.save()
+        mark_exception_dirty(updated_exception, previous=exception, reason="exception.updated")
+
+    def perform_destroy(self, instance):
+        mark_exception_dirty(instance, reason="exception.deleted")
+        instance.delete()
 
 
 class AvailabilitySlotViewSet(viewsets.ModelViewSet):
@@ -277,9 +330,15 @@ class WebhookTargetViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
+        bump_webhook_targets_version_on_commit()
 
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user)
+        bump_webhook_targets_version_on_commit()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_webhook_targets_version_on_commit()
 
 
 class OutboxEventOpsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -355,16 +414,32 @@ class AvailabilitySearchAPIView(BaseSchedulingAPIView):
         serializer.is_valid(raise_exception=True)
         payload = serializer.validated_data
 
-        data = search_availability(
-            start_at=payload["start_at"],
-            end_at=payload["end_at"],
-            resource_type=payload.get("resource_type"),
-            city=payload.get("city"),
-            attendee_count=payload.get("attendee_count", 1),
-            limit=payload.get("limit", 25),
-            offset=payload.get("offset", 0),
-        )
-        return Response({"results": data})
+        search_kwargs = {
+            "start_at": payload["start_at"],
+            "end_at": payload["end_at"],
+            "resource_type": payload.get("resource_type"),
+            "city": payload.get("city"),
+            "attendee_count": payload.get("attendee_count", 1),
+            "limit": payload.get("limit", 25),
+        }
+        if "offset" in payload:
+            data = search_availability(**search_kwargs, offset=payload["offset"], use_cache=True)
+            return Response({"results": data})
+
+        try:
+            after_id = decode_search_cursor(payload.get("cursor"))
+        except PolicyViolationError as exc:
+            return self._error_response(exc)
+
+        if payload.get("stream"):
+            lines = (
+                json.dumps(item, cls=DjangoJSONEncoder) + "\n"
+                for item in iter_availability_page(**search_kwargs, after_id=after_id)
+            )
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        page = search_availability_keyset(**search_kwargs, cursor=payload.get("cursor"), use_cache=True)
+        return Response(page)
 
 
 class CreateBookingAPIView(BaseSchedulingAPIView):
@@ -405,6 +480,45 @@ class CreateBookingAPIView(BaseSchedulingAPIView):
         return Response(output, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
+class CreateBookingBatchAPIView(BaseSchedulingAPIView):
+    def post(self, request):
+        serializer = CreateBookingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        event = get_object_or_404(Event, id=payload["event_id"])
+        if not can_manage_event(request.user, event):
+            raise PermissionDenied("You do not have permission to book against this event.")
+
+        resource_ids = {item["resource_id"] for item in payload["items"]}
+        resources = MarketplaceResource.objects.filter(is_active=True).in_bulk(resource_ids)
+        if len(resources) != len(resource_ids):
+            raise Http404("No MarketplaceResource matches the given query.")
+
+        items = [
+            {
+                "resource": resources[item["resource_id"]],
+                "start_at": item["start_at"],
+                "end_at": item["end_at"],
+                "attendee_count": item["attendee_count"],
+            }
+            for item in payload["items"]
+        ]
+        idempotency_key = request.headers.get("Idempotency-Key")
+        try:
+            bookings, created = create_bookings_batch(
+                organizer=request.user,
+                event=event,
+                items=items,
+                idempotency_key=idempotency_key,
+            )
+        except Exception as exc:
+            return self._error_response(exc)
+
+        output = {"results": BookingSerializer(bookings, many=True).data}
+        return Response(output, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
 class CreateRequestAPIView(BaseSchedulingAPIView):
     def post(self, request):
         serializer = CreateRequestSerializer(data=request.data)
@@ -550,6 +664,16 @@ class RescheduleBookingAPIView(BaseSchedulingAPIView):
         return Response(BookingSerializer(updated_booking).data)
 
 
+def _check_calendar_scope(user, scope: str, resource_id: int | None):
+    if scope == "admin" and not is_admin(user):
+        raise PermissionDenied("Only admins can use admin scope.")
+
+    if scope == "resource" and resource_id:
+        resource = get_object_or_404(MarketplaceResource, id=resource_id)
+        if not can_manage_resource(user, resource) and not is_admin(user):
+            raise PermissionDenied("You do not have permission to read this resource calendar.")
+
+
 class CalendarViewAPIView(BaseSchedulingAPIView):
     def get(self, request):
         serializer = CalendarQuerySerializer(data=request.query_params)
@@ -557,13 +681,7 @@ class CalendarViewAPIView(BaseSchedulingAPIView):
         payload = serializer.validated_data
 
         scope = payload["scope"]
-        if scope == "admin" and not is_admin(request.user):
-            raise PermissionDenied("Only admins can use admin scope.")
-
-        if scope == "resource" and payload.get("resource_id"):
-            resource = get_object_or_404(MarketplaceResource, id=payload["resource_id"])
-            if not can_manage_resource(request.user, resource) and not is_admin(request.user):
-                raise PermissionDenied("You do not have permission to read this resource calendar.")
+        _check_calendar_scope(request.user, scope, payload.get("resource_id"))
 
         try:
             events = build_calendar_view(
@@ -578,3 +696,72 @@ class CalendarViewAPIView(BaseSchedulingAPIView):
             return self._error_response(exc)
 
         return Response({"results": events})
+
+
+class CalendarSyncAPIView(BaseSchedulingAPIView):
+    def get(self, request):
+        serializer = CalendarSyncQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        scope = payload["scope"]
+        _check_calendar_scope(request.user, scope, payload.get("resource_id"))
+
+        try:
+            changes = sync_calendar_view(
+                user=request.user,
+                scope=scope,
+                sync_token=payload.get("sync_token") or None,
+                event_id=payload.get("event_id"),
+                resource_id=payload.get("resource_id"),
+            )
+        except Exception as exc:
+            return self._error_response(exc)
+
+        return Response(changes)
+
+
+class CalendarFeedTokenAPIView(BaseSchedulingAPIView):
+    def post(self, request):
+        serializer = CalendarFeedTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scope = serializer.validated_data["scope"]
+        _check_calendar_scope(request.user, scope, None)
+
+        token = issue_calendar_feed_token(user=request.user, scope=scope)
+        feed_url = request.build_absolute_uri(reverse("scheduling-calendar-feed", kwargs={"token": token}))
+        return Response({"scope": scope, "token": token, "feed_url": feed_url}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        serializer = CalendarFeedTokenSerializer(data=request.data or request.query_params)
+        serializer.is_valid(raise_exception=True)
+        revoke_calendar_feed_token(user=request.user, scope=serializer.validated_data["scope"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CalendarFeedAPIView(APIView):
+    # Calendar apps cannot send credentials; the token in the URL is the credential.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, token):
+        feed_token = get_calendar_feed_token(token)
+        if feed_token is None or (feed_token.scope == "admin" and not is_admin(feed_token.user)):
+            raise Http404("Unknown calendar feed.")
+
+        etag, last_modified = calendar_feed_validators_for(user=feed_token.user, scope=feed_token.scope)
+        etag = quote_etag(etag)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        # Conditional requests are answered before any row is read or serialized.
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = StreamingHttpResponse(
+                iter_calendar_feed(user=feed_token.user, scope=feed_token.scope),
+                content_type="text/calendar; charset=utf-8",
+            )
+            response.headers["Content-Disposition"] = 'inline; filename="calendar.ics"'
+        response.headers["ETag"] = etag
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error as urllib_error
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+import urllib3
+from django.conf import settings
+
+
+class WebhookDeliveryEngine:
+    """Delivers webhook requests concurrently from a thread pool over urllib3 connection pools.
+
+    Each host gets a blocking pool of ``max_concurrency`` keep-alive connections, so one
+    slow receiver can hold at most that many workers. Requests honour the usual proxy
+    environment variables, and are never retried or redirected: a POST leaves at most once.
+    """
+
+    def __init__(self, *, max_workers: int = 32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webhook-delivery")
+        self._managers = {}
+        self._managers_lock = threading.Lock()
+
+    def deliver(self, deliveries):
+        """Send ``(request, timeout, max_concurrency)`` tuples; return a status or exception per delivery."""
+        futures = [
+            self._executor.submit(self._deliver_one, request, timeout, max_concurrency)
+            for request, timeout, max_concurrency in deliveries
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    def _deliver_one(self, request, timeout: float, max_concurrency: int):
+        try:
+            return self._post(request, timeout, max_concurrency)
+        except urllib_error.URLError:
+            raise
+        except urllib3.exceptions.TimeoutError as exc:
+            raise urllib_error.URLError("timed out") from exc
+        except (urllib3.exceptions.HTTPError, OSError) as exc:
+            raise urllib_error.URLError(exc) from exc
+
+    def _manager_for(self, url: str, max_concurrency: int):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise urllib_error.URLError(f"unsupported URL scheme '{scheme}'")
+        proxy_url = None if proxy_bypass(parts.hostname or "") else getproxies().get(scheme)
+
+        key = (proxy_url, max_concurrency)
+        with self._managers_lock:
+            manager = self._managers.get(key)
+            if manager is None:
+                pool_kwargs = {"maxsize": max_concurrency, "block": True}
+                if proxy_url:
+                    manager = urllib3.ProxyManager(proxy_url, **pool_kwargs)
+                else:
+                    manager = urllib3.PoolManager(**pool_kwargs)
+                self._managers[key] = manager
+        return manager
+
+    def _post(self, request, timeout: float, max_concurrency: int):
+        manager = self._manager_for(request.full_url, max_concurrency)
+        response = manager.request(
+            "POST",
+            request.full_url,
+            body=request.data or b"",
+            headers=dict(request.header_items()),
+            timeout=urllib3.Timeout(total=timeout),
+            retries=False,
+            redirect=False,
+        )
+        if response.status >= 300:
+            raise urllib_error.HTTPError(request.full_url, response.status, response.reason, response.headers, None)
+        return response.status
+
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def get_webhook_engine():
+    global _engine, _engine_pid
+    with _engine_lock:
+        # A forked worker inherits the object but not the executor threads.
+        if _engine is None or _engine_pid != os.getpid():
+            _engine = WebhookDeliveryEngine(
+                max_workers=max(1, int(getattr(settings, "SCHEDULING_WEBHOOK_DELIVERY_THREADS", 32)))
+            )
+            _engine_pid = os.getpid()
+    return _engine